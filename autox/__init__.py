@@ -6,6 +6,16 @@ except PackageNotFoundError:
     # When running from source (not installed), fall back to a sensible default.
     __version__ = "0.1.0"
 
-from .config import config
-
 __all__ = ["__version__", "config"]
+
+
+def __getattr__(name):
+    # Loaded on first access: config pulls in pydantic and dotenv and sets up the logger
+    if name == "config":
+        from .config import config
+
+        # Importing the submodule bound `autox.config` to the module; the instance is what callers expect.
+        # Code that imported autox.config before still sees the module here, so prefer `from autox.config import config`
+        globals()["config"] = config
+        return config
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -10,8 +10,11 @@
 # After creating these objects, we need to associate formatter object to handler object.
 # Then associate handler object to logger object
 
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 from datetime import datetime
 from pathlib import Path
 
@@ -21,17 +24,71 @@ LOG_FILE_NAME = "autox_logs.log"
 # DATE_TIME_FORMAT = "%b-%d %H:%M:%S"
 DATE_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 SET_LOG_LEVEL = getattr(logging, os.environ.get("LOG_LEVEL", "DEBUG").upper())
+# LOG_QUEUE=true hands records to a background writer thread instead of writing them on the calling thread
+LOG_QUEUE = os.environ.get("LOG_QUEUE", "").upper() in {"TRUE", "YES", "1"}
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+# Seconds stopping the queue listener waits for room in a full queue before abandoning what is left
+LOG_QUEUE_STOP_TIMEOUT = 5
+# LOG_JSON=true also writes JSON lines with run/worker/test IDs, indexed in autox_logs/log_index.db
+LOG_JSON = os.environ.get("LOG_JSON", "").upper() in {"TRUE", "YES", "1"}
+# The text log of a run rotates at LOG_MAX_BYTES, keeping LOG_BACKUP_COUNT older files
+LOG_MAX_BYTES = int(os.environ.get("LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.environ.get("LOG_BACKUP_COUNT", "5"))
+# Older runs are deleted after LOG_RETENTION_DAYS or once all runs exceed LOG_RETENTION_MB; finished runs are gzipped
+LOG_RETENTION_DAYS = float(os.environ.get("LOG_RETENTION_DAYS", "14"))
+LOG_RETENTION_MB = float(os.environ.get("LOG_RETENTION_MB", "1024"))
+LOG_COMPRESS = os.environ.get("LOG_COMPRESS", "true").upper() in {"TRUE", "YES", "1"}
+
+
+def run_log_file_name():
+    """Text log of this process: workers (shards, envs, xdist) each get their own, as every process rotates its file."""
+    from autox.utilities.structured_log import current_worker_id
+
+    worker_id = current_worker_id()
+    return LOG_FILE_NAME if worker_id == "main" else f"{Path(LOG_FILE_NAME).stem}-{worker_id}.log"
 
 
 def set_autox_log_path():
     # Use a filesystem-safe timestamp (avoid ':' which is invalid on Windows)
     time_format = "run-%Y-%m-%d-%H-%M-%S"
     timestamp_directory = datetime.now().strftime(time_format)
-    log_dir = REPOSITORY_ROOT / LOG_FOLDER_NAME / timestamp_directory
+    # Only the path is decided here; the directory is created when the first record is written
+    return REPOSITORY_ROOT / LOG_FOLDER_NAME / timestamp_directory
+
+
+_log_maintenance_started = False
+
+
+def create_run_directory(log_dir):
+    """Create the run directory and, once per process, clean up older runs in the background."""
+    global _log_maintenance_started
+    from autox.utilities.log_retention import hold_run_lock, start_log_maintenance
+
     # Create directories recursively and tolerate existing dirs
     log_dir.mkdir(parents=True, exist_ok=True)
+    # Marks the run as in use for as long as this process lives, so retention leaves its files alone
+    hold_run_lock(log_dir)
+    if not _log_maintenance_started:
+        _log_maintenance_started = True
+
+        start_log_maintenance(
+            log_dir.parent,
+            max_age_days=LOG_RETENTION_DAYS,
+            max_total_bytes=LOG_RETENTION_MB * 1024 * 1024,
+            compress=LOG_COMPRESS,
+            exclude=[log_dir],
+        )
 
-    return log_dir
+
+class RunFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotating file handler that creates its run directory only when the first record is written."""
+
+    def __init__(self, filename):
+        super().__init__(filename, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8", delay=True)
+
+    def _open(self):
+        create_run_directory(Path(self.baseFilename).parent)
+        return super()._open()
 
 
 class ColorFormatter(logging.Formatter):
@@ -53,8 +110,99 @@ class ColorFormatter(logging.Formatter):
         return super().format(record)
 
 
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler for a bounded queue that never blocks on low-priority records.
+
+    When the queue is full, records below WARNING are dropped (and counted)
+    rather than stalling the caller; WARNING and above wait for room.
+    Records are queued unformatted: the listener thread does the formatting.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Resolve the message now, in case its args are mutated later, but leave the costly formatting to the listener
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg, record.args = record.getMessage(), None
+        return record
+
+    def enqueue(self, record):
+        if record.levelno >= logging.WARNING:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """Queue listener that flushes its handlers once the queue is drained instead of after every record."""
+
+    def enqueue_sentinel(self):
+        # The base put_nowait raises queue.Full when the queue is saturated at exit; the thread is still draining it
+        self.queue.put(self._sentinel, timeout=LOG_QUEUE_STOP_TIMEOUT)
+
+    def stop(self):
+        try:
+            self.enqueue_sentinel()
+        except queue.Full:
+            # The listener is stuck; leave the remaining records rather than hang the exit
+            return
+        self._thread.join()
+        self._thread = None
+
+    def dequeue(self, block):
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            for handler in self.handlers:
+                getattr(handler, "flush_batch", handler.flush)()
+            return self.queue.get(block)
+
+
+class BatchedFileHandler(RunFileHandler):
+    """File handler whose writes are flushed by the listener in batches rather than per record."""
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+    def close(self):
+        self.flush_batch()
+        super().close()
+
+
+def start_queue_listener(logger, handlers):
+    """Route `logger` through a bounded queue to `handlers`, which then run on a background thread."""
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.setLevel(SET_LOG_LEVEL)
+    # Levels are checked on the queue handler (and updated there by the CLI), not again by the listener
+    listener = BatchingQueueListener(log_queue, *handlers, respect_handler_level=False)
+    listener.start()
+    logger.addHandler(queue_handler)
+
+    def stop():
+        listener.stop()
+        if queue_handler.dropped:
+            message = f"Dropped {queue_handler.dropped} log record(s) because the log queue was full"
+            record = logging.LogRecord(logger.name, logging.WARNING, __file__, 0, message, None, None)
+            for handler in handlers:
+                handler.handle(record)
+        for handler in handlers:
+            handler.close()
+
+    atexit.register(stop)
+
+
 def setup_logger():
-    log_path = set_autox_log_path() / LOG_FILE_NAME
+    log_dir = RUN_LOG_DIR
+    log_path = RUN_LOG_FILE
 
     # Create logger object and set-level
     logger = logging.getLogger(__name__)
@@ -78,18 +226,36 @@ def setup_logger():
         console_handler.setLevel(SET_LOG_LEVEL)
         # Associate formatter and handler object
         console_handler.setFormatter(color_formatter)
-        # Associate handler and logger object
-        logger.addHandler(console_handler)
 
         # Create handler object and set-level
-        file_handler = logging.FileHandler(str(log_path), mode="w")
+        file_handler = (BatchedFileHandler if LOG_QUEUE else RunFileHandler)(str(log_path))
         file_handler.setLevel(SET_LOG_LEVEL)
         # Associate formatter and handler object
         file_handler.setFormatter(plain_formatter)
-        # Associate handler and logger object
-        logger.addHandler(file_handler)
+
+        handlers = [console_handler, file_handler]
+        if LOG_JSON:
+            from autox.utilities.structured_log import LOG_INDEX_DB_NAME, JsonLinesHandler, LogContextFilter
+
+            # Stamp run/worker/test IDs on the calling thread, before records reach the queue
+            logger.addFilter(LogContextFilter())
+            json_handler = JsonLinesHandler(
+                log_dir / f"{Path(LOG_FILE_NAME).stem}-{os.getpid()}.jsonl",
+                REPOSITORY_ROOT / LOG_FOLDER_NAME / LOG_INDEX_DB_NAME,
+            )
+            json_handler.setLevel(SET_LOG_LEVEL)
+            handlers.append(json_handler)
+
+        # Associate handler and logger object, directly or through the background queue
+        if LOG_QUEUE:
+            start_queue_listener(logger, handlers)
+        else:
+            for handler in handlers:
+                logger.addHandler(handler)
 
     return logger
 
 
+RUN_LOG_DIR = set_autox_log_path()
+RUN_LOG_FILE = RUN_LOG_DIR / run_log_file_name()
 logger = setup_logger()
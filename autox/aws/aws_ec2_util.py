@@ -1,78 +1,269 @@
+import atexit
+import contextlib
+import io
 import os
-import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
 
-import boto3
 import botocore
 import paramiko
 
+from autox.utilities.cloud_cache import cache_instances, describe_instance, get_boto_client, get_metadata_cache
+
+# Bytes read from a channel per recv call
+CHUNK_SIZE = 32 * 1024
+# Sleep between channel polls while the command is running but silent
+CHANNEL_POLL_INTERVAL = 0.05
+
+
+class SSHConnectionManager:
+    """Keeps one live SSH transport per (instance, user) and opens a new channel per command.
+
+    The instance DNS name and the parsed private key come from the shared
+    metadata cache, so only the first command to a host pays for
+    `describe_instances`, the Parameter Store lookup and the SSH handshake.
+    A dropped transport is reconnected transparently on the next command,
+    with the instance metadata looked up again in case its address changed.
+    """
+
+    def __init__(self):
+        self._clients = {}
+        self._host_locks = {}
+        self._lock = threading.Lock()
+
+    def resolve_dns(self, instance_id):
+        instance = describe_instance(instance_id)
+        return instance["PublicDnsName"] or instance["PrivateIpAddress"]
+
+    def resolve_fleet(self, instance_ids=None, tags=None):
+        """Resolve many instances with one (paginated) `describe_instances` call and cache them.
+
+        Select instances by `instance_ids`, by a `{tag_name: value}` dict of
+        `tags` (only running instances), or both. Returns the instance ids found.
+        """
+        kwargs = {}
+        if instance_ids:
+            kwargs["InstanceIds"] = list(instance_ids)
+        if tags:
+            kwargs["Filters"] = [{"Name": f"tag:{name}", "Values": [value]} for name, value in tags.items()]
+            kwargs["Filters"].append({"Name": "instance-state-name", "Values": ["running"]})
+
+        instances = []
+        for page in get_boto_client("ec2").get_paginator("describe_instances").paginate(**kwargs):
+            for reservation in page["Reservations"]:
+                instances.extend(reservation["Instances"])
+        cache_instances(instances)
+        return [instance["InstanceId"] for instance in instances]
+
+    def private_key(self, parameter_name):
+        # Parsed straight from memory and never persisted; the PEM is not written to disk
+        def load():
+            response = get_boto_client("ssm").get_parameter(Name=parameter_name, WithDecryption=True)
+            return paramiko.RSAKey.from_private_key(io.StringIO(response["Parameter"]["Value"]))
+
+        return get_metadata_cache().get("aws", None, f"ssm:parameter/{parameter_name}", load, persist=False)
+
+    def get_client(self, instance_id=None, username=None):
+        """Return a connected `paramiko.SSHClient`, reusing the live one for this host if any."""
+        instance_id = instance_id or os.environ.get("EC2_INSTANCE_ID")
+        username = username or os.environ.get("EC2_USERNAME")
+        key = (instance_id, username)
+        # One lock per host, so handshakes with different hosts can run in parallel
+        with self._lock:
+            host_lock = self._host_locks.setdefault(key, threading.Lock())
+        with host_lock:
+            ssh = self._clients.get(key)
+            transport = ssh.get_transport() if ssh else None
+            if transport is not None and transport.is_active():
+                return ssh
+            if ssh:
+                ssh.close()
+
+            ssh = paramiko.SSHClient()
+            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            ssh.connect(
+                self.resolve_dns(instance_id),
+                username=username,
+                pkey=self.private_key(os.environ.get("AWS_PARAMETER_STORE_PEM_KEY_FILE")),
+            )
+            # Detect dead connections between commands
+            ssh.get_transport().set_keepalive(30)
+            self._clients[key] = ssh
+            return ssh
+
+    def exec_command(self, command, instance_id=None, username=None, timeout=None):
+        """Run `command` on a new channel of the shared transport; reconnects once if it dropped."""
+        try:
+            return self.get_client(instance_id, username).exec_command(command, timeout=timeout)
+        except (paramiko.SSHException, EOFError, OSError):
+            self.invalidate(instance_id, username)
+            return self.get_client(instance_id, username).exec_command(command, timeout=timeout)
+
+    def invalidate(self, instance_id=None, username=None):
+        key = (instance_id or os.environ.get("EC2_INSTANCE_ID"), username or os.environ.get("EC2_USERNAME"))
+        get_metadata_cache().invalidate("aws", resource=f"ec2:instance/{key[0]}")
+        with self._lock:
+            ssh = self._clients.pop(key, None)
+        if ssh:
+            ssh.close()
+
+    def close_all(self):
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for ssh in clients:
+            ssh.close()
+
+
+connection_manager = SSHConnectionManager()
+atexit.register(connection_manager.close_all)
+
 
 def connect_to_ec2_machine():
     try:
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ec2 = boto3.client(
-            "ec2",
-            region_name=os.environ.get("AWS_REGION"),
-            aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY"),
-        )
-        ssm_client = boto3.client("ssm")
-
-        response = ec2.describe_instances(InstanceIds=[os.environ.get("EC2_INSTANCE_ID")])
-        instance_dns = response["Reservations"][0]["Instances"][0]["PublicDnsName"]
-
-        # Retrieve PEM key from Parameter Store
-        pem_key_parameter_name = os.environ.get("AWS_PARAMETER_STORE_PEM_KEY_FILE")
-        response = ssm_client.get_parameter(Name=pem_key_parameter_name, WithDecryption=True)
-        pem_key_str = response["Parameter"]["Value"]
-
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(delete=False) as temp_pem_file:
-            temp_pem_file.write(pem_key_str.encode("utf-8"))
-            temp_pem_file.close()
-
-        private_key = paramiko.RSAKey.from_private_key_file(temp_pem_file.name)
-
-        ssh.connect(
-            instance_dns,
-            username=os.environ.get("EC2_USERNAME"),
-            pkey=private_key,
-        )
-        return ssh
+        return connection_manager.get_client()
     except Exception as e:
         print(f"An error occurred during SSH connection: {e}")
         return None
 
 
 def execute_ec2_commands(command):
-    ssh = connect_to_ec2_machine()
     try:
-        stdin, stdout, stderr = ssh.exec_command(command)
-
-        output = stdout.read().decode("utf-8")
-        error = stderr.read().decode("utf-8")
+        stdin, stdout, stderr = connection_manager.exec_command(command)
+        stdin.close()
 
-        ssh.close()
+        output = {"stdout": bytearray(), "stderr": bytearray()}
+        for stream_name, chunk in iter_channel_chunks(stdout.channel):
+            output[stream_name] += chunk
+        error = output["stderr"].decode("utf-8")
 
         if error:
             print(f"Error: {error}")
             return None
 
-        return output
+        return output["stdout"].decode("utf-8")
     except Exception as e:
         print(f"An error occurred while executing the command: {e}")
         return None
 
 
+class RemoteCommandResult(NamedTuple):
+    instance_id: str
+    exit_status: int
+    stdout: str
+    stderr: str
+
+
+def iter_channel_chunks(channel, timeout=None, chunk_size=CHUNK_SIZE):
+    """Yield `(stream_name, bytes)` chunks from a running command's channel as they arrive.
+
+    stdout and stderr are drained together, so a chatty stderr can never
+    fill its window and stall the command while stdout is being read.
+    Raises `TimeoutError` (and closes the channel) when the command runs
+    longer than `timeout` seconds. The exit status is available from
+    `channel.recv_exit_status()` afterwards.
+    """
+    deadline = time.monotonic() + timeout if timeout else None
+    readers = (("stdout", channel.recv_ready, channel.recv), ("stderr", channel.recv_stderr_ready, channel.recv_stderr))
+
+    while True:
+        received = False
+        for stream_name, ready, recv in readers:
+            if ready():
+                received = True
+                yield stream_name, recv(chunk_size)
+        if received:
+            continue
+        # exit_status_ready() can turn true before the last data was read, hence the extra checks
+        if channel.exit_status_ready() and not channel.recv_ready() and not channel.recv_stderr_ready():
+            return
+        if deadline and time.monotonic() > deadline:
+            channel.close()
+            raise TimeoutError(f"Remote command did not finish within {timeout}s")
+        time.sleep(CHANNEL_POLL_INTERVAL)
+
+
+def iter_channel_lines(channel, timeout=None, chunk_size=CHUNK_SIZE):
+    """Like `iter_channel_chunks`, but yield `(stream_name, line)` pairs with decoded, newline-stripped lines."""
+    pending = {"stdout": b"", "stderr": b""}
+    for stream_name, chunk in iter_channel_chunks(channel, timeout, chunk_size):
+        *lines, pending[stream_name] = (pending[stream_name] + chunk).split(b"\n")
+        for line in lines:
+            yield stream_name, line.decode("utf-8", errors="replace")
+
+    for stream_name, rest in pending.items():
+        if rest:
+            yield stream_name, rest.decode("utf-8", errors="replace")
+
+
+def _print_output(instance_id, stream_name, line):
+    print(f"[{instance_id}] {line}" if stream_name == "stdout" else f"[{instance_id}] {stream_name}: {line}")
+
+
+def run_remote_command(command, instance_id=None, on_output=None, timeout=None, sink=None, capture=True):
+    """Run `command` on one instance, streaming its output while it runs.
+
+    Each line is passed to `on_output(instance_id, stream_name, line)` and,
+    if `sink` is a path, appended to that file (stderr lines prefixed with
+    `stderr: `). With `capture=False` nothing is kept in memory and the
+    result carries empty stdout/stderr. The result holds the real exit
+    status of the command; stderr output alone is not treated as a failure.
+    """
+    instance_id = instance_id or os.environ.get("EC2_INSTANCE_ID")
+    on_output = on_output or _print_output
+    stdin, stdout, stderr = connection_manager.exec_command(command, instance_id=instance_id)
+    stdin.close()
+
+    collected = {"stdout": [], "stderr": []}
+    with open(sink, "a", encoding="utf-8") if sink else contextlib.nullcontext() as sink_file:
+        for stream_name, line in iter_channel_lines(stdout.channel, timeout=timeout):
+            on_output(instance_id, stream_name, line)
+            if sink_file:
+                sink_file.write(f"{line}\n" if stream_name == "stdout" else f"{stream_name}: {line}\n")
+            if capture:
+                collected[stream_name].append(line)
+
+    return RemoteCommandResult(
+        instance_id,
+        stdout.channel.recv_exit_status(),
+        "\n".join(collected["stdout"]),
+        "\n".join(collected["stderr"]),
+    )
+
+
+def execute_fleet_commands(command, instance_ids=None, tags=None, max_workers=10, on_output=None, timeout=None):
+    """Run `command` on every selected instance concurrently and return `{instance_id: RemoteCommandResult}`.
+
+    All instances are resolved with a single batched `describe_instances`
+    call; at most `max_workers` hosts are connected to at once. Output lines
+    are streamed per host through `on_output` (printed with an `[instance-id]`
+    prefix by default). A host that cannot be reached gets exit status -1
+    and the error in `stderr`.
+    """
+    targets = connection_manager.resolve_fleet(instance_ids=instance_ids, tags=tags)
+    if not targets:
+        print("No EC2 instances matched the fleet selection.")
+        return {}
+
+    def run(instance_id):
+        try:
+            return run_remote_command(command, instance_id=instance_id, on_output=on_output, timeout=timeout)
+        except Exception as e:
+            return RemoteCommandResult(instance_id, -1, "", str(e))
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(targets))) as pool:
+        results = {result.instance_id: result for result in pool.map(run, targets)}
+
+    failed = [instance_id for instance_id, result in results.items() if result.exit_status != 0]
+    print(f"Ran on {len(results)} instance(s), {len(failed)} failed: {failed}")
+    return results
+
+
 def get_public_ip():
     try:
-        ec2 = boto3.client("ec2")
-        response = ec2.describe_instances(InstanceIds=[os.environ.get("EC2_INSTANCE_ID")])
-
-        for reservation in response["Reservations"]:
-            for instance in reservation["Instances"]:
-                public_dns_name = instance.get("PublicIpAddress", "Not available")
-                return public_dns_name
+        instance = describe_instance(os.environ.get("EC2_INSTANCE_ID"))
+        return instance["PublicIpAddress"] or "Not available"
     except botocore.exceptions.ClientError as e:
         print(f"An error occurred while retrieving public DNS: {e}")
         return "Not available"
@@ -83,13 +274,8 @@ def get_public_ip():
 
 def get_private_ip():
     try:
-        ec2 = boto3.client("ec2")
-        response = ec2.describe_instances(InstanceIds=[os.environ.get("EC2_INSTANCE_ID")])
-
-        for reservation in response["Reservations"]:
-            for instance in reservation["Instances"]:
-                private_dns_name = instance.get("PrivateIpAddress", "Not available")
-                return private_dns_name
+        instance = describe_instance(os.environ.get("EC2_INSTANCE_ID"))
+        return instance["PrivateIpAddress"] or "Not available"
     except botocore.exceptions.ClientError as e:
         print(f"An error occurred while retrieving private DNS: {e}")
         return "Not available"
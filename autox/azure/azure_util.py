@@ -1,16 +1,24 @@
 import os
 
-from azure.identity import DefaultAzureCredential
-from azure.mgmt.compute import ComputeManagementClient
+from autox.utilities.cloud_cache import get_metadata_cache
 
 
 def get_vm_public_ip():
     try:
-        credential = DefaultAzureCredential()
-        compute_client = ComputeManagementClient(credential, os.environ.get("AZURE_SUBSCRIPTION_ID"))
         resource_group_name = os.environ.get("AZURE_RESOURCE_GROUP")
         vm_name = os.environ.get("AZURE_VM_NAME")
-        vm = compute_client.virtual_machines.get(resource_group_name, vm_name)
+
+        def load():
+            # The Azure SDK is slow to import, so only load it when a VM is actually looked up
+            from azure.identity import DefaultAzureCredential
+            from azure.mgmt.compute import ComputeManagementClient
+
+            credential = DefaultAzureCredential()
+            compute_client = ComputeManagementClient(credential, os.environ.get("AZURE_SUBSCRIPTION_ID"))
+            return compute_client.virtual_machines.get(resource_group_name, vm_name)
+
+        # The SDK model is not JSON-serializable, so it is only cached in memory
+        vm = get_metadata_cache().get("azure", resource_group_name, f"vm/{vm_name}", load, persist=False)
 
         # nic_id = vm.network_profile.network_interfaces[0].id
         # nic_segments = nic_id.split('/')
@@ -31,6 +39,3 @@ def get_vm_public_ip():
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
         return "Not available"
-
-
-ip = get_vm_public_ip()
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import shutil
+from pathlib import Path
+
+import click
+
+from autox.autox_logger import logger
+from autox.config import config
+from autox.utilities.bench_util import (
+    BASELINE_FILE,
+    BENCH_RESULTS_DIR,
+    compare_to_baseline,
+    parse_request_mix,
+    run_benchmark,
+    write_results,
+)
+
+
+# cli root group
+@click.group(name="bench", help="Run performance benchmarks")
+def bench_group():
+    """Throughput and latency benchmarks."""
+    pass
+
+
+@click.command(name="api", help="Benchmarks throughput and latency of the API at API_URL")
+@click.option("--url", default=None, help="Base URL to benchmark. Defaults to API_URL from the active env.")
+@click.option("--concurrency", type=click.IntRange(min=1), default=10, show_default=True, help="Concurrent clients.")
+@click.option("--duration", type=click.FloatRange(min=1), default=30, show_default=True, help="Duration in seconds.")
+@click.option(
+    "--request",
+    "requests_mix",
+    multiple=True,
+    default=("GET /health",),
+    show_default=True,
+    help="Request in the mix as 'METHOD /path [WEIGHT]'. Repeat to build a weighted mix.",
+)
+@click.option("--timeout", type=float, default=10, show_default=True, help="Per-request timeout in seconds.")
+@click.option("--output-dir", default=str(BENCH_RESULTS_DIR), show_default=True, help="Where results are written.")
+@click.option("--baseline", default=str(BASELINE_FILE), show_default=True, help="Baseline summary to compare with.")
+@click.option(
+    "--threshold",
+    type=float,
+    default=10.0,
+    show_default=True,
+    help="Allowed p95 latency regression against the baseline, in percent.",
+)
+@click.option(
+    "--save-baseline",
+    is_flag=True,
+    default=False,
+    help="Save this run as the new baseline, unless it regressed against the current one.",
+)
+def bench_api(url, concurrency, duration, requests_mix, timeout, output_dir, baseline, threshold, save_baseline):
+    base_url = url or config.api_url
+    if not base_url:
+        raise click.BadParameter("no --url given and API_URL is not set", param_hint="--url")
+    try:
+        mix = parse_request_mix(requests_mix)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--request") from e
+
+    headers = {"Accept": "application/json"}
+    if config.api_key:
+        headers["Authorization"] = f"Bearer {config.api_key}"
+
+    logger.info(f"Benchmarking {base_url} with {concurrency} clients for {duration}s")
+    summary, histogram = asyncio.run(
+        run_benchmark(base_url, mix, concurrency=concurrency, duration=duration, headers=headers, timeout=timeout)
+    )
+    write_results(summary, histogram, output_dir)
+    click.echo(json.dumps(summary, indent=2))
+
+    regressed, message = compare_to_baseline(summary, baseline, threshold)
+    if save_baseline and regressed:
+        # A regressed run would otherwise become the reference the next runs pass against
+        logger.warning(f"Not saving a regressed run as the baseline; {baseline} is unchanged")
+    elif save_baseline:
+        Path(baseline).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(Path(output_dir, "summary.json"), baseline)
+        logger.info(f"Saved baseline to {baseline}")
+    if regressed:
+        raise click.ClickException(f"Latency regression: {message}")
+    logger.info(message)
+
+
+bench_group.add_command(bench_api)
@@ -1,6 +1,7 @@
 import click
 
-from autox.config import EnvVars
+from autox.config import ENVIRONMENTS_DIR, EnvVars
+from autox.helpers.env_snapshot import compile_env
 
 
 # cli root group
@@ -38,35 +39,62 @@ def set_active(env):
     EnvVars.set_active_env(env)
 
 
-@click.command(name="add-env-var", help="Add a new env in this format: {key=value}.")
-@click.argument("env_var", required=True)
-def add_env_var(env_var):
-    """Add an environment variable for the active env.
+@click.command(name="add-env-var", help="Add new env vars in this format: {key=value} [{key=value} ...].")
+@click.argument("env_vars", nargs=-1, required=True)
+def add_env_var(env_vars):
+    """Add one or more environment variables to the active env.
 
-    The argument must be in the literal form: `{KEY=VALUE}` (including the
+    Each argument must be in the literal form: `{KEY=VALUE}` (including the
     surrounding braces). The key and value are trimmed of surrounding
-    whitespace. The parsed pair is forwarded to `EnvVars.add_new_env_var`.
+    whitespace. All parsed pairs are forwarded to `EnvVars.add_new_env_var`
+    at once, so the env file is rewritten a single time.
     """
-    s = env_var.strip()
-    if not (s.startswith("{") and s.endswith("}")):
-        raise click.BadParameter("env_var must be in format {KEY=VALUE}")
+    pairs = {}
+    for env_var in env_vars:
+        s = env_var.strip()
+        if not (s.startswith("{") and s.endswith("}")):
+            raise click.BadParameter("env_var must be in format {KEY=VALUE}")
 
-    inner = s[1:-1].strip()
-    if "=" not in inner:
-        raise click.BadParameter("env_var must contain '=' separator")
+        inner = s[1:-1].strip()
+        if "=" not in inner:
+            raise click.BadParameter("env_var must contain '=' separator")
 
-    key, value = inner.split("=", 1)
-    key = key.strip()
-    value = value.strip()
+        key, value = inner.split("=", 1)
+        key = key.strip()
+        value = value.strip()
 
-    if not key:
-        raise click.BadParameter("env_var key cannot be empty")
+        if not key:
+            raise click.BadParameter("env_var key cannot be empty")
+        pairs[key] = value
 
     # Forward as keyword args so the config handler receives named values
-    EnvVars.add_new_env_var(**{key: value})
+    EnvVars.add_new_env_var(**pairs)
+
+
+@click.command(name="compile", help="Compiles an env and the envs it extends into a fast-loading snapshot.")
+@click.argument("env_name", required=False)
+def compile_env_snapshot(env_name=None):
+    """Resolve the layers of `env_name` (default: the active env) once and write `env.snapshot.json`.
+
+    An env file may set `AUTOX_EXTENDS=<base env>`; its own values override
+    the base ones. Every process then loads the snapshot in one read until
+    one of the source env files changes.
+    """
+    env_name = env_name or EnvVars.get_active_env()
+    if not env_name:
+        raise click.ClickException("No env given and no active env set")
+    try:
+        snapshot = compile_env(ENVIRONMENTS_DIR, env_name)
+    except (FileNotFoundError, ValueError) as e:
+        raise click.ClickException(str(e))
+    click.echo(
+        f"Compiled {env_name} from {', '.join(snapshot['sources'])}: "
+        f"{len(snapshot['values'])} values, hash {snapshot['hash'][:12]}"
+    )
 
 
 env_group.add_command(create_new_env)
 env_group.add_command(check_active_env)
 env_group.add_command(set_active)
 env_group.add_command(add_env_var)
+env_group.add_command(compile_env_snapshot)
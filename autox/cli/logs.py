@@ -0,0 +1,115 @@
+import json
+
+import click
+
+from autox.autox_logger import (
+    LOG_COMPRESS,
+    LOG_FOLDER_NAME,
+    LOG_RETENTION_DAYS,
+    LOG_RETENTION_MB,
+    REPOSITORY_ROOT,
+    RUN_LOG_DIR,
+)
+from autox.utilities.log_retention import apply_retention
+from autox.utilities.log_scanner import ERROR_PATTERNS, scan_log_files
+from autox.utilities.structured_log import LOG_INDEX_DB_NAME, query_logs
+
+
+# cli root group
+@click.group(name="logs", help="Inspect service and autox logs")
+def logs_group():
+    """Scan and query logs."""
+    pass
+
+
+@click.command(name="scan", help="Scans log files for error patterns in a single streaming pass.")
+@click.argument("paths", nargs=-1, required=True, type=click.Path(dir_okay=False))
+@click.option(
+    "--pattern",
+    "patterns",
+    multiple=True,
+    help=f"Pattern to look for. Repeat for several. Defaults to {ERROR_PATTERNS}.",
+)
+@click.option("--regex", is_flag=True, default=False, help="Treat patterns as regular expressions.")
+@click.option("--rotated", is_flag=True, default=False, help="Also scan rotated siblings (app.log.1, app.log.2.gz).")
+@click.option(
+    "--since",
+    type=click.IntRange(min=0),
+    default=None,
+    help="Byte offset to start reading each file at (line numbers then count from there).",
+)
+@click.option(
+    "--state-file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="JSON file remembering where each file was scanned up to, so repeated scans only read new bytes.",
+)
+@click.option("--fail-on-match", is_flag=True, default=False, help="Exit with status 1 if anything matched.")
+def scan_logs(paths, patterns, regex, rotated, since, state_file, fail_on_match):
+    result = scan_log_files(
+        paths, list(patterns) or ERROR_PATTERNS, regex=regex, rotated=rotated, since=since, state_file=state_file
+    )
+    for match in result.matches:
+        click.echo(f"{match.path}:{match.line_number}: {match.line}")
+    for pattern, count in result.counts.most_common():
+        click.echo(f"{count}\t{pattern}")
+
+    if fail_on_match and result.matches:
+        raise SystemExit(1)
+
+
+@click.command(name="query", help="Queries the JSON-lines logs (LOG_JSON=true) of a run by test and level.")
+@click.option("--test", default=None, help="Part of the test nodeid, e.g. 'test_users.py::test_create'.")
+@click.option(
+    "--level",
+    type=click.Choice(["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"], case_sensitive=False),
+    default=None,
+    help="Minimum level to show.",
+)
+@click.option("--run", "run_id", default=None, help="Run ID to query. Defaults to the latest run.")
+@click.option("--limit", type=click.IntRange(min=1), default=None, help="Maximum number of records to show.")
+@click.option("--json", "as_json", is_flag=True, default=False, help="Print the raw JSON records.")
+def query_log_records(test, level, run_id, limit, as_json):
+    index_db = REPOSITORY_ROOT / LOG_FOLDER_NAME / LOG_INDEX_DB_NAME
+    if not index_db.exists():
+        raise click.ClickException(f"No log index at {index_db}; run the tests with LOG_JSON=true first.")
+
+    for record in query_logs(index_db, test=test, level=level, run_id=run_id, limit=limit):
+        if as_json:
+            click.echo(json.dumps(record))
+        else:
+            click.echo(
+                f"{record['ts']} [{record['worker_id']}] {record['level']} {record['nodeid'] or '-'} >> {record['message']}"
+            )
+
+
+@click.command(name="clean", help="Applies log retention to autox_logs/ now: deletes old runs and gzips finished ones.")
+@click.option(
+    "--max-age-days",
+    type=click.FloatRange(min=0),
+    default=LOG_RETENTION_DAYS,
+    show_default=True,
+    help="Delete older runs.",
+)
+@click.option(
+    "--max-size-mb",
+    type=click.FloatRange(min=0),
+    default=LOG_RETENTION_MB,
+    show_default=True,
+    help="Delete the oldest runs until all runs together fit in this size.",
+)
+@click.option("--compress/--no-compress", default=LOG_COMPRESS, show_default=True, help="Gzip finished runs.")
+def clean_logs(max_age_days, max_size_mb, compress):
+    deleted, compressed = apply_retention(
+        REPOSITORY_ROOT / LOG_FOLDER_NAME,
+        max_age_days=max_age_days,
+        max_total_bytes=max_size_mb * 1024 * 1024,
+        compress=compress,
+        exclude=[RUN_LOG_DIR],
+    )
+    click.echo(f"Deleted {len(deleted)} and compressed {len(compressed)} run directories.")
+
+
+logs_group.add_command(scan_logs)
+logs_group.add_command(query_log_records)
+logs_group.add_command(clean_logs)
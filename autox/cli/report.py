@@ -0,0 +1,45 @@
+import click
+
+from autox.utilities.report_builder import (
+    EXCEL_EXPORT,
+    HTML_REPORT,
+    PAGE_SIZE,
+    SUMMARY_JSON,
+    build_report,
+    export_test_results,
+)
+
+JUNIT_XML = "results/test-results.xml"
+
+
+# cli root group
+@click.group(name="report", help="Build test reports from junit XML")
+def report_group():
+    """Build HTML, JSON and Excel reports."""
+    pass
+
+
+@click.command(name="build", help="Builds a paginated HTML report and a summary JSON from junit XML files.")
+@click.argument("junit_xml_paths", nargs=-1, type=click.Path(dir_okay=False))
+@click.option("--output", default=HTML_REPORT, show_default=True, help="HTML report to write.")
+@click.option("--summary-json", default=SUMMARY_JSON, show_default=True, help="Summary JSON to write.")
+@click.option("--page-size", type=click.IntRange(min=1), default=PAGE_SIZE, show_default=True, help="Tests per page.")
+@click.option(
+    "--excel",
+    is_flag=False,
+    flag_value=EXCEL_EXPORT,
+    default=None,
+    help=f"Also export the testcases and the run history to an Excel workbook (default path {EXCEL_EXPORT}).",
+)
+def build(junit_xml_paths, output, summary_json, page_size, excel):
+    paths = list(junit_xml_paths) or [JUNIT_XML]
+    summary = build_report(paths, output, summary_json, page_size=page_size)
+    click.echo(
+        f"{summary['tests']} tests: {summary['passed']} passed, {summary['failed']} failed, "
+        f"{summary['error']} errors, {summary['skipped']} skipped"
+    )
+    if excel:
+        export_test_results(paths, excel)
+
+
+report_group.add_command(build)
@@ -1,12 +1,46 @@
+import importlib
+
 import click
 
-from autox import __version__, config
-from autox.autox_logger import logger
-from autox.cli.environments import env_group
-from autox.cli.run_tests import run_tests_group
+from autox import __version__
+
+# Subcommand groups, imported only when invoked: name -> (module:attribute, short help for `autox --help`)
+LAZY_SUBCOMMANDS = {
+    "run-tests": ("autox.cli.run_tests:run_tests_group", "Choose tests to run"),
+    "env-management": ("autox.cli.environments:env_group", "crud operations for env management"),
+    "bench": ("autox.cli.bench:bench_group", "Run performance benchmarks"),
+    "logs": ("autox.cli.logs:logs_group", "Inspect service and autox logs"),
+    "report": ("autox.cli.report:report_group", "Build test reports from junit XML"),
+}
+
+
+class LazyGroup(click.Group):
+    """Click group that imports a subcommand's module only when that subcommand is used.
+
+    `autox --help` lists the short help kept in `LAZY_SUBCOMMANDS` instead
+    of importing every group.
+    """
+
+    def list_commands(self, ctx):
+        return sorted({*super().list_commands(ctx), *LAZY_SUBCOMMANDS})
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in LAZY_SUBCOMMANDS and cmd_name not in self.commands:
+            module_name, attribute = LAZY_SUBCOMMANDS[cmd_name][0].split(":")
+            self.add_command(getattr(importlib.import_module(module_name), attribute), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def format_commands(self, ctx, formatter):
+        rows = [
+            (name, self.commands[name].get_short_help_str() if name in self.commands else LAZY_SUBCOMMANDS[name][1])
+            for name in self.list_commands(ctx)
+        ]
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
 
 
-@click.group(invoke_without_command=True)
+@click.group(cls=LazyGroup, invoke_without_command=True)
 @click.version_option(version=__version__, prog_name="autox")
 @click.option("--help", is_flag=True, help="Show this message and exit.")
 @click.option(
@@ -34,6 +68,9 @@ def cli(ctx, help, log_level):
     # The config will always start set to INFO based on the default in the logger setup
     # If the CLI differs, we should update the config and set the log level and handlers
     if log_level:
+        from autox.autox_logger import logger
+        from autox.config import config
+
         if config.log_level != log_level:
             config.log_level = log_level
             logger.setLevel(config.log_level)
@@ -46,7 +83,3 @@ def cli(ctx, help, log_level):
             click.echo(cli.get_help(ctx))
         else:
             click.echo("Use 'autox --help' for usage details.")
-
-
-cli.add_command(run_tests_group)
-cli.add_command(env_group)
@@ -1,7 +1,260 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import click
 
 from autox.autox_logger import logger
+from autox.config import ENVIRONMENTS_DIR, LOADED_ENV_VARS
+from autox.utilities.command_runner import run_command
 from autox.utilities.common_utils import execute_command_realtime
+from autox.utilities.duration_history import (
+    load_test_durations,
+    read_durations_file,
+    record_test_results,
+    write_durations_file,
+)
+from autox.utilities.junit_util import merge_junit_files, read_test_durations, write_env_comparison
+from autox.utilities.report_builder import HTML_REPORT, build_report
+from autox.utilities.shard_util import collect_test_ids, split_into_shards
+from autox.utilities.structured_log import current_run_id
+
+# pytest-html's own report; report.html is the paginated report autox builds from the junit XML
+PYTEST_HTML_REPORT = "results/pytest-report.html"
+JUNIT_XML = "results/test-results.xml"
+SHARDS_DIR = Path("results", "shards")
+ENVS_DIR = Path("results", "envs")
+ENV_COMPARISON_JSON = "results/env-comparison.json"
+# The averaged duration history after a run, to publish as an artifact and pass to every CI machine's --durations-file
+DURATIONS_JSON = "results/test-durations.json"
+
+
+def build_pytest_cmd(extra_args, html_report=PYTEST_HTML_REPORT, junit_xml=JUNIT_XML):
+    # Build command as a list of executable + args so subprocess runs correctly
+    return [
+        "pytest",
+        "-v",
+        "-s",
+        f"--html={html_report}",
+        "--capture=tee-sys",
+        f"--junitxml={junit_xml}",
+        *extra_args,
+    ]
+
+
+def sharding_options(func):
+    """Attach the --workers / --shards / --shard-index / --durations-file options shared by the test commands."""
+    func = click.option(
+        "--durations-file",
+        type=click.Path(exists=True, dir_okay=False, path_type=Path),
+        default=None,
+        help=f"Balance shards by the test durations in this JSON file (e.g. the {DURATIONS_JSON} of an earlier run) "
+        "instead of this machine's own history. Pass the same file on every machine of a --shard-index split.",
+    )(func)
+    func = click.option(
+        "--shard-index",
+        type=click.IntRange(min=0),
+        default=None,
+        help="Run only this shard (0-based) out of --shards. Useful to split a suite across CI machines. Every "
+        "machine must compute the same split, so without --durations-file the shards are balanced by test count "
+        "rather than by the local duration history.",
+    )(func)
+    func = click.option(
+        "--shards",
+        type=click.IntRange(min=1),
+        default=None,
+        help="Number of duration-balanced shards to split the suite into. Defaults to --workers.",
+    )(func)
+    func = click.option(
+        "--workers",
+        type=click.IntRange(min=1),
+        default=1,
+        show_default=True,
+        help="Number of shards to run concurrently in local pytest processes.",
+    )(func)
+    return func
+
+
+def parse_envs(ctx, param, value):
+    """Click callback turning `a,b,c` into a list of existing env names."""
+    if not value:
+        return None
+    envs = list(dict.fromkeys(env.strip() for env in value.split(",") if env.strip()))
+    missing = [env for env in envs if not (ENVIRONMENTS_DIR / env / "env").exists()]
+    if missing:
+        raise click.BadParameter(f"unknown env(s): {', '.join(missing)}")
+    return envs
+
+
+def env_matrix_option(func):
+    """Attach the --envs option shared by the test commands."""
+    return click.option(
+        "--envs",
+        callback=parse_envs,
+        default=None,
+        help="Comma-separated envs from env_vars/ to run the suite against in parallel, e.g. staging,perf.",
+    )(func)
+
+
+def _mtime(path):
+    return Path(path).stat().st_mtime_ns if Path(path).exists() else None
+
+
+def _written_since(path, previous_mtime):
+    """Whether `path` was written since its mtime was `previous_mtime`, i.e. by this invocation."""
+    # Compared to the file's own earlier mtime: file timestamps lag the system clock by up to a tick
+    mtime = _mtime(path)
+    return mtime is not None and mtime != previous_mtime
+
+
+def run_pytest(test_path, extra_args, workers=1, shards=None, shard_index=None, envs=None, durations_file=None):
+    """Run the tests under `test_path` serially, or sharded across local pytest processes.
+
+    Tests are ordered longest-first using the duration history, or the
+    durations in `durations_file`, so the slowest classes start first. With
+    sharding, the collected tests are split by those durations. With
+    `shard_index` and no `durations_file` they are split by test count
+    instead, as every machine must compute the same split and each has its
+    own history. Every shard writes its own junit XML and HTML report under
+    `results/shards/`, and the shard results are merged into
+    `results/test-results.xml`. When this run wrote that junit XML,
+    `report.html` is built from it, it is appended to the duration history
+    and the updated history is written to `results/test-durations.json`.
+    With `envs`, the whole suite runs once per env instead (see
+    `_run_env_matrix`); those results are not recorded, as one test's
+    durations differ between envs. Returns a non-zero exit code if any
+    shard or env failed.
+    """
+    junit_mtime = _mtime(JUNIT_XML)
+    shard_count = shards or workers
+    # Every pytest process of this invocation logs under the same run ID
+    os.environ["AUTOX_RUN_ID"] = current_run_id()
+    if envs:
+        if shard_count > 1 or shard_index is not None:
+            raise click.BadParameter("cannot be combined with --workers/--shards/--shard-index", param_hint="--envs")
+        return _run_env_matrix(test_path, extra_args, envs)
+
+    if shard_index is not None and shard_index >= shard_count:
+        raise click.BadParameter(f"must be lower than --shards ({shard_count})", param_hint="--shard-index")
+
+    if durations_file:
+        try:
+            durations = read_durations_file(durations_file)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--durations-file") from e
+    elif shard_index is not None:
+        logger.info(
+            "No --durations-file given, splitting the shards by test count so every machine gets the same split"
+        )
+        durations = {}
+    else:
+        # Fall back to the previous run's junit XML until the history store has been populated
+        durations = load_test_durations() or read_test_durations(JUNIT_XML)
+    test_ids = collect_test_ids(test_path, extra_args) if durations or shard_count > 1 else []
+
+    # Logs to its own file in the run directory, which this process may share when both start in the same second
+    serial_env = {**os.environ, "AUTOX_WORKER_ID": "pytest"}
+    if not test_ids:
+        if shard_count > 1:
+            logger.error(f"No tests collected from {test_path}")
+            return -1
+        # Test path should come after all pytest options
+        exit_code = execute_command_realtime([*build_pytest_cmd(extra_args), test_path], env=serial_env)
+    elif shard_count == 1:
+        # Longest-processing-time-first order: pytest runs nodeids in the order they are given
+        exit_code = execute_command_realtime(
+            [*build_pytest_cmd(extra_args), *split_into_shards(test_ids, 1, durations)[0]], env=serial_env
+        )
+    else:
+        exit_code = _run_shards(split_into_shards(test_ids, shard_count, durations), extra_args, workers, shard_index)
+
+    # pytest writes no junit XML when it crashes or there was nothing to run, so the file may be a previous run's
+    if not _written_since(JUNIT_XML, junit_mtime):
+        logger.warning(f"{JUNIT_XML} was not written by this run, not building the report or recording test durations")
+        return exit_code
+    if shard_count == 1:
+        build_report([JUNIT_XML], HTML_REPORT, links=[PYTEST_HTML_REPORT])
+    record_test_results(JUNIT_XML)
+    write_durations_file(DURATIONS_JSON, load_test_durations())
+    return exit_code
+
+
+def _run_shards(shard_list, extra_args, workers, shard_index=None):
+    indexes = [shard_index] if shard_index is not None else range(len(shard_list))
+    selected = [(index, shard_list[index]) for index in indexes if shard_list[index]]
+    if not selected:
+        logger.warning(f"Shard {shard_index} of {len(shard_list)} has no tests to run")
+        return 0
+
+    # Reports of a previous run, including pytest-html's assets directory
+    shutil.rmtree(SHARDS_DIR, ignore_errors=True)
+    SHARDS_DIR.mkdir(parents=True)
+
+    def run_shard(index, shard_test_ids):
+        cmd = build_pytest_cmd(
+            extra_args,
+            html_report=SHARDS_DIR / f"report-{index}.html",
+            junit_xml=SHARDS_DIR / f"test-results-{index}.xml",
+        )
+        logger.info(f"Starting shard {index} with {len(shard_test_ids)} tests")
+        result = run_command(
+            [*cmd, *shard_test_ids],
+            env={**os.environ, "AUTOX_WORKER_ID": f"shard-{index}"},
+            prefix=f"[shard-{index}] ",
+            log_file=SHARDS_DIR / f"output-{index}.log",
+        )
+        logger.info(
+            f"Shard {index} finished with exit code {result.exit_code} in {result.duration:.1f}s "
+            f"(peak RSS {result.peak_rss_kb} KB)"
+        )
+        return result.exit_code
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(selected))) as pool:
+        exit_codes = list(pool.map(lambda shard: run_shard(*shard), selected))
+
+    merge_junit_files([SHARDS_DIR / f"test-results-{index}.xml" for index, _ in selected], JUNIT_XML)
+    build_report([JUNIT_XML], HTML_REPORT, links=[SHARDS_DIR / f"report-{index}.html" for index, _ in selected])
+    return next((code for code in exit_codes if code != 0), 0)
+
+
+def _run_env_matrix(test_path, extra_args, envs):
+    """Run the suite once per env, all envs at the same time, and write a comparative report.
+
+    Each pytest process gets its env through AUTOX_ENV rather than the shared
+    env_vars/active file; values loaded from this process's own env are not
+    passed on. Per-env junit XML and HTML reports go to `results/envs/`.
+    """
+    # Reports of a previous run, including pytest-html's assets directory
+    shutil.rmtree(ENVS_DIR, ignore_errors=True)
+    ENVS_DIR.mkdir(parents=True)
+    inherited = {key: value for key, value in os.environ.items() if key not in LOADED_ENV_VARS}
+
+    def run_env(env_name):
+        cmd = build_pytest_cmd(
+            extra_args,
+            html_report=ENVS_DIR / f"report-{env_name}.html",
+            junit_xml=ENVS_DIR / f"test-results-{env_name}.xml",
+        )
+        logger.info(f"Running {test_path} against env {env_name}")
+        result = run_command(
+            [*cmd, test_path],
+            env={**inherited, "AUTOX_ENV": env_name, "AUTOX_WORKER_ID": f"env-{env_name}"},
+            prefix=f"[{env_name}] ",
+            log_file=ENVS_DIR / f"output-{env_name}.log",
+        )
+        logger.info(f"Env {env_name} finished with exit code {result.exit_code} in {result.duration:.1f}s")
+        return result.exit_code
+
+    with ThreadPoolExecutor(max_workers=len(envs)) as pool:
+        exit_codes = list(pool.map(run_env, envs))
+
+    junit_paths = {env: ENVS_DIR / f"test-results-{env}.xml" for env in envs}
+    merge_junit_files(list(junit_paths.values()), JUNIT_XML, suite_names=envs)
+    comparison = write_env_comparison(junit_paths, HTML_REPORT, ENV_COMPARISON_JSON)
+    for env, summary in comparison["envs"].items():
+        logger.info(f"{env}: {summary['passed']}/{summary['tests']} passed in {summary['duration']:.1f}s")
+    return next((code for code in exit_codes if code != 0), 0)
 
 
 # cli root group
@@ -19,49 +272,43 @@ def run_tests_group():
     default=False,
     help="Set --headless to run tests in headless mode. Default is normal mode.",
 )
-def run_ui_tests(browser, headless=False):
-    # Build command as a list of executable + args so subprocess runs correctly
-    cmd = [
-        "pytest",
-        "-v",
-        "-s",
-        "--html=report.html",
-        "--capture=tee-sys",
-        "--self-contained-html",
-        "--junitxml=results/test-results.xml",
-    ]
+@sharding_options
+@env_matrix_option
+def run_ui_tests(browser, headless=False, workers=1, shards=None, shard_index=None, durations_file=None, envs=None):
+    extra_args = []
 
     if browser:
-        cmd.append(f"--selenium-browser={browser}")
+        extra_args.append(f"--selenium-browser={browser}")
 
     if headless:
-        cmd.append("--headless")
+        extra_args.append("--headless")
 
-    # Test path should come after all pytest options
-    cmd.append("tests/ui_tests")
-
-    exit_code = execute_command_realtime(cmd)
+    exit_code = run_pytest(
+        "tests/ui_tests",
+        extra_args,
+        workers=workers,
+        shards=shards,
+        shard_index=shard_index,
+        envs=envs,
+        durations_file=durations_file,
+    )
     if exit_code != 0:
         logger.error("Issue running UI tests")
 
 
 @click.command(name="api", help="Runs all API tests from autox/tests/api_tests directory")
-def run_api_tests():
-    # Build command as a list of executable + args so subprocess runs correctly
-    cmd = [
-        "pytest",
-        "-v",
-        "-s",
-        "--html=report.html",
-        "--capture=tee-sys",
-        "--self-contained-html",
-        "--junitxml=results/test-results.xml",
-    ]
-
-    # Test path should come after all pytest options
-    cmd.append("tests/api_tests")
-
-    exit_code = execute_command_realtime(cmd)
+@sharding_options
+@env_matrix_option
+def run_api_tests(workers=1, shards=None, shard_index=None, durations_file=None, envs=None):
+    exit_code = run_pytest(
+        "tests/api_tests",
+        [],
+        workers=workers,
+        shards=shards,
+        shard_index=shard_index,
+        envs=envs,
+        durations_file=durations_file,
+    )
     if exit_code != 0:
         logger.error("Issue running API tests")
 
@@ -1,18 +1,20 @@
+import io
 import os
+import tempfile
+import threading
 from enum import Enum
 from pathlib import Path
 from typing import Optional
 
-from dotenv import load_dotenv
+from dotenv import dotenv_values, load_dotenv
 from pydantic import BaseModel, Field
 
 from autox.autox_logger import logger
+from autox.helpers.env_snapshot import load_env
 from autox.helpers.os_helpers import (
     create_and_write_to_file,
     generate_random_name,
     make_directory,
-    open_and_read_from_file,
-    write_to_file,
 )
 
 # Load dotenv early so logger configuration (and any other modules)
@@ -21,16 +23,19 @@ from autox.helpers.os_helpers import (
 AUTOX_ROOT = Path(__file__).resolve().parent.parent
 ENVIRONMENTS_DIR = Path(AUTOX_ROOT, "env_vars")
 
+# Keys loaded from the env of this process, so child processes running another env can drop them
+LOADED_ENV_VARS = set()
+
 try:
     active_file = ENVIRONMENTS_DIR / "active"
-    if active_file.exists():
-        active_name = active_file.read_text().strip()
-        if active_name:
-            env_path = ENVIRONMENTS_DIR / active_name / "env"
-            if env_path.exists():
-                load_dotenv(dotenv_path=str(env_path), override=True)
-            else:
-                load_dotenv()
+    # AUTOX_ENV selects the env of this process directly (e.g. per env of a `--envs` matrix run);
+    # otherwise the env named in env_vars/active is used
+    active_name = os.environ.get("AUTOX_ENV") or (active_file.read_text().strip() if active_file.exists() else "")
+    if active_name:
+        env_path = ENVIRONMENTS_DIR / active_name / "env"
+        if env_path.exists():
+            # Uses the compiled snapshot (`autox env-management compile`) when it is up to date
+            LOADED_ENV_VARS = set(load_env(ENVIRONMENTS_DIR, active_name, override=True)["values"])
         else:
             load_dotenv()
     else:
@@ -60,6 +65,27 @@ class ConfigMap(Enum):
     # Terraform repo related configurations
     tf_github_repo = "TF_GITHUB_REPO"
     tf_github_branch = "TF_GITHUB_BRANCH"
+    # Browser driver related configurations
+    chromedriver_path = "CHROMEDRIVER_PATH"
+    chromedriver_version = "CHROMEDRIVER_VERSION"
+    chromedriver_offline = "CHROMEDRIVER_OFFLINE"
+    # Service log checks run after each test
+    service_log_paths = "SERVICE_LOG_PATHS"
+    service_log_patterns = "SERVICE_LOG_PATTERNS"
+    service_logs_remote = "SERVICE_LOGS_REMOTE"
+    # Cloud metadata cache
+    cloud_metadata_cache_ttl = "CLOUD_METADATA_CACHE_TTL"
+    cloud_metadata_cache_persist = "CLOUD_METADATA_CACHE_PERSIST"
+    # Jira bug filing for failed tests
+    jira_url = "JIRA_URL"
+    jira_username = "JIRA_USERNAME"
+    jira_api_token = "JIRA_API_TOKEN"
+    jira_project_key = "JIRA_PROJECT_KEY"
+    jira_issue_type = "JIRA_ISSUE_TYPE"
+    jira_auto_file = "JIRA_AUTO_FILE"
+    jira_attachment_max_mb = "JIRA_ATTACHMENT_MAX_MB"
+    # Page object waits
+    page_wait_timeout = "PAGE_WAIT_TIMEOUT"
 
     def source(self, default=None, convert_to_bool=False, post_process=None):
         env_variable_name = self.value
@@ -107,6 +133,136 @@ class Config(BaseModel):
     tf_github_repo: Optional[str] = Field(default_factory=lambda: os.environ.get(ConfigMap.tf_github_repo.value))
     tf_github_branch: Optional[str] = Field(default_factory=lambda: os.environ.get(ConfigMap.tf_github_branch.value))
 
+    # Browser driver related configurations
+    chromedriver_path: Optional[str] = Field(default_factory=lambda: os.environ.get(ConfigMap.chromedriver_path.value))
+    chromedriver_version: Optional[str] = Field(
+        default_factory=lambda: os.environ.get(ConfigMap.chromedriver_version.value)
+    )
+    chromedriver_offline: Optional[bool] = ConfigMap.chromedriver_offline.source(default=False, convert_to_bool=True)
+
+    # Service log checks run after each test (comma-separated lists)
+    service_log_paths: Optional[str] = Field(default_factory=lambda: os.environ.get(ConfigMap.service_log_paths.value))
+    service_log_patterns: Optional[str] = Field(
+        default_factory=lambda: os.environ.get(ConfigMap.service_log_patterns.value)
+    )
+    service_logs_remote: Optional[bool] = ConfigMap.service_logs_remote.source(default=False, convert_to_bool=True)
+
+    # Cloud metadata cache (TTL in seconds; persist keeps it per env across CLI invocations)
+    cloud_metadata_cache_ttl: Optional[int] = ConfigMap.cloud_metadata_cache_ttl.source(default=300, post_process=int)
+    cloud_metadata_cache_persist: Optional[bool] = ConfigMap.cloud_metadata_cache_persist.source(
+        default=False, convert_to_bool=True
+    )
+
+    # Jira bug filing for failed tests (JIRA_AUTO_FILE files them after each pytest session)
+    jira_url: Optional[str] = Field(default_factory=lambda: os.environ.get(ConfigMap.jira_url.value))
+    jira_username: Optional[str] = Field(default_factory=lambda: os.environ.get(ConfigMap.jira_username.value))
+    jira_api_token: Optional[str] = Field(default_factory=lambda: os.environ.get(ConfigMap.jira_api_token.value))
+    jira_project_key: Optional[str] = Field(default_factory=lambda: os.environ.get(ConfigMap.jira_project_key.value))
+    jira_issue_type: Optional[str] = ConfigMap.jira_issue_type.source(default="Bug")
+    jira_auto_file: Optional[bool] = ConfigMap.jira_auto_file.source(default=False, convert_to_bool=True)
+    jira_attachment_max_mb: Optional[float] = ConfigMap.jira_attachment_max_mb.source(default=10, post_process=float)
+
+    # Seconds page objects wait for elements and conditions
+    page_wait_timeout: Optional[float] = ConfigMap.page_wait_timeout.source(default=10, post_process=float)
+
+
+class EnvFileStore:
+    """Parsed `KEY=VALUE` env files, cached per path and re-read only when the file changes on disk.
+
+    Values are parsed by python-dotenv, as `load_env` does. Lines are kept as
+    they are (comments, blank lines, order) and each key points at its line,
+    so `update` applies any number of keys in one pass and one atomic write
+    (temp file + rename).
+    """
+
+    _cache = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _signature(path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _parse(lines):
+        """Return `({key: line index}, {key: value})` for the lines of an env file."""
+        keys = {}
+        for index, line in enumerate(lines):
+            # Split only on first '=' to allow '=' in the value
+            key, sep, _ = line.strip().removeprefix("export ").partition("=")
+            if sep and not line.lstrip().startswith("#"):
+                keys[key.strip()] = index
+        values = dotenv_values(stream=io.StringIO("\n".join(lines)))
+        # A line without '=' parses as None
+        return keys, {key: value for key, value in values.items() if value is not None}
+
+    @classmethod
+    def _load(cls, path):
+        path = str(path)
+        signature = cls._signature(path)
+        cached = cls._cache.get(path)
+        if cached and cached[0] == signature:
+            return cached
+        lines = []
+        if signature:
+            with open(path, "r") as f:
+                lines = f.read().splitlines()
+        cls._cache[path] = (signature, lines, *cls._parse(lines))
+        return cls._cache[path]
+
+    @classmethod
+    def read(cls, path):
+        """Return the file as a `{key: value}` dict ({} if it does not exist)."""
+        with cls._lock:
+            return dict(cls._load(path)[3])
+
+    @classmethod
+    def read_text(cls, path):
+        """Return the file content with surrounding whitespace stripped, or None if it does not exist."""
+        with cls._lock:
+            signature, lines, _, _ = cls._load(path)
+            return "\n".join(lines).strip() if signature else None
+
+    @classmethod
+    def update(cls, path, values):
+        """Set every key of `values` (replacing existing lines, appending new ones) in a single atomic write."""
+        path = str(path)
+        with cls._lock:
+            _, lines, keys, _ = cls._load(path)
+            lines, keys = list(lines), dict(keys)
+            for key, value in values.items():
+                if key in keys:
+                    lines[keys[key]] = f"{key}={value}"
+                else:
+                    keys[key] = len(lines)
+                    lines.append(f"{key}={value}")
+            cls._write(path, "\n".join(lines) + ("\n" if lines else ""))
+            cls._cache[path] = (cls._signature(path), lines, *cls._parse(lines))
+
+    @classmethod
+    def write_text(cls, path, text):
+        with cls._lock:
+            cls._write(str(path), text)
+            cls._cache.pop(str(path), None)
+
+    @staticmethod
+    def _write(path, text):
+        # Readers see either the old or the new file, never a partial one
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(text)
+            if os.path.exists(path):
+                # mkstemp creates the file as 0600; keep the permissions of the file being replaced
+                os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
 
 class EnvVars:
     def __init__(self):
@@ -132,7 +288,7 @@ class EnvVars:
         config = Config()
         # Exclude obvious secrets from the env file and write the rest as
         # KEY=VALUE lines where KEY is the environment variable name.
-        SECRET_ENV_VARS = {"API_KEY", "GITHUB_TOKEN", "AWS_ACCOUNT_ID"}
+        SECRET_ENV_VARS = {"API_KEY", "GITHUB_TOKEN", "AWS_ACCOUNT_ID", "JIRA_API_TOKEN"}
 
         cfg = config.dict()
         lines = []
@@ -157,68 +313,58 @@ class EnvVars:
 
     @staticmethod
     def get_active_env():
+        if os.environ.get("AUTOX_ENV"):
+            # Set for processes that run a specific env, regardless of env_vars/active
+            return os.environ["AUTOX_ENV"]
         active_file_path = os.path.join(ENVIRONMENTS_DIR, "active")
-        active_env = open_and_read_from_file(active_file_path)
+        try:
+            active_env = EnvFileStore.read_text(active_file_path)
+        except OSError as e:
+            logger.exception(e)
+            logger.error(f"Error reading from file '{active_file_path}'")
+            return
         if not active_env:
             logger.warning(f"The file {active_file_path} is empty")
             return
         logger.info(f"Active env selected is: {active_env}")
+        return active_env
+
+    @staticmethod
+    def get_env_vars(env_name=None):
+        """Return the env file of `env_name` (default: the active env) as a dict, parsed once and cached."""
+        env_name = env_name or EnvVars.get_active_env()
+        if not env_name:
+            return {}
+        return EnvFileStore.read(os.path.join(ENVIRONMENTS_DIR, env_name, "env"))
 
     @staticmethod
     def set_active_env(env_name):
         active_file_path = os.path.join(ENVIRONMENTS_DIR, "active")
-        w = write_to_file(active_file_path, mode="w", text=env_name)
-        if not w:
+        try:
+            EnvFileStore.write_text(active_file_path, env_name)
+        except OSError as e:
+            logger.exception(e)
             logger.error("Error setting active env")
             return
         logger.info(f"Set active env to: {env_name}")
 
     @staticmethod
     def add_new_env_var(**kwargs):
-        active_file_path = os.path.join(ENVIRONMENTS_DIR, "active")
-        active_env = open_and_read_from_file(active_file_path)
+        """Set one or more `KEY=value` pairs in the active env file with a single write."""
+        active_env = EnvVars.get_active_env()
         if not active_env:
-            logger.warning(f"The file {active_file_path} is empty")
             return
-        active_env = active_env.strip()
-        logger.info(f"Active env selected is: {active_env}")
         env_directory = os.path.join(ENVIRONMENTS_DIR, active_env)
-        logger.debug(env_directory)
 
         # Ensure env directory exists
         make_directory(env_directory)
 
         env_file = os.path.join(env_directory, "env")
-
-        # Read existing env file contents (all lines)
-        existing_lines = []
-        if os.path.exists(env_file):
-            try:
-                with open(env_file, "r") as f:
-                    existing_lines = f.read().splitlines()
-            except Exception:
-                logger.exception(f"Failed to read env file: {env_file}")
-
-        # Update or append key=value pairs from kwargs
-        for k, v in kwargs.items():
-            logger.debug(f"Setting env var: {k}={v}")
-            found = False
-            for i, line in enumerate(existing_lines):
-                if not line:
-                    continue
-                # Split only on first '=' to allow '=' in the value
-                parts = line.split("=", 1)
-                if parts[0] == k:
-                    existing_lines[i] = f"{k}={v}"
-                    found = True
-                    break
-
-            if not found:
-                existing_lines.append(f"{k}={v}")
-
-        new_text = "\n".join(existing_lines) + ("\n" if existing_lines else "")
-        w = write_to_file(env_file, mode="w", text=new_text)
-        if not w:
+        logger.debug(f"Setting env vars: {', '.join(kwargs)}")
+        try:
+            EnvFileStore.update(env_file, kwargs)
+        except OSError as e:
+            logger.exception(e)
             logger.error(f"Error writing updated env file: {env_file}")
         else:
             logger.info(f"Updated env file: {env_file}")
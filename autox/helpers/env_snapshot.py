@@ -0,0 +1,116 @@
+import hashlib
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from dotenv import dotenv_values
+
+SNAPSHOT_FILE_NAME = "env.snapshot.json"
+# An env file may set AUTOX_EXTENDS=<env name> to layer its values over that env
+EXTENDS_KEY = "AUTOX_EXTENDS"
+
+
+def snapshot_path(environments_dir, env_name):
+    return Path(environments_dir, env_name, SNAPSHOT_FILE_NAME)
+
+
+def _source_stats(environments_dir, sources):
+    stats = []
+    for source in sources:
+        try:
+            stat = os.stat(Path(environments_dir, source))
+        except FileNotFoundError:
+            return None
+        stats.append([stat.st_mtime_ns, stat.st_size])
+    return stats
+
+
+def _hash_sources(environments_dir, sources):
+    digest = hashlib.sha256()
+    for source in sources:
+        digest.update(source.encode() + b"\0" + Path(environments_dir, source).read_bytes() + b"\0")
+    return digest.hexdigest()
+
+
+def compile_env(environments_dir, env_name, write=True):
+    """Resolve `env_name` and the envs it extends into one snapshot dict, written next to its env file.
+
+    Layers are resolved base first, so values of `env_name` override the
+    ones it extends. The snapshot holds the merged values, the source files
+    with their mtime and size, and a sha256 over their contents.
+    """
+    layers, name = [], env_name
+    while name:
+        if name in [layer[0] for layer in layers]:
+            raise ValueError(f"Env '{env_name}' has a cyclic {EXTENDS_KEY} chain through '{name}'")
+        source = f"{name}/env"
+        values = dotenv_values(stream=io.StringIO(Path(environments_dir, source).read_text()))
+        layers.append((name, source, values))
+        name = values.get(EXTENDS_KEY)
+
+    merged = {}
+    for _, _, values in reversed(layers):
+        merged.update({key: value for key, value in values.items() if value is not None})
+    merged.pop(EXTENDS_KEY, None)
+
+    sources = [source for _, source, _ in reversed(layers)]
+    snapshot = {
+        "env": env_name,
+        "hash": _hash_sources(environments_dir, sources),
+        "sources": sources,
+        "stats": _source_stats(environments_dir, sources),
+        "values": merged,
+    }
+    if write:
+        _write_snapshot(snapshot_path(environments_dir, env_name), snapshot)
+    return snapshot
+
+
+def _write_snapshot(path, snapshot):
+    # Processes refreshing the same snapshot at once each write their own temporary file
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(json.dumps(snapshot, indent=2))
+        # The snapshot holds the env's values, so it gets the permissions of the env file rather than mkstemp's 0600
+        env_file = path.parent / "env"
+        if env_file.exists():
+            os.chmod(tmp_path, env_file.stat().st_mode & 0o7777)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_env(environments_dir, env_name, override=True):
+    """Load the values of `env_name` (with its layers) into `os.environ` and return its snapshot.
+
+    A compiled snapshot is used as-is while its source files keep their
+    mtime and size. If they changed but their content hash did not, only the
+    recorded stats are refreshed; otherwise the env is parsed and compiled
+    again. Envs that were never compiled are parsed without writing a
+    snapshot.
+    """
+    path = snapshot_path(environments_dir, env_name)
+    try:
+        snapshot = json.loads(path.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        snapshot = None
+
+    if snapshot is None:
+        snapshot = compile_env(environments_dir, env_name, write=False)
+    else:
+        stats = _source_stats(environments_dir, snapshot["sources"])
+        if stats != snapshot["stats"]:
+            if stats is not None and _hash_sources(environments_dir, snapshot["sources"]) == snapshot["hash"]:
+                snapshot["stats"] = stats
+                _write_snapshot(path, snapshot)
+            else:
+                snapshot = compile_env(environments_dir, env_name)
+
+    for key, value in snapshot["values"].items():
+        if override or key not in os.environ:
+            os.environ[key] = value
+    return snapshot
@@ -8,13 +8,13 @@ from autox.autox_logger import logger
 
 def generate_random_name():
     name = namer.generate(category="computer_science")
-    logger.debug(f"Generated a random name: {name}")
+    logger.debug("Generated a random name: %s", name)
     return name  # Example: 'crazy-supernova'
 
 
 def generate_random_id():
     rand_id = uuid.uuid4().hex[:6]
-    logger.debug(f"Generated a random id: {rand_id}")
+    logger.debug("Generated a random id: %s", rand_id)
     return rand_id
 
 
@@ -23,9 +23,9 @@ def make_directory(directory_name):
         p = Path(directory_name)
         if not p.exists():
             p.mkdir(parents=True, exist_ok=True)
-            logger.info(f"Created directory: {directory_name}")
+            logger.info("Created directory: %s", directory_name)
         else:
-            logger.debug(f"'{directory_name}' directory exists. Skipping creation")
+            logger.debug("'%s' directory exists. Skipping creation", directory_name)
     except Exception as e:
         logger.exception(e)
         logger.error(f"Error creating directory '{directory_name}'")
@@ -37,7 +37,7 @@ def create_and_write_to_file(file_path, env_name=None):
         # Ensure parent directory exists
         if not p.parent.exists():
             p.parent.mkdir(parents=True, exist_ok=True)
-            logger.debug(f"Created parent directory for file: {p.parent}")
+            logger.debug("Created parent directory for file: %s", p.parent)
 
         logger.info(f"Creating file: {file_path}")
         with p.open("w") as f:
@@ -58,14 +58,14 @@ def open_and_read_from_file(file_path, env_name=None):
         p = Path(file_path)
         # If the parent dir doesn't exist, log that at DEBUG (no automatic creation here).
         if not p.parent.exists():
-            logger.debug(f"Parent directory does not exist for the file: {file_path}")
+            logger.debug("Parent directory does not exist for the file: %s", file_path)
 
-        logger.debug(f"Reading from file: {file_path}")
+        logger.debug("Reading from file: %s", file_path)
         with p.open("r") as f:
             env_text = f.readline()
             if not env_text:
                 # Keep this at DEBUG so callers can decide whether empty content is noteworthy.
-                logger.debug(f"File {file_path} is empty")
+                logger.debug("File %s is empty", file_path)
             return env_text
     except Exception as e:
         logger.exception(e)
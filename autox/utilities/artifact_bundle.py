@@ -0,0 +1,169 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import tarfile
+from pathlib import Path
+from typing import NamedTuple
+
+from autox.autox_logger import logger
+
+# Jira's default attachment size limit
+ARCHIVE_MAX_BYTES = 10 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+# Stored as they are, compressing them again only costs time
+COMPRESSED_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".gz", ".zst", ".zip"}
+MANIFEST_NAME = "manifest.json"
+
+
+class Artifact(NamedTuple):
+    """A file (or the `length` bytes of it from `offset`, e.g. one test's log slice) or inline `text`."""
+
+    name: str
+    path: str = None
+    offset: int = 0
+    length: int = None
+    text: str = None
+
+
+def _compressor():
+    """Return the member suffix and a function wrapping a binary file in a compressing writer."""
+    try:
+        import zstandard
+
+        return ".zst", lambda raw: zstandard.ZstdCompressor(level=10).stream_writer(raw, closefd=False)
+    except ImportError:
+        return ".gz", lambda raw: gzip.GzipFile(fileobj=raw, mode="wb", mtime=0)
+
+
+def _read_chunks(artifact):
+    if artifact.text is not None:
+        yield artifact.text.encode("utf-8")
+        return
+    with open(artifact.path, "rb") as source:
+        source.seek(artifact.offset)
+        remaining = artifact.length
+        while remaining is None or remaining > 0:
+            chunk = source.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+def _tar_size(member_sizes):
+    """Size of an uncompressed tar holding members of these sizes, including padding to whole records."""
+    size = sum(tarfile.BLOCKSIZE + -(-member // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE for member in member_sizes)
+    size += 2 * tarfile.BLOCKSIZE
+    return -(-size // tarfile.RECORDSIZE) * tarfile.RECORDSIZE
+
+
+class ArtifactBundler:
+    """Packs failure artifacts into one size-bounded tar archive per issue.
+
+    Every artifact is streamed from disk through the compressor (zstd when
+    `zstandard` is installed, gzip otherwise) into a blob named by the
+    sha256 of its content, so identical artifacts, within a bundle or across
+    the bundles of one run, are compressed and stored once. A bundle takes
+    the blobs in the order the artifacts are given while they fit in
+    `max_bytes`; the rest, and duplicates, are only listed in its
+    `manifest.json`.
+    """
+
+    def __init__(self, output_dir, max_bytes=ARCHIVE_MAX_BYTES):
+        self.output_dir = Path(output_dir)
+        self.blob_dir = self.output_dir / "blobs"
+        self.max_bytes = max_bytes
+        self.suffix, self._compress = _compressor()
+        # sha256 -> (blob path, content size, member suffix)
+        self._blobs = {}
+        # (path, offset, length, mtime_ns, size) -> sha256, so a file shared by several bundles is read once
+        self._sources = {}
+
+    def _source_key(self, artifact):
+        if artifact.path is None:
+            return None
+        stat = os.stat(artifact.path)
+        return artifact.path, artifact.offset, artifact.length, stat.st_mtime_ns, stat.st_size
+
+    def _store(self, artifact):
+        """Compress `artifact` into a blob unless its content is stored already; return its sha256."""
+        key = self._source_key(artifact)
+        if key in self._sources:
+            return self._sources[key]
+
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.blob_dir / f".{len(self._blobs)}-{os.getpid()}.tmp"
+        digest, size = hashlib.sha256(), 0
+        compress = Path(artifact.name).suffix.lower() not in COMPRESSED_SUFFIXES
+        with open(tmp_path, "wb") as raw:
+            target = self._compress(raw) if compress else raw
+            for chunk in _read_chunks(artifact):
+                digest.update(chunk)
+                size += len(chunk)
+                target.write(chunk)
+            if compress:
+                target.close()
+
+        sha = digest.hexdigest()
+        if sha in self._blobs:
+            tmp_path.unlink()
+        else:
+            self._blobs[sha] = (tmp_path.replace(self.blob_dir / sha), size, self.suffix if compress else "")
+        if key:
+            self._sources[key] = sha
+        return sha
+
+    def bundle(self, name, artifacts):
+        """Write `<output_dir>/<name>.tar` from `artifacts` (most important first) and return its path."""
+        manifest, members, stored = [], [], {}
+        for artifact in artifacts:
+            entry = {"name": artifact.name, "source": artifact.path}
+            try:
+                sha = self._store(artifact)
+            except FileNotFoundError:
+                manifest.append({**entry, "status": "missing"})
+                continue
+            blob_path, size, suffix = self._blobs[sha]
+            entry.update(sha256=sha, size=size)
+            if sha in stored:
+                manifest.append({**entry, "status": "duplicate", "same_as": stored[sha]})
+                continue
+            stored[sha] = artifact.name
+            manifest.append(entry)
+            members.append((entry, blob_path, f"{artifact.name}{suffix}"))
+
+        # Take blobs while they fit, leaving room for the manifest listing every artifact
+        sizes = []
+        for entry, _, _ in members:
+            entry["status"] = "included"
+        manifest_size = len(json.dumps(manifest, indent=2).encode())
+        for entry, blob_path, _ in members:
+            blob_size = blob_path.stat().st_size
+            if _tar_size([*sizes, blob_size, manifest_size]) <= self.max_bytes:
+                sizes.append(blob_size)
+            else:
+                entry["status"] = "omitted"
+                logger.warning(f"Left {entry['name']} out of bundle {name}: it does not fit in {self.max_bytes} bytes")
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        output_path = self.output_dir / f"{name}.tar"
+        tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+        with tarfile.open(tmp_path, "w", format=tarfile.USTAR_FORMAT) as tar:
+            for entry, blob_path, arcname in members:
+                if entry["status"] == "included":
+                    tar.add(blob_path, arcname=arcname)
+            data = json.dumps(manifest, indent=2).encode()
+            info = tarfile.TarInfo(MANIFEST_NAME)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+        tmp_path.replace(output_path)
+        logger.info(f"Bundled {len(sizes)} of {len(artifacts)} artifacts into {output_path}")
+        return output_path
+
+    def cleanup(self):
+        """Remove the blobs; the bundles are kept."""
+        shutil.rmtree(self.blob_dir, ignore_errors=True)
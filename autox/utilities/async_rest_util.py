@@ -0,0 +1,170 @@
+import asyncio
+import functools
+import json
+import math
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import requests
+
+from autox.autox_logger import logger
+from autox.utilities.rest_api_util import get_session
+
+DEFAULT_CONCURRENCY = 10
+LOAD_RESULTS_DIR = Path("results", "load")
+
+
+class AsyncRestClient:
+    """Awaitable HTTP calls on top of a (shared) `requests.Session`.
+
+    Requests run on a private thread pool of `concurrency` workers, which
+    bounds how many are in flight at once; further calls wait their turn.
+    Because the underlying session is reused, its headers, auth and pooled
+    keep-alive connections are shared with synchronous callers, e.g. the
+    `session` fixture of the API tests. Size the session's connection pool
+    (`RestSession(pool_size=...)`) to at least `concurrency` to avoid
+    opening throwaway connections.
+    """
+
+    def __init__(self, session=None, concurrency=DEFAULT_CONCURRENCY):
+        self.session = session or get_session()
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="autox-http")
+
+    async def request(self, method, url, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(self.session.request, method, url, **kwargs)
+        )
+
+    def _timed_request(self, method, url, kwargs):
+        sent_at = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.RequestException as e:
+            return time.perf_counter() - sent_at, None, e
+        return time.perf_counter() - sent_at, response, None
+
+    async def timed_request(self, method, url, **kwargs):
+        """Send a request and return `(latency, response, exception)`.
+
+        The clock starts on the worker thread right before the request is
+        sent, so time spent waiting for a free worker is not counted.
+        Transport errors are returned rather than raised.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._timed_request, method, url, kwargs)
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url, **kwargs):
+        return await self.request("PUT", url, **kwargs)
+
+    async def delete(self, url, **kwargs):
+        return await self.request("DELETE", url, **kwargs)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list (None when empty)."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+@dataclass
+class LoadResult:
+    """Latencies (seconds) and outcomes of a batch of requests fired by `fire_requests`."""
+
+    latencies: list = field(default_factory=list)
+    status_codes: Counter = field(default_factory=Counter)
+    exceptions: Counter = field(default_factory=Counter)
+    elapsed: float = 0.0
+
+    @property
+    def count(self):
+        return len(self.latencies)
+
+    @property
+    def error_count(self):
+        return sum(self.exceptions.values()) + sum(n for code, n in self.status_codes.items() if code >= 400)
+
+    @property
+    def error_rate(self):
+        return self.error_count / self.count if self.count else 0.0
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        return {
+            "requests": self.count,
+            "errors": self.error_count,
+            "error_rate": round(self.error_rate, 4),
+            "elapsed_s": round(self.elapsed, 3),
+            "throughput_rps": round(self.count / self.elapsed, 2) if self.elapsed else None,
+            "latency_ms": {
+                name: round(percentile(latencies, p) * 1000, 2) if latencies else None
+                for name, p in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+            },
+            "status_codes": {str(code): n for code, n in sorted(self.status_codes.items())},
+            "exceptions": dict(self.exceptions),
+        }
+
+    def write_artifact(self, name, directory=LOAD_RESULTS_DIR):
+        """Write the summary as `<directory>/<name>.json` and return the path."""
+        path = Path(directory) / f"{name}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.summary(), indent=2))
+        logger.info(f"Wrote load test results to {path}")
+        return path
+
+
+async def fire_requests(client, method, url, count, rate=None, **kwargs):
+    """Send `count` requests, started at `rate` requests per second (all at once when None).
+
+    Concurrency is still bounded by the client; latencies only cover the
+    time a request was actually in flight, not the time it waited for a
+    free worker. Transport errors are counted per exception type instead of
+    being raised, so one run reports its full error rate.
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+
+    async def send(index):
+        if rate:
+            await asyncio.sleep(max(start + index / rate - loop.time(), 0))
+        latency, response, exception = await client.timed_request(method, url, **kwargs)
+        if exception:
+            return latency, None, type(exception).__name__
+        return latency, response.status_code, None
+
+    result = LoadResult()
+    for latency, status_code, exception in await asyncio.gather(*(send(index) for index in range(count))):
+        result.latencies.append(latency)
+        if exception:
+            result.exceptions[exception] += 1
+        else:
+            result.status_codes[status_code] += 1
+    result.elapsed = loop.time() - start
+
+    summary = result.summary()
+    logger.info(
+        f"{method} {url}: {summary['requests']} requests, error rate {summary['error_rate']:.2%}, "
+        f"p50/p95/p99 {summary['latency_ms']['p50']}/{summary['latency_ms']['p95']}/{summary['latency_ms']['p99']} ms"
+    )
+    return result
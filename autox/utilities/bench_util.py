@@ -0,0 +1,115 @@
+import asyncio
+import json
+import random
+from collections import Counter
+from pathlib import Path
+
+from autox.autox_logger import logger
+from autox.utilities.async_rest_util import AsyncRestClient
+from autox.utilities.latency_histogram import LatencyHistogram
+from autox.utilities.rest_api_util import RestSession
+
+BENCH_RESULTS_DIR = Path("results", "bench")
+BASELINE_FILE = BENCH_RESULTS_DIR / "baseline.json"
+
+
+def parse_request_mix(specs):
+    """Parse `METHOD PATH [WEIGHT]` strings, e.g. `GET /health 3`, into (method, path, weight) tuples.
+
+    The weight is separated by whitespace, which a path cannot contain, so
+    query strings like `GET /users?id=5` are taken as they are.
+    """
+    mix = []
+    for spec in specs:
+        parts = spec.split()
+        weight = parts.pop() if len(parts) == 3 else "1"
+        if len(parts) != 2 or not parts[1].startswith("/") or not weight.isdigit() or int(weight) < 1:
+            raise ValueError(f"Invalid request '{spec}', expected 'METHOD /path [WEIGHT]'")
+        mix.append((parts[0].upper(), parts[1], int(weight)))
+    return mix
+
+
+async def run_benchmark(base_url, mix, concurrency=10, duration=30, headers=None, timeout=10):
+    """Drive `concurrency` closed-loop workers against `base_url` for `duration` seconds.
+
+    Each worker repeatedly picks a request from the weighted `mix` and sends
+    it as soon as the previous one completed. Returns `(summary, histogram)`:
+    a dict with throughput, error counts and overall/per-request latency
+    percentiles, and the overall `LatencyHistogram`.
+    """
+    session = RestSession(timeout=timeout, pool_size=concurrency, retries=0)
+    session.headers.update(headers or {})
+    labels = [f"{method} {path}" for method, path, _ in mix]
+    weights = [weight for _, _, weight in mix]
+
+    overall = LatencyHistogram()
+    per_request = {label: LatencyHistogram() for label in labels}
+    errors = Counter()
+
+    async with AsyncRestClient(session, concurrency=concurrency) as client:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + duration
+
+        async def worker():
+            while loop.time() < deadline:
+                index = random.choices(range(len(mix)), weights=weights)[0]
+                method, path, _ = mix[index]
+                latency, response, exception = await client.timed_request(method, f"{base_url.rstrip('/')}{path}")
+                if exception or response.status_code >= 400:
+                    errors[labels[index]] += 1
+                overall.record(latency)
+                per_request[labels[index]].record(latency)
+
+        started = loop.time()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = loop.time() - started
+    session.close()
+
+    summary = {
+        "base_url": base_url,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 3),
+        "requests": overall.total,
+        "errors": sum(errors.values()),
+        "throughput_rps": round(overall.total / elapsed, 2) if elapsed else None,
+        "latency_us": overall.percentiles(),
+        "per_request": {
+            label: {
+                "requests": histogram.total,
+                "errors": errors[label],
+                "latency_us": histogram.percentiles(),
+            }
+            for label, histogram in per_request.items()
+        },
+    }
+    return summary, overall
+
+
+def write_results(summary, histogram, output_dir=BENCH_RESULTS_DIR):
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / "summary.json").write_text(json.dumps(summary, indent=2))
+    histogram.write_json(output_dir / "histogram.json")
+    histogram.write_csv(output_dir / "histogram.csv")
+    logger.info(f"Wrote benchmark summary and latency histogram (JSON/CSV) to {output_dir}")
+
+
+def compare_to_baseline(summary, baseline_path=BASELINE_FILE, threshold_percent=10.0):
+    """Compare p95 latency against a saved baseline summary.
+
+    Returns (regressed, message). A missing baseline is never a regression.
+    """
+    baseline_path = Path(baseline_path)
+    if not baseline_path.exists():
+        return False, f"No baseline at {baseline_path}; skipping regression check"
+
+    baseline_p95 = json.loads(baseline_path.read_text())["latency_us"]["p95"]
+    current_p95 = summary["latency_us"]["p95"]
+    if not baseline_p95 or current_p95 is None:
+        return False, "Baseline or current run has no samples; skipping regression check"
+
+    change = (current_p95 - baseline_p95) / baseline_p95 * 100
+    message = (
+        f"p95 latency {current_p95}us vs baseline {baseline_p95}us ({change:+.1f}%, threshold {threshold_percent}%)"
+    )
+    return change > threshold_percent, message
@@ -0,0 +1,152 @@
+import contextlib
+import fcntl
+import os
+import re
+import shutil
+import subprocess
+from pathlib import Path
+
+from autox.autox_logger import logger
+from autox.config import AUTOX_ROOT, ENVIRONMENTS_DIR, ConfigMap, EnvFileStore, EnvVars, config
+
+# Executables probed, in order, to find the locally installed Chrome version
+CHROME_BINARIES = [
+    "google-chrome",
+    "google-chrome-stable",
+    "chromium",
+    "chromium-browser",
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+]
+VERSION_PATTERN = re.compile(r"(\d+)\.\d+\.\d+(?:\.\d+)?")
+# webdriver-manager's cache; drivers travel with the envs rather than living in ~/.wdm
+DRIVER_CACHE_DIR = ENVIRONMENTS_DIR / ".wdm"
+
+_resolved_path = None
+
+
+class ChromeDriverNotCachedError(RuntimeError):
+    """Raised in offline mode when no usable chromedriver has been pinned yet."""
+
+
+def _read_version(executable):
+    try:
+        result = subprocess.run([executable, "--version"], capture_output=True, text=True, timeout=10, check=False)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    match = VERSION_PATTERN.search(result.stdout)
+    return match.group(0) if match else None
+
+
+def get_chrome_version():
+    """Return the version of the locally installed Chrome/Chromium, or None if not found."""
+    for binary in CHROME_BINARIES:
+        executable = shutil.which(binary) or (binary if os.path.isfile(binary) else None)
+        if executable:
+            version = _read_version(executable)
+            if version:
+                return version
+    return None
+
+
+def major_version(version):
+    return version.split(".", 1)[0] if version else None
+
+
+def _absolute(path):
+    # Pinned paths inside the repository are stored relative to it so they survive
+    # being mounted at a different location in another container
+    return Path(path) if Path(path).is_absolute() else AUTOX_ROOT / path
+
+
+def _pinnable(path):
+    path = Path(path).resolve()
+    return str(path.relative_to(AUTOX_ROOT)) if path.is_relative_to(AUTOX_ROOT) else str(path)
+
+
+def _usable_pin(pinned_path, pinned_version, chrome_version):
+    """Return the absolute path of the pinned driver if it exists and matches Chrome's major version."""
+    if not pinned_path or not _absolute(pinned_path).is_file():
+        return None
+    if chrome_version is None or major_version(chrome_version) == major_version(pinned_version):
+        logger.debug(f"Using pinned chromedriver {pinned_version} at {pinned_path}")
+        return str(_absolute(pinned_path))
+    logger.info(f"Chrome {chrome_version} no longer matches pinned chromedriver {pinned_version}")
+    return None
+
+
+def _pin_in_env_file():
+    """The pin as currently written in the active env file, which another process may have updated."""
+    active_env = EnvVars.get_active_env()
+    values = EnvFileStore.read(ENVIRONMENTS_DIR / active_env / "env") if active_env else {}
+    return values.get(ConfigMap.chromedriver_path.value), values.get(ConfigMap.chromedriver_version.value)
+
+
+@contextlib.contextmanager
+def _download_lock():
+    """Serialise downloads and pinning across processes, e.g. the shards of one run starting together."""
+    DRIVER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(DRIVER_CACHE_DIR / ".lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def resolve_chromedriver(offline=None):
+    """Return the path of a chromedriver matching the installed Chrome.
+
+    The driver pinned in the active env (`CHROMEDRIVER_PATH` /
+    `CHROMEDRIVER_VERSION`) is reused as long as it exists and its major
+    version matches the installed Chrome, so webdriver-manager is only
+    consulted on the first run or after a Chrome upgrade. The resolved
+    driver is then pinned back into the active env file; processes resolving
+    at the same time wait for the first one and reuse its pin. In offline mode
+    (`offline=True` or `CHROMEDRIVER_OFFLINE=true`) resolution is never
+    attempted and a missing or stale pin raises `ChromeDriverNotCachedError`.
+    """
+    global _resolved_path
+    if _resolved_path:
+        return _resolved_path
+
+    offline = config.chromedriver_offline if offline is None else offline
+    pinned_path = os.environ.get(ConfigMap.chromedriver_path.value)
+    pinned_version = os.environ.get(ConfigMap.chromedriver_version.value)
+    chrome_version = get_chrome_version()
+
+    _resolved_path = _usable_pin(pinned_path, pinned_version, chrome_version)
+    if _resolved_path:
+        return _resolved_path
+
+    if offline:
+        raise ChromeDriverNotCachedError(
+            f"Offline mode is enabled but no chromedriver matching Chrome {chrome_version or '(unknown)'} is pinned "
+            f"(CHROMEDRIVER_PATH={pinned_path or '<unset>'}, CHROMEDRIVER_VERSION={pinned_version or '<unset>'}). "
+            "Run once with network access to pin a driver, or set CHROMEDRIVER_PATH to an existing binary."
+        )
+
+    # Imported here so offline and cached runs never touch webdriver-manager
+    from webdriver_manager.chrome import ChromeDriverManager
+    from webdriver_manager.core.driver_cache import DriverCacheManager
+
+    with _download_lock():
+        # Another process may have pinned a driver while this one waited for the lock
+        _resolved_path = _usable_pin(*_pin_in_env_file(), chrome_version)
+        if _resolved_path:
+            return _resolved_path
+
+        # The cache manager adds the .wdm directory itself
+        driver_path = ChromeDriverManager(cache_manager=DriverCacheManager(root_dir=str(ENVIRONMENTS_DIR))).install()
+        driver_version = _read_version(driver_path) or chrome_version
+        logger.info(f"Resolved chromedriver {driver_version} at {driver_path}")
+
+        pinned = {
+            ConfigMap.chromedriver_path.value: _pinnable(driver_path),
+            ConfigMap.chromedriver_version.value: driver_version or "",
+        }
+        os.environ.update(pinned)
+        # Written to a temporary file and renamed over the env file, so readers never see a partial pin
+        EnvVars.add_new_env_var(**pinned)
+
+    _resolved_path = driver_path
+    return _resolved_path
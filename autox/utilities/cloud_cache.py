@@ -0,0 +1,186 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from autox.autox_logger import logger
+from autox.config import ENVIRONMENTS_DIR, Config, EnvVars
+
+CACHE_FILE_NAME = "metadata_cache.json"
+DEFAULT_TTL = 300
+
+
+def cache_file_for_env(env_name=None):
+    """On-disk cache of `env_name` (default: the active env), kept next to that env's `env` file."""
+    if not env_name and (ENVIRONMENTS_DIR / "active").exists():
+        env_name = EnvVars.get_active_env()
+    return ENVIRONMENTS_DIR / (env_name or "default") / CACHE_FILE_NAME
+
+
+class MetadataCache:
+    """TTL cache for cloud metadata lookups, keyed by (provider, region, resource).
+
+    Values live in memory for `ttl` seconds. With a `cache_file`, entries
+    stored with `persist=True` are also written to that JSON file so the
+    next CLI invocation can reuse them without an API round trip; secrets
+    and non-JSON values must be stored with `persist=False`.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, cache_file=None):
+        self.ttl = ttl
+        self.cache_file = Path(cache_file) if cache_file else None
+        self._entries = {}
+        self._persisted = set()
+        self._lock = threading.Lock()
+        if self.cache_file:
+            self._load()
+
+    @staticmethod
+    def _key(provider, region, resource):
+        return f"{provider}/{region or '-'}/{resource}"
+
+    def _load(self):
+        try:
+            entries = json.loads(self.cache_file.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        now = time.time()
+        for key, (expires_at, value) in entries.items():
+            if expires_at > now:
+                self._entries[key] = (expires_at, value)
+                self._persisted.add(key)
+
+    def _save(self):
+        entries = {key: self._entries[key] for key in self._persisted if key in self._entries}
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # A temporary file of its own, so processes saving at the same time never rename each other's file
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_file.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(json.dumps(entries, indent=2))
+            os.replace(tmp_path, self.cache_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def get(self, provider, region, resource, loader=None, ttl=None, persist=True):
+        """Return the cached value, calling `loader()` (and caching its result) on a miss or expiry."""
+        key = self._key(provider, region, resource)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[0] > time.time():
+            return entry[1]
+        if loader is None:
+            return None
+        logger.debug(f"Metadata cache miss for {key}")
+        value = loader()
+        self.set(provider, region, resource, value, ttl=ttl, persist=persist)
+        return value
+
+    def set(self, provider, region, resource, value, ttl=None, persist=True):
+        self.set_many(provider, region, {resource: value}, ttl=ttl, persist=persist)
+
+    def set_many(self, provider, region, values, ttl=None, persist=True):
+        """Store several `{resource: value}` entries with a single write of the on-disk layer."""
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            for resource, value in values.items():
+                key = self._key(provider, region, resource)
+                self._entries[key] = (expires_at, value)
+                if persist and self.cache_file:
+                    self._persisted.add(key)
+            if persist and self.cache_file:
+                self._save()
+
+    def invalidate(self, provider=None, region=None, resource=None):
+        """Drop every entry matching the given key parts; no arguments clears the whole cache."""
+        parts = (provider, region, resource)
+        with self._lock:
+            for key in list(self._entries):
+                if all(part is None or part == key_part for part, key_part in zip(parts, key.split("/", 2))):
+                    del self._entries[key]
+                    self._persisted.discard(key)
+            if self.cache_file:
+                self._save()
+
+
+_session = None
+_clients = {}
+_metadata_cache = None
+_lock = threading.Lock()
+
+
+def get_boto_session():
+    """The shared boto3 session, built once from the AWS_* environment variables."""
+    global _session
+    with _lock:
+        if _session is None:
+            import boto3
+
+            _session = boto3.session.Session(
+                region_name=os.environ.get("AWS_REGION"),
+                aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID"),
+                aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY"),
+            )
+        return _session
+
+
+def get_boto_client(service, region=None):
+    """Return the shared client for (service, region), creating it on first use."""
+    session = get_boto_session()
+    key = (service, region or session.region_name)
+    # boto3 client creation is not thread-safe
+    with _lock:
+        if key not in _clients:
+            _clients[key] = session.client(service, region_name=key[1])
+        return _clients[key]
+
+
+def get_metadata_cache():
+    """The process-wide `MetadataCache`, persisted per env when CLOUD_METADATA_CACHE_PERSIST is set."""
+    global _metadata_cache
+    with _lock:
+        if _metadata_cache is None:
+            config = Config()
+            _metadata_cache = MetadataCache(
+                ttl=config.cloud_metadata_cache_ttl,
+                cache_file=cache_file_for_env() if config.cloud_metadata_cache_persist else None,
+            )
+        return _metadata_cache
+
+
+def reset_cloud_clients():
+    """Forget the shared session, clients and cache, e.g. after switching env or credentials."""
+    global _session, _metadata_cache
+    with _lock:
+        _session, _metadata_cache = None, None
+        _clients.clear()
+
+
+def instance_summary(instance):
+    """The JSON-serializable subset of a `describe_instances` instance that autox relies on."""
+    return {
+        "InstanceId": instance["InstanceId"],
+        "PublicDnsName": instance.get("PublicDnsName"),
+        "PublicIpAddress": instance.get("PublicIpAddress"),
+        "PrivateIpAddress": instance.get("PrivateIpAddress"),
+        "State": instance.get("State", {}).get("Name"),
+    }
+
+
+def cache_instances(instances):
+    """Store already described instances, e.g. from a batched fleet lookup."""
+    values = {f"ec2:instance/{instance['InstanceId']}": instance_summary(instance) for instance in instances}
+    get_metadata_cache().set_many("aws", get_boto_session().region_name, values)
+
+
+def describe_instance(instance_id):
+    """Cached `describe_instances` summary of one EC2 instance."""
+
+    def load():
+        response = get_boto_client("ec2").describe_instances(InstanceIds=[instance_id])
+        return instance_summary(response["Reservations"][0]["Instances"][0])
+
+    return get_metadata_cache().get("aws", get_boto_session().region_name, f"ec2:instance/{instance_id}", load)
@@ -0,0 +1,180 @@
+import codecs
+import collections
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from autox.autox_logger import logger
+
+DEFAULT_TIMEOUT = 600
+# Last lines of output kept in memory per command
+RING_BUFFER_LINES = 1000
+# Seconds between SIGTERM and SIGKILL when a command times out
+KILL_GRACE_PERIOD = 5
+POLL_INTERVAL = 0.05
+
+_console_lock = threading.Lock()
+
+
+@dataclass
+class CommandResult:
+    command: object
+    exit_code: int
+    duration: float
+    peak_rss_kb: int = None
+    timed_out: bool = False
+    output: list = field(default_factory=list)
+    log_file: Path = None
+
+    @property
+    def ok(self):
+        return self.exit_code == 0
+
+
+def _kill_process_group(process):
+    """Terminate the command and everything it started, escalating to SIGKILL after a grace period."""
+    if not hasattr(os, "killpg"):
+        process.kill()
+        return
+    for sig, grace in ((signal.SIGTERM, KILL_GRACE_PERIOD), (signal.SIGKILL, 0)):
+        try:
+            os.killpg(process.pid, sig)
+        except ProcessLookupError:
+            return
+        deadline = time.monotonic() + grace
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                return
+            time.sleep(POLL_INTERVAL)
+
+
+def _wait(process, timeout):
+    """Wait for `process`, returning (exit_code, peak RSS in KB or None, timed_out)."""
+    deadline = time.monotonic() + timeout if timeout else None
+    while True:
+        if hasattr(os, "wait4"):
+            # wait4 reaps the child and reports its resource usage in one call
+            pid, status, usage = os.wait4(process.pid, os.WNOHANG)
+            if pid:
+                process.returncode = os.waitstatus_to_exitcode(status)
+                # ru_maxrss is in bytes on macOS and KB on Linux
+                peak_rss = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+                return process.returncode, peak_rss, False
+        elif process.poll() is not None:
+            return process.returncode, None, False
+        if deadline and time.monotonic() > deadline:
+            _kill_process_group(process)
+            process.wait()
+            return process.returncode, None, True
+        time.sleep(POLL_INTERVAL)
+
+
+def run_command(
+    command,
+    timeout=DEFAULT_TIMEOUT,
+    env=None,
+    cwd=None,
+    echo=True,
+    prefix="",
+    log_file=None,
+    buffer_lines=RING_BUFFER_LINES,
+):
+    """Run `command` (a list, or a string for the shell) and tee its output while it runs.
+
+    stdout and stderr are merged and, as they arrive, echoed to the console
+    (each line starting with `prefix`), appended to `log_file` if given and
+    kept in a ring buffer of the last `buffer_lines` lines. The command runs
+    in its own process group, which is killed as a whole after `timeout`
+    seconds or when waiting for it is interrupted (e.g. by Ctrl+C). Returns
+    a `CommandResult`; the exit code is -1 on timeout.
+    """
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        command,
+        shell=isinstance(command, str),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        env=env,
+        cwd=cwd,
+        start_new_session=hasattr(os, "killpg"),
+    )
+    ring = collections.deque(maxlen=buffer_lines)
+    sink = open(log_file, "ab") if log_file else None
+
+    def pump():
+        pending = b""
+        # Keeps a multi-byte character split across two chunks intact in the unprefixed echo
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        # read1 returns whatever is available, so partial lines (progress dots) are echoed right away
+        while chunk := process.stdout.read1(65536):
+            if sink:
+                sink.write(chunk)
+            *lines, pending = (pending + chunk).split(b"\n")
+            decoded = [line.decode("utf-8", errors="replace") for line in lines]
+            ring.extend(decoded)
+            if echo:
+                # Prefixed output is echoed by whole lines so concurrent commands do not interleave mid-line
+                text = "".join(f"{prefix}{line}\n" for line in decoded) if prefix else decoder.decode(chunk)
+                with _console_lock:
+                    sys.stdout.write(text)
+                    sys.stdout.flush()
+        if pending:
+            ring.append(pending.decode("utf-8", errors="replace"))
+            if echo and prefix:
+                with _console_lock:
+                    sys.stdout.write(f"{prefix}{ring[-1]}\n")
+        if echo and not prefix and (tail := decoder.decode(b"", final=True)):
+            with _console_lock:
+                sys.stdout.write(tail)
+
+    reader = threading.Thread(target=pump, daemon=True)
+    reader.start()
+    try:
+        exit_code, peak_rss, timed_out = _wait(process, timeout)
+        # The pipe closes once every process holding it (including grandchildren) has exited
+        reader.join(timeout=KILL_GRACE_PERIOD)
+    except BaseException:
+        # The command runs in its own session, so e.g. Ctrl+C does not reach it: stop it before giving up on it
+        _kill_process_group(process)
+        try:
+            process.wait(timeout=KILL_GRACE_PERIOD)
+        except subprocess.TimeoutExpired:
+            pass
+        reader.join(timeout=KILL_GRACE_PERIOD)
+        raise
+    finally:
+        process.stdout.close()
+        if sink:
+            sink.close()
+
+    duration = time.perf_counter() - started
+    if timed_out:
+        logger.error(f"Command timed out after {timeout} seconds: {command}")
+        exit_code = -1
+    return CommandResult(command, exit_code, duration, peak_rss, timed_out, list(ring), log_file)
+
+
+def run_commands(commands, max_workers=4, log_dir=None, **kwargs):
+    """Run several commands concurrently and return their `CommandResult`s in the same order.
+
+    `commands` is a list of commands or a `{name: command}` dict; names (or
+    indexes) prefix each command's console lines and, with `log_dir`, name
+    its `<name>.log` file. Other arguments are passed to `run_command`.
+    """
+    named = commands if isinstance(commands, dict) else {str(index): cmd for index, cmd in enumerate(commands)}
+
+    def run(item):
+        name, command = item
+        log_file = Path(log_dir, f"{name}.log") if log_dir else None
+        return run_command(command, prefix=f"[{name}] ", log_file=log_file, **kwargs)
+
+    if log_dir:
+        Path(log_dir).mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(run, named.items()))
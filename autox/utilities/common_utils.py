@@ -4,39 +4,27 @@ import random
 import string
 import subprocess
 
+from autox.utilities.command_runner import DEFAULT_TIMEOUT, run_command
+from autox.utilities.log_scanner import ERROR_PATTERNS, scan_log_file
 
-def execute_command(command):
+
+def execute_command(command, timeout=DEFAULT_TIMEOUT):
     try:
         process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        out, err = process.communicate(timeout=600)
+        out, err = process.communicate(timeout=timeout)
     except subprocess.TimeoutExpired:
         process.kill()
         out, err = process.communicate()
     return out.decode("utf-8"), err.decode("utf-8")
 
 
-def execute_command_realtime(command):
-    """Runs a command locally with real-time output."""
-    if isinstance(command, list):
-        cmd = command
-        shell = False
-    else:
-        cmd = command
-        shell = True
+def execute_command_realtime(command, env=None, timeout=DEFAULT_TIMEOUT):
+    """Runs a command locally with real-time output, optionally with its own environment.
 
-    try:
-        process = subprocess.Popen(
-            cmd,
-            shell=shell,
-            stdout=None,  # Inherit parent's stdout
-            stderr=None,  # Inherit parent's stderr
-        )
-        process.communicate(timeout=600)
-        return process.returncode
-    except subprocess.TimeoutExpired:
-        process.kill()
-        print("Command timed out after 600 seconds.")
-        return -1
+    See `autox.utilities.command_runner.run_command` to also capture the
+    output, prefix it, or get the duration and peak memory of the command.
+    """
+    return run_command(command, timeout=timeout, env=env).exit_code
 
 
 def generate_random_id():
@@ -49,21 +37,18 @@ def get_current_timestamp():
     return ct
 
 
-def scan_logs_for_pattern(log_file_path):
-    ERROR_PATTERNS = ["Unexpected number", "fail to delete"]
-    # WARNING_PATTERNS = [
-    #     "Unable to send metrics packet"
-    # ]
+def scan_logs_for_pattern(log_file_path, patterns=ERROR_PATTERNS):
+    """Return the first line of the log file matching any of `patterns`, or False.
+
+    The whole file is streamed in chunks; use `autox.utilities.log_scanner.scan_log_files`
+    to get every match with line numbers, per-pattern counts and rotated/gzip'd files.
+    """
     try:
-        with open(log_file_path, "r") as log_file:
-            log_line = log_file.readline()
-            for error_pattern in ERROR_PATTERNS:
-                if error_pattern in log_line:
-                    return log_line
-        return False
+        result = scan_log_file(log_file_path, patterns)
     except FileNotFoundError:
         print(f"Log file {log_file_path} not found.")
         return False
+    return result.matches[0].line if result.matches else False
 
 
 def read_data_from_file(file_path):
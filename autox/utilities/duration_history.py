@@ -0,0 +1,106 @@
+import json
+import os
+import sqlite3
+import tempfile
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from autox.autox_logger import LOG_FOLDER_NAME, REPOSITORY_ROOT, logger
+from autox.utilities.junit_util import iter_testcases
+
+HISTORY_DB_PATH = REPOSITORY_ROOT / LOG_FOLDER_NAME / "test_history.db"
+# Number of most recent runs of a test averaged into its expected duration
+HISTORY_WINDOW = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS test_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    recorded_at TEXT NOT NULL,
+    test_key TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    duration REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_test_results_key ON test_results (test_key, id);
+"""
+
+
+def _connect(db_path):
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(db_path)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def record_test_results(junit_xml_path, db_path=HISTORY_DB_PATH, run_id=None):
+    """Append every testcase of a junit XML file to the duration history.
+
+    Rows are only ever inserted, never updated, so the store doubles as an
+    outcome log. Returns the number of recorded testcases.
+    """
+    run_id = run_id or uuid.uuid4().hex
+    recorded_at = datetime.now().isoformat(timespec="seconds")
+    rows = [
+        (run_id, recorded_at, case["key"], case["outcome"], case["time"]) for case in iter_testcases(junit_xml_path)
+    ]
+    if not rows:
+        return 0
+
+    with _connect(db_path) as connection:
+        connection.executemany(
+            "INSERT INTO test_results (run_id, recorded_at, test_key, outcome, duration) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+    connection.close()
+    logger.info(f"Recorded {len(rows)} test durations from {junit_xml_path} into {db_path}")
+    return len(rows)
+
+
+def load_test_durations(db_path=HISTORY_DB_PATH, window=HISTORY_WINDOW):
+    """Return `{test_key: seconds}`, averaging the last `window` non-skipped runs of each test."""
+    if not db_path.exists():
+        return {}
+
+    with _connect(db_path) as connection:
+        rows = connection.execute(
+            """
+            SELECT test_key, AVG(duration) FROM (
+                SELECT test_key, duration,
+                       ROW_NUMBER() OVER (PARTITION BY test_key ORDER BY id DESC) AS recency
+                FROM test_results
+                WHERE outcome != 'skipped'
+            )
+            WHERE recency <= ?
+            GROUP BY test_key
+            """,
+            (window,),
+        ).fetchall()
+    connection.close()
+    logger.debug(f"Loaded duration history for {len(rows)} tests from {db_path}")
+    return dict(rows)
+
+
+def write_durations_file(path, durations):
+    """Write a `{test_key: seconds}` map as JSON, e.g. to publish it as a CI artifact for `--durations-file`."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(durations, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_durations_file(path):
+    """Return the `{test_key: seconds}` map of a file written by `write_durations_file`.
+
+    Raises ValueError if the file is not such a map.
+    """
+    durations = json.loads(Path(path).read_text())
+    if not isinstance(durations, dict) or not all(isinstance(v, (int, float)) for v in durations.values()):
+        raise ValueError(f"{path} is not a JSON object of test durations in seconds")
+    return durations
@@ -0,0 +1,287 @@
+import html
+import json
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from xml.sax.saxutils import quoteattr
+
+from autox.autox_logger import logger
+
+
+def mangle_test_address(nodeid):
+    """Convert a pytest nodeid into the (classname, name) pair pytest writes to junit XML.
+
+    Mirrors pytest's own `junitxml.mangle_test_address` so that nodeids from
+    `--collect-only` can be matched against testcases from a previous run.
+    """
+    path, open_bracket, params = nodeid.partition("[")
+    names = path.split("::")
+    names[0] = re.sub(r"\.py$", "", names[0].replace("/", "."))
+    names[-1] += open_bracket + params
+    return ".".join(names[:-1]), names[-1]
+
+
+def testcase_key(classname, name):
+    """Stable identifier for a testcase, shared by junit parsing and test collection."""
+    return f"{classname}::{name}"
+
+
+def nodeid_to_testcase_key(nodeid):
+    return testcase_key(*mangle_test_address(nodeid))
+
+
+def _iter_testcase_elements(junit_xml_path):
+    """Yield `(testsuite name, <testcase> element)` pairs while the file is parsed.
+
+    Every testcase is detached from the tree once the caller has handled it,
+    so memory stays flat however large the file is.
+    """
+    suites, parents = [], []
+    for event, element in ET.iterparse(junit_xml_path, events=("start", "end")):
+        if event == "start":
+            parents.append(element)
+            if element.tag == "testsuite":
+                suites.append(element.get("name", ""))
+            continue
+        parents.pop()
+        if element.tag == "testcase":
+            yield (suites[-1] if suites else ""), element
+            if parents:
+                parents[-1].remove(element)
+            element.clear()
+        elif element.tag == "testsuite":
+            suites.pop()
+
+
+def iter_testcases(junit_xml_path, details=False):
+    """Yield one dict per `<testcase>` in a junit XML file, streaming it.
+
+    Each dict has `classname`, `name`, `key`, `suite`, `time` (seconds),
+    `outcome` (passed/failed/error/skipped) and `message`. With `details`
+    it also has the full failure text as `details` and the paths recorded
+    as `attachment` properties (e.g. screenshots) as `attachments`.
+    """
+    try:
+        for suite, testcase in _iter_testcase_elements(junit_xml_path):
+            classname = testcase.get("classname", "")
+            name = testcase.get("name", "")
+            outcome, message, text = "passed", "", ""
+            for tag in ("failure", "error", "skipped"):
+                child = testcase.find(tag)
+                if child is not None:
+                    outcome = "failed" if tag == "failure" else tag
+                    text = child.text or ""
+                    message = child.get("message") or text
+                    break
+            case = {
+                "classname": classname,
+                "name": name,
+                "key": testcase_key(classname, name),
+                "suite": suite,
+                "time": float(testcase.get("time") or 0.0),
+                "outcome": outcome,
+                "message": message,
+            }
+            if details:
+                case["details"] = text
+                case["attachments"] = [
+                    prop.get("value") for prop in testcase.iterfind("properties/property[@name='attachment']")
+                ]
+            yield case
+    except (FileNotFoundError, ET.ParseError) as e:
+        logger.warning(f"Unable to read junit XML '{junit_xml_path}': {e}")
+
+
+def read_test_durations(junit_xml_path):
+    """Return a `{testcase_key: seconds}` map from a junit XML file (empty if missing)."""
+    return {case["key"]: case["time"] for case in iter_testcases(junit_xml_path)}
+
+
+def _iter_suite_events(junit_xml_path):
+    """Stream the top-level testsuites of a junit XML file as `("start" | "child" | "end", element)` events.
+
+    A `<testsuites>` root is unwrapped. `child` elements (testcases,
+    properties, output) are detached once handled, so only one of them is
+    held in memory at a time.
+    """
+    parents, suite_depth = [], None
+    for event, element in ET.iterparse(junit_xml_path, events=("start", "end")):
+        if event == "start":
+            if suite_depth is None:
+                suite_depth = 0 if element.tag == "testsuite" else 1
+            if len(parents) == suite_depth and element.tag == "testsuite":
+                yield "start", element
+            parents.append(element)
+            continue
+        parents.pop()
+        if len(parents) == suite_depth and element.tag == "testsuite":
+            yield "end", element
+            element.clear()
+        elif len(parents) == suite_depth + 1 and parents[-1].tag == "testsuite":
+            yield "child", element
+            parents[-1].remove(element)
+            element.clear()
+
+
+def merge_junit_files(junit_xml_paths, output_path, suite_names=None):
+    """Merge several junit XML files into a single `<testsuites>` document.
+
+    Every `<testsuite>` found in the inputs is copied under one root whose
+    counters are the totals across all inputs. `suite_names`, aligned with
+    `junit_xml_paths`, renames the suites of each input (e.g. to its env).
+    The inputs are streamed twice, once for the totals and once to copy the
+    testcases, so memory does not grow with their size. Returns the output
+    path.
+    """
+    totals = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0}
+    total_time = 0.0
+    readable = []
+    for index, path in enumerate(junit_xml_paths):
+        suite_totals, suite_time = dict.fromkeys(totals, 0), 0.0
+        try:
+            for event, suite in _iter_suite_events(path):
+                if event == "start":
+                    for attr in totals:
+                        suite_totals[attr] += int(suite.get(attr) or 0)
+                    suite_time += float(suite.get("time") or 0.0)
+        except (FileNotFoundError, ET.ParseError) as e:
+            logger.warning(f"Skipping junit XML '{path}': {e}")
+            continue
+        for attr, value in suite_totals.items():
+            totals[attr] += value
+        total_time += suite_time
+        readable.append((index, path))
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as output:
+        root_attrs = {"name": "autox", **{attr: str(value) for attr, value in totals.items()}}
+        root_attrs["time"] = f"{total_time:.3f}"
+        output.write(f"<?xml version='1.0' encoding='utf-8'?>\n<testsuites{_attributes(root_attrs)}>")
+        for index, path in readable:
+            for event, element in _iter_suite_events(path):
+                if event == "start":
+                    attrs = dict(element.attrib)
+                    if suite_names:
+                        attrs["name"] = suite_names[index]
+                    output.write(f"<testsuite{_attributes(attrs)}>")
+                elif event == "child":
+                    output.write(ET.tostring(element, encoding="unicode"))
+                else:
+                    output.write("</testsuite>")
+        output.write("</testsuites>\n")
+    tmp_path.replace(output_path)
+    logger.info(f"Merged {len(junit_xml_paths)} junit XML file(s) into {output_path}")
+    return output_path
+
+
+def _attributes(attrs):
+    return "".join(f" {name}={quoteattr(value)}" for name, value in attrs.items())
+
+
+def testcase_fragment(nodeid, duration, message, details, kind="failure"):
+    """A one-testcase junit XML document for a single failed (`kind="failure"`) or errored test."""
+    classname, name = mangle_test_address(nodeid)
+    suite = ET.Element("testsuite", name="pytest", tests="1", **{f"{kind}s": "1"}, time=f"{duration:.3f}")
+    testcase = ET.SubElement(suite, "testcase", classname=classname, name=name, time=f"{duration:.3f}")
+    ET.SubElement(testcase, kind, message=message).text = details
+    return ET.tostring(suite, encoding="unicode", xml_declaration=True)
+
+
+def summarize_testcases(cases):
+    """Count outcomes of testcases and derive the pass rate (passed / non-skipped) and total duration.
+
+    `cases` may be any iterable, e.g. `iter_testcases` itself; it is consumed once.
+    """
+    counts = {"passed": 0, "failed": 0, "error": 0, "skipped": 0}
+    duration = 0.0
+    for case in cases:
+        counts[case["outcome"]] += 1
+        duration += case["time"]
+    tests = sum(counts.values())
+    executed = tests - counts["skipped"]
+    return {
+        "tests": tests,
+        **counts,
+        "pass_rate": round(counts["passed"] / executed * 100, 1) if executed else None,
+        "duration": round(duration, 3),
+    }
+
+
+def write_env_comparison(env_junit_paths, output_path, json_path=None):
+    """Render an HTML report comparing the results of one suite run against several envs.
+
+    `env_junit_paths` maps env name to its junit XML. The report has a
+    per-env summary (pass rate, counts, duration) and one row per test with
+    its outcome and duration in every env; rows whose outcome differs
+    between envs are highlighted. With `json_path` the same data is also
+    written as JSON. Returns the summary dict.
+    """
+    env_cases = {env: list(iter_testcases(path)) for env, path in env_junit_paths.items()}
+    envs = list(env_cases)
+    matrix = {}
+    for env, cases in env_cases.items():
+        for case in cases:
+            matrix.setdefault(case["key"], {})[env] = {"outcome": case["outcome"], "time": case["time"]}
+    comparison = {
+        "envs": {env: summarize_testcases(cases) for env, cases in env_cases.items()},
+        "tests": matrix,
+    }
+
+    summary_rows = "\n".join(
+        f"<tr><td>{html.escape(env)}</td><td>{s['tests']}</td><td>{s['passed']}</td><td>{s['failed']}</td>"
+        f"<td>{s['error']}</td><td>{s['skipped']}</td><td>{'-' if s['pass_rate'] is None else s['pass_rate']}%</td>"
+        f"<td>{s['duration']:.2f}</td></tr>"
+        for env, s in comparison["envs"].items()
+    )
+    test_rows = []
+    for key, results in sorted(matrix.items()):
+        outcomes = {result["outcome"] for result in results.values()}
+        cells = "".join(
+            f"<td class='{results[env]['outcome']}'>{results[env]['outcome']} ({results[env]['time']:.2f}s)</td>"
+            if env in results
+            else "<td>-</td>"
+            for env in envs
+        )
+        diverged = len(outcomes) > 1 or len(results) < len(envs)
+        test_rows.append(f"<tr{' class=diverged' if diverged else ''}><td>{html.escape(key)}</td>{cells}</tr>")
+    env_headers = "".join(f"<th>{html.escape(env)}</th>" for env in envs)
+
+    document = f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>autox env comparison</title>
+<style>
+body {{ font-family: sans-serif; }}
+table {{ border-collapse: collapse; width: 100%; margin-bottom: 1em; }}
+td, th {{ border: 1px solid #ccc; padding: 4px; text-align: left; }}
+td.passed {{ color: green; }}
+td.failed, td.error {{ color: red; }}
+td.skipped {{ color: orange; }}
+tr.diverged {{ background: #fff3cd; }}
+</style>
+</head>
+<body>
+<h1>autox env comparison</h1>
+<table>
+<tr><th>Env</th><th>Tests</th><th>Passed</th><th>Failed</th><th>Errors</th><th>Skipped</th><th>Pass rate</th>
+<th>Duration (s)</th></tr>
+{summary_rows}
+</table>
+<table>
+<tr><th>Test</th>{env_headers}</tr>
+{chr(10).join(test_rows)}
+</table>
+</body>
+</html>
+"""
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(document, encoding="utf-8")
+    if json_path:
+        Path(json_path).parent.mkdir(parents=True, exist_ok=True)
+        Path(json_path).write_text(json.dumps(comparison, indent=2))
+    logger.info(f"Wrote env comparison report: {output_path}")
+    return comparison
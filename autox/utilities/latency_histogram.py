@@ -0,0 +1,85 @@
+import csv
+import json
+import math
+from collections import Counter
+from pathlib import Path
+
+
+class LatencyHistogram:
+    """A compact HDR-style latency histogram.
+
+    Values (in microseconds) are rounded up to `significant_figures`
+    significant digits before being counted, so every reported value is
+    at most 10^(1 - significant_figures) too high (under 1% for the default
+    of 3, well below the regression thresholds it is compared against)
+    while memory only grows with the number of distinct magnitudes, not
+    with the sample count.
+    """
+
+    def __init__(self, significant_figures=3):
+        self.significant_figures = significant_figures
+        self.counts = Counter()
+        self.total = 0
+
+    def bucket(self, value_us):
+        if value_us <= 0:
+            return 0
+        step = 10 ** max(math.floor(math.log10(value_us)) - self.significant_figures + 1, 0)
+        return math.ceil(value_us / step) * step
+
+    def record(self, seconds):
+        self.counts[self.bucket(round(seconds * 1_000_000))] += 1
+        self.total += 1
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        self.total += other.total
+
+    def value_at_percentile(self, percent):
+        """Latency in microseconds at or below which `percent` of the samples fall."""
+        if not self.total:
+            return None
+        target = max(math.ceil(percent / 100 * self.total), 1)
+        seen = 0
+        for value in sorted(self.counts):
+            seen += self.counts[value]
+            if seen >= target:
+                return value
+        return max(self.counts)
+
+    def percentiles(self, points=(50, 90, 95, 99, 99.9, 100)):
+        return {f"p{point:g}": self.value_at_percentile(point) for point in points}
+
+    def rows(self):
+        """Yield (value_us, count, cumulative_count, percentile) per bucket, lowest first."""
+        seen = 0
+        for value in sorted(self.counts):
+            seen += self.counts[value]
+            yield value, self.counts[value], seen, round(seen / self.total * 100, 4)
+
+    def to_dict(self):
+        return {
+            "unit": "us",
+            "significant_figures": self.significant_figures,
+            "total": self.total,
+            "percentiles": self.percentiles(),
+            "buckets": [
+                {"value": value, "count": count, "cumulative": cumulative, "percentile": percentile}
+                for value, count, cumulative, percentile in self.rows()
+            ],
+        }
+
+    def write_json(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2))
+        return path
+
+    def write_csv(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["value_us", "count", "cumulative_count", "percentile"])
+            writer.writerows(self.rows())
+        return path
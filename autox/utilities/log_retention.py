@@ -0,0 +1,137 @@
+import fcntl
+import gzip
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from autox.utilities.structured_log import LOG_INDEX_DB_NAME, forget_log_directories
+
+RUN_DIR_PREFIX = "run-"
+# A run directory nothing was written to for this long is considered finished and may be compressed
+COMPRESS_IDLE_SECONDS = 3600
+# Every process writing to a run holds a shared lock on this file until it exits
+RUN_LOCK_FILE_NAME = ".lock"
+
+# Run directories this process holds the lock of, with the open lock files
+_held_run_locks = {}
+
+
+def hold_run_lock(run_dir):
+    """Hold a shared lock on `run_dir` for the rest of this process, marking the run as in use."""
+    run_dir = Path(run_dir).resolve()
+    if run_dir in _held_run_locks:
+        return
+    lock_file = open(run_dir / RUN_LOCK_FILE_NAME, "a")
+    fcntl.flock(lock_file, fcntl.LOCK_SH)
+    _held_run_locks[run_dir] = lock_file
+
+
+def run_in_use(run_dir):
+    """Whether a live process still holds the lock of `run_dir`, e.g. a worker idle for hours."""
+    lock_path = Path(run_dir) / RUN_LOCK_FILE_NAME
+    if not lock_path.exists():
+        return False
+    with open(lock_path, "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    return False
+
+
+def run_directories(log_root):
+    """The `run-<timestamp>` directories under `log_root`, oldest first."""
+    log_root = Path(log_root)
+    if not log_root.is_dir():
+        return []
+    return sorted(p for p in log_root.iterdir() if p.is_dir() and p.name.startswith(RUN_DIR_PREFIX))
+
+
+def _files(run_dir):
+    return [p for p in run_dir.rglob("*") if p.is_file() and p.name != RUN_LOCK_FILE_NAME]
+
+
+def _last_modified(run_dir):
+    return max((p.stat().st_mtime for p in _files(run_dir)), default=run_dir.stat().st_mtime)
+
+
+def _size(run_dir):
+    return sum(p.stat().st_size for p in _files(run_dir))
+
+
+def compress_run(run_dir):
+    """Gzip every file of a finished run in place (`autox_logs.log` -> `autox_logs.log.gz`)."""
+    for path in _files(run_dir):
+        if path.suffix == ".gz":
+            continue
+        if path.name.endswith(".gz.tmp"):
+            # Left over by an interrupted compression
+            path.unlink()
+            continue
+        tmp_path = path.with_name(f"{path.name}.gz.tmp")
+        with open(path, "rb") as source, gzip.open(tmp_path, "wb") as target:
+            shutil.copyfileobj(source, target)
+        stat = path.stat()
+        gz_path = tmp_path.replace(path.with_name(f"{path.name}.gz"))
+        path.unlink()
+        # Keep the original mtime so age-based retention is unaffected
+        os.utime(gz_path, (stat.st_atime, stat.st_mtime))
+
+
+def apply_retention(log_root, max_age_days=None, max_total_bytes=None, compress=True, exclude=()):
+    """Delete, compress and trim old run directories under `log_root`.
+
+    Runs idle for more than `max_age_days` are deleted, finished runs are
+    gzipped, then the oldest runs are deleted until all runs together fit in
+    `max_total_bytes`. Directories in `exclude` (the current run) and runs a
+    live process still writes to (see `hold_run_lock`) are never touched;
+    files directly under `log_root`, such as the history databases, are
+    kept. The log index rows of deleted runs are removed with them. Returns
+    `(deleted, compressed)` lists of run directories.
+    """
+    exclude = {Path(p).resolve() for p in exclude}
+    runs = [run for run in run_directories(log_root) if run.resolve() not in exclude and not run_in_use(run)]
+    now = time.time()
+    deleted, compressed = [], []
+
+    for run in list(runs):
+        idle = now - _last_modified(run)
+        if max_age_days is not None and idle > max_age_days * 86400:
+            shutil.rmtree(run, ignore_errors=True)
+            deleted.append(run)
+            runs.remove(run)
+        elif compress and idle > COMPRESS_IDLE_SECONDS and any(p.suffix != ".gz" for p in _files(run)):
+            compress_run(run)
+            compressed.append(run)
+
+    if max_total_bytes is not None:
+        sizes = {run: _size(run) for run in runs}
+        total = sum(sizes.values())
+        for run in runs:
+            if total <= max_total_bytes:
+                break
+            shutil.rmtree(run, ignore_errors=True)
+            deleted.append(run)
+            total -= sizes[run]
+
+    forget_log_directories(Path(log_root) / LOG_INDEX_DB_NAME, deleted)
+    return deleted, compressed
+
+
+def start_log_maintenance(log_root, max_age_days=None, max_total_bytes=None, compress=True, exclude=()):
+    """Run `apply_retention` on a daemon thread so it never delays the caller."""
+
+    def maintain():
+        try:
+            apply_retention(log_root, max_age_days, max_total_bytes, compress, exclude)
+        except (OSError, sqlite3.Error):
+            # Another process may be cleaning up the same directories
+            pass
+
+    thread = threading.Thread(target=maintain, name="autox-log-maintenance", daemon=True)
+    thread.start()
+    return thread
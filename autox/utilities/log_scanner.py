@@ -0,0 +1,259 @@
+import gzip
+import hashlib
+import json
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import NamedTuple
+
+from autox.autox_logger import logger
+
+ERROR_PATTERNS = ["Unexpected number", "fail to delete"]
+# Bytes read per chunk; lines are never split across chunks
+CHUNK_SIZE = 4 * 1024 * 1024
+# Leading bytes hashed to recognise a file's content after it was renamed or compressed
+HEAD_BYTES = 4096
+
+
+class LogMatch(NamedTuple):
+    path: str
+    line_number: int
+    offset: int
+    pattern: str
+    line: str
+
+
+@dataclass
+class ScanResult:
+    """Matches of one scan plus where it stopped, so a later scan can resume there."""
+
+    matches: list = field(default_factory=list)
+    counts: Counter = field(default_factory=Counter)
+    end_offset: int = 0
+    end_line: int = 1
+
+    def extend(self, other):
+        self.matches.extend(other.matches)
+        self.counts.update(other.counts)
+
+
+def compile_patterns(patterns, regex=False):
+    """Compile all patterns into one alternation so each chunk is matched in a single pass.
+
+    Every pattern gets its own named group, which tells which one matched.
+    Literal patterns are escaped unless `regex` is True. `^` and `$` match
+    at every line, as chunks hold many lines.
+    """
+    alternatives = [f"(?P<p{index}>{p if regex else re.escape(p)})" for index, p in enumerate(patterns)]
+    return re.compile("|".join(alternatives).encode(), re.MULTILINE)
+
+
+def _open(path):
+    return gzip.open(path, "rb") if str(path).endswith(".gz") else open(path, "rb")
+
+
+def scan_log_file(
+    path,
+    patterns=ERROR_PATTERNS,
+    regex=False,
+    start_offset=0,
+    start_line=1,
+    include_partial_line=True,
+    chunk_size=CHUNK_SIZE,
+):
+    """Stream `path` from `start_offset` and return every line matching any of `patterns`.
+
+    The file is read in `chunk_size` blocks, so memory stays flat for
+    multi-GB logs. `.gz` files are decompressed on the fly (offsets then
+    refer to the decompressed stream). Line numbers are counted from
+    `start_line`, which callers resuming a previous scan pass back in
+    together with its `end_offset`. With `include_partial_line=False` a
+    trailing line without a newline is left for the next scan, since the
+    writer may not have finished it yet.
+    """
+    with _open(path) as f:
+        f.seek(start_offset)
+        return scan_stream(f, str(path), patterns, regex, start_offset, start_line, include_partial_line, chunk_size)
+
+
+def scan_stream(
+    stream,
+    name,
+    patterns=ERROR_PATTERNS,
+    regex=False,
+    start_offset=0,
+    start_line=1,
+    include_partial_line=True,
+    chunk_size=CHUNK_SIZE,
+):
+    """Scan a binary stream positioned at `start_offset`; see `scan_log_file`."""
+    compiled = compile_patterns(patterns, regex)
+    result = ScanResult(end_offset=start_offset, end_line=start_line)
+    offset, line_number = start_offset, start_line
+
+    def scan_block(block):
+        nonlocal line_number
+        position, last_line_start = 0, -1
+        for match in compiled.finditer(block):
+            line_start = block.rfind(b"\n", 0, match.start()) + 1
+            if line_start == last_line_start:
+                # One entry per line, even when several patterns match it
+                continue
+            line_number += block.count(b"\n", position, line_start)
+            position, last_line_start = line_start, line_start
+            line_end = block.find(b"\n", match.start())
+            line = block[line_start : line_end if line_end != -1 else len(block)].decode("utf-8", errors="replace")
+            pattern = patterns[int(match.lastgroup[1:])]
+            result.matches.append(LogMatch(name, line_number, offset + line_start, pattern, line))
+            result.counts[pattern] += 1
+        line_number += block.count(b"\n", position)
+
+    pending = b""
+    while chunk := stream.read(chunk_size):
+        block = pending + chunk
+        cut = block.rfind(b"\n") + 1
+        block, pending = block[:cut], block[cut:]
+        scan_block(block)
+        offset += len(block)
+
+    if pending and include_partial_line:
+        scan_block(pending)
+        offset += len(pending)
+
+    result.end_offset, result.end_line = offset, line_number
+    return result
+
+
+def expand_rotated(path):
+    """Return `path` preceded by its rotated siblings (`app.log.1`, `app.log.2.gz`, `app.log-20240101`), oldest first."""
+    path = Path(path)
+    rotated = [p for p in path.parent.glob(f"{path.name}[.-]*") if p.is_file()]
+    rotated.sort(key=lambda p: p.stat().st_mtime)
+    return [*rotated, path] if path.exists() else rotated
+
+
+def load_scan_state(state_file):
+    try:
+        return json.loads(Path(state_file).read_text())
+    except FileNotFoundError:
+        return {}
+
+
+def save_scan_state(state_file, state):
+    state_file = Path(state_file)
+    state_file.parent.mkdir(parents=True, exist_ok=True)
+    state_file.write_text(json.dumps(state, indent=2))
+
+
+def _file_key(path):
+    stat = Path(path).stat()
+    return f"{stat.st_dev}:{stat.st_ino}"
+
+
+def _head_digest(path, length):
+    with _open(path) as f:
+        return hashlib.sha1(f.read(length)).hexdigest()
+
+
+def _same_content(path, entry):
+    """Whether `path` starts with the bytes an entry was saved for."""
+    return "head" in entry and _head_digest(path, entry["head_length"]) == entry["head"]
+
+
+def _match_state(keys, state):
+    """Map each file to the saved entry it resumes from; return `(entries, unused state keys)`.
+
+    State is keyed by device and inode, so a file renamed by rotation
+    (app.log -> app.log.1) keeps its entry unless its leading bytes changed
+    (inode reused, or truncated and rewritten). A file without an entry, such
+    as app.log.1.gz compressed from app.log.1, takes over an unused entry
+    whose leading bytes it shares.
+    """
+    entries, unmatched = {}, []
+    for path, key in keys.items():
+        if key in state and _same_content(path, state[key]):
+            entries[path] = state[key]
+            continue
+        if key in state:
+            logger.info(f"{path} was replaced since the last scan, scanning from the start")
+        unmatched.append(path)
+
+    used = {keys[path] for path in entries}
+    unused = [key for key in state if key not in used]
+    for path in unmatched:
+        for key in unused:
+            if state[key].get("head_length") and _same_content(path, state[key]):
+                logger.debug(f"{path} was rotated from {state[key]['path']}, resuming at {state[key]['offset']}")
+                entries[path] = state[key]
+                unused.remove(key)
+                break
+    return entries, unused
+
+
+def scan_log_files(paths, patterns=ERROR_PATTERNS, regex=False, rotated=False, since=None, state_file=None):
+    """Scan several log files (optionally with their rotated siblings) in one call.
+
+    `since` is a byte offset applied to every file. With `state_file`, the
+    end offset and line number of each file are persisted, keyed by device
+    and inode, so the next call only reads bytes appended since, also after
+    the file was rotated to another name or compressed (see
+    `_match_state`); a file that shrank or was replaced is rescanned from
+    the start.
+    """
+    requested = {Path(p) for p in paths}
+    files = [f for p in paths for f in (expand_rotated(p) if rotated else [Path(p)])]
+    state = load_scan_state(state_file) if state_file else {}
+    keys = {}
+    for path in files:
+        try:
+            keys[path] = _file_key(path)
+        except FileNotFoundError:
+            logger.warning(f"Log file {path} not found.")
+    entries, unused = _match_state(keys, state) if state_file else ({}, [])
+    new_state = {}
+    total = ScanResult()
+
+    for path, key in keys.items():
+        offset, line = (since or 0), 1
+        entry = entries.get(path)
+        if entry:
+            offset, line = entry["offset"], entry["line"]
+            if not str(path).endswith(".gz") and Path(path).stat().st_size < offset:
+                logger.info(f"{path} shrank since the last scan, scanning from the start")
+                offset, line = 0, 1
+        # When resuming later, hold back a half-written last line of a live (non-rotated) file
+        live = path in requested and not str(path).endswith(".gz")
+        try:
+            result = scan_log_file(
+                path,
+                patterns,
+                regex,
+                start_offset=offset,
+                start_line=line,
+                include_partial_line=not (state_file and live),
+            )
+        except FileNotFoundError:
+            logger.warning(f"Log file {path} not found.")
+            continue
+        total.extend(result)
+        if state_file:
+            head_length = min(result.end_offset, HEAD_BYTES)
+            new_state[key] = {
+                "path": str(path),
+                "offset": result.end_offset,
+                "line": result.end_line,
+                "head": _head_digest(path, head_length),
+                "head_length": head_length,
+            }
+
+    if state_file:
+        # Keep the entries of other logs sharing the state file; vanished files of these logs are forgotten
+        for key in unused:
+            saved = Path(state[key].get("path", ""))
+            if key in new_state or any(saved.parent == p.parent and saved.name.startswith(p.name) for p in requested):
+                continue
+            new_state[key] = state[key]
+        save_scan_state(state_file, new_state)
+    logger.debug(f"Scanned {len(files)} log file(s): {dict(total.counts)}")
+    return total
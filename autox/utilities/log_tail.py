@@ -0,0 +1,140 @@
+import io
+import json
+import os
+import shlex
+import tempfile
+from pathlib import Path
+
+from autox.autox_logger import logger
+from autox.config import ENVIRONMENTS_DIR, EnvVars
+from autox.utilities.log_scanner import ERROR_PATTERNS, ScanResult, expand_rotated, scan_log_file, scan_stream
+
+CURSOR_FILE_NAME = "log_cursors.json"
+
+
+def cursor_file_for_env(env_name=None):
+    """Cursor file of `env_name` (default: the active env), kept next to that env's `env` file."""
+    if not env_name and (ENVIRONMENTS_DIR / "active").exists():
+        env_name = EnvVars.get_active_env()
+    return ENVIRONMENTS_DIR / (env_name or "default") / CURSOR_FILE_NAME
+
+
+class LogTail:
+    """Incrementally scan log files, remembering how far each one has been read.
+
+    For every path the cursor stores the inode and byte offset reached so
+    far, persisted per env in `env_vars/<env>/log_cursors.json`. `check`
+    only reads the bytes appended since the previous check. A changed inode
+    means the file was rotated: the rest of the old file is scanned if it
+    can still be found next to it (local files only), then the new file is
+    read from the start. A file smaller than the cursor was truncated and is
+    read from the start too. With `remote=True` the files live on the EC2
+    instance and are read through `execute_ec2_commands`.
+    """
+
+    def __init__(self, paths, patterns=ERROR_PATTERNS, regex=False, remote=False, cursor_file=None):
+        self.paths = list(paths)
+        self.patterns = list(patterns)
+        self.regex = regex
+        self.remote = remote
+        self.cursor_file = Path(cursor_file) if cursor_file else cursor_file_for_env()
+        try:
+            self.cursors = json.loads(self.cursor_file.read_text())
+        except FileNotFoundError:
+            self.cursors = {}
+        except json.JSONDecodeError as e:
+            logger.warning(f"Ignoring unreadable log cursors in {self.cursor_file}: {e}")
+            self.cursors = {}
+
+    def _key(self, path):
+        return f"{'ec2' if self.remote else 'local'}:{path}"
+
+    def _stat(self, path):
+        """Return (inode, size), or None when the file does not exist."""
+        if not self.remote:
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                return None
+            return st.st_ino, st.st_size
+
+        from autox.aws.aws_ec2_util import execute_ec2_commands
+
+        output = execute_ec2_commands(f"stat -c '%i %s' {shlex.quote(path)}")
+        if not output:
+            return None
+        inode, size = output.split()
+        return int(inode), int(size)
+
+    def _scan(self, path, start, end, line):
+        if not self.remote:
+            return scan_log_file(
+                path, self.patterns, self.regex, start_offset=start, start_line=line, include_partial_line=False
+            )
+
+        from autox.aws.aws_ec2_util import execute_ec2_commands
+
+        output = execute_ec2_commands(f"tail -c +{start + 1} {shlex.quote(path)} | head -c {end - start}")
+        stream = io.BytesIO((output or "").encode("utf-8"))
+        return scan_stream(stream, path, self.patterns, self.regex, start, line, include_partial_line=False)
+
+    def _scan_rotated_remainder(self, path, cursor):
+        if self.remote:
+            return None
+        for sibling in expand_rotated(path)[:-1]:
+            if not sibling.name.endswith(".gz") and sibling.stat().st_ino == cursor["inode"]:
+                logger.debug(f"{path} was rotated to {sibling}, scanning its remainder")
+                return scan_log_file(
+                    sibling, self.patterns, self.regex, start_offset=cursor["offset"], start_line=cursor["line"]
+                )
+        return None
+
+    def fast_forward(self):
+        """Move every cursor to the current end of its file, ignoring existing content."""
+        for path in self.paths:
+            stat = self._stat(path)
+            if stat:
+                self.cursors[self._key(path)] = {"inode": stat[0], "offset": stat[1], "line": 1}
+        self.save()
+
+    def check(self):
+        """Scan what was appended to every file since the last check and advance the cursors."""
+        total = ScanResult()
+        for path in self.paths:
+            stat = self._stat(path)
+            if stat is None:
+                logger.debug(f"Log file {path} does not exist (yet)")
+                continue
+            inode, size = stat
+            cursor = self.cursors.get(self._key(path), {"inode": inode, "offset": 0, "line": 1})
+
+            if cursor["inode"] != inode:
+                logger.info(f"{path} was rotated since the last check")
+                remainder = self._scan_rotated_remainder(path, cursor)
+                if remainder:
+                    total.extend(remainder)
+                cursor = {"inode": inode, "offset": 0, "line": 1}
+            elif size < cursor["offset"]:
+                logger.info(f"{path} was truncated since the last check")
+                cursor = {"inode": inode, "offset": 0, "line": 1}
+
+            if size > cursor["offset"]:
+                result = self._scan(path, cursor["offset"], size, cursor["line"])
+                total.extend(result)
+                cursor = {"inode": inode, "offset": result.end_offset, "line": result.end_line}
+            self.cursors[self._key(path)] = cursor
+
+        self.save()
+        return total
+
+    def save(self):
+        # Shards and env runs share the cursor file: readers see either the old or the new file, never a partial one
+        self.cursor_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cursor_file.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(json.dumps(self.cursors, indent=2))
+            os.replace(tmp_path, self.cursor_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
@@ -1,25 +1,130 @@
+import hashlib
+import json
 import os
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import NamedTuple
 
-import requests
-from jira import JIRA
+from autox.autox_logger import LOG_FOLDER_NAME, REPOSITORY_ROOT, logger
+from autox.utilities.artifact_bundle import ARCHIVE_MAX_BYTES, Artifact, ArtifactBundler
+from autox.utilities.rest_api_util import get_request
 
-from autox.aws.aws_ec2_util import get_public_ip
+SIGNATURE_DB_PATH = REPOSITORY_ROOT / LOG_FOLDER_NAME / "jira_signatures.db"
+FAILURES_FILE_NAME = "jira_failures.json"
+# Attachments uploaded at the same time over the shared client
+UPLOAD_WORKERS = 4
+SUMMARY_MAX_LENGTH = 250
+# Issue key of a signature claimed by a filer that has not created its issue yet
+PENDING_ISSUE_KEY = ""
+# A claim this old belongs to a filer that died before creating the issue, and may be taken over
+CLAIM_TIMEOUT_SECONDS = 600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS filed_issues (
+    signature TEXT PRIMARY KEY,
+    nodeid TEXT NOT NULL,
+    issue_key TEXT NOT NULL,
+    filed_at TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    occurrences INTEGER NOT NULL DEFAULT 1
+);
+"""
+
+# Parts of an error message that change between runs of the same failure. Other numbers, such as status
+# codes and expected counts, are kept: they tell different failures apart
+VOLATILE_PATTERNS = [
+    (re.compile(r"0x[0-9a-fA-F]+"), "<addr>"),
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<uuid>"),
+    (re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:?\d{2})?"), "<timestamp>"),
+    (re.compile(r"\b\d{2}:\d{2}:\d{2}(\.\d+)?\b"), "<time>"),
+    (
+        re.compile(r"\b\d+(\.\d+)?(\s?(ms|us|µs|ns|secs?|seconds?|mins?|minutes?|hours?)|s|m|h)\b"),
+        "<duration>",
+    ),
+    (re.compile(r"(localhost|\b\d{1,3}(\.\d{1,3}){3}|\]|://[^/:\s]+):\d{1,5}\b"), r"\1:<port>"),
+    (re.compile(r"\b(port[ =:]?)\d{1,5}\b", re.IGNORECASE), r"\1<port>"),
+    (re.compile(r"\b(id|\w+[_-]id)\b([ =:#]+)\d+\b", re.IGNORECASE), r"\1\2<id>"),
+    # Hex digests and object ids, and numbers long enough to be ids or epoch timestamps
+    (re.compile(r"\b(?=[0-9a-f]*\d)(?=[0-9a-f]*[a-f])[0-9a-f]{12,}\b"), "<id>"),
+    (re.compile(r"\b\d{6,}\b"), "<id>"),
+    (re.compile(r"\s+"), " "),
+]
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class Failure(NamedTuple):
+    nodeid: str
+    summary: str
+    error: str
+    attachments: tuple = ()
+    # Artifacts packed into one size-bounded archive attached to the issue
+    artifacts: tuple = ()
 
 
 def get_app_version_info():
+    from autox.aws.aws_ec2_util import get_public_ip
+
     ec2_node_url = get_public_ip()
     api_url = f"http://{ec2_node_url}:5000/v1/info"
     headers = {"Accept": "application/json"}
-    response = requests.get(api_url, headers=headers)
+    response = get_request(api_url, headers=headers)
     response_data = response.json()
     return response_data["Manifest"]["appVersion"]
 
 
+def get_jira_client(server_url, username, password):
+    """One authenticated client per server and user, shared by every call of this process."""
+    from jira import JIRA
+
+    key = (server_url, username)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = JIRA(options={"server": server_url}, basic_auth=(username, password))
+        return _clients[key]
+
+
+def normalize_error(error):
+    """Strip addresses, IDs, ports, durations and timestamps so repeated failures produce the same text."""
+    for pattern, replacement in VOLATILE_PATTERNS:
+        error = pattern.sub(replacement, error)
+    return error.strip()
+
+
+def failure_signature(nodeid, error):
+    return hashlib.sha256(f"{nodeid}\0{normalize_error(error)}".encode()).hexdigest()
+
+
+def upload_attachments(jira, attachments, max_workers=UPLOAD_WORKERS):
+    """Upload `(issue_key, path)` pairs concurrently; missing files and failed uploads are logged and skipped."""
+
+    def upload(item):
+        issue_key, path = item
+        if not os.path.isfile(path):
+            logger.warning(f"File not found: {path}")
+            return
+        try:
+            with open(path, "rb") as file:
+                jira.add_attachment(issue=issue_key, attachment=file)
+        except Exception as e:
+            logger.error(f"Unable to attach {path} to {issue_key}: {e}")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(upload, attachments))
+
+
 def create_jira_issue_with_attachment(
     server_url, username, password, project_key, summary, description, issue_type, attachment_paths
 ):
-    jira_options = {"server": server_url}
-    jira = JIRA(options=jira_options, basic_auth=(username, password))
+    jira = get_jira_client(server_url, username, password)
 
     issue_dict = {
         "project": {"key": project_key},
@@ -28,29 +133,213 @@ def create_jira_issue_with_attachment(
         "issuetype": {"name": issue_type},
         "labels": ["automated-bug"],
     }
-    issue = jira.create_issue(fields=issue_dict)
+    issue = jira.create_issue(fields=issue_dict, prefetch=False)
+    upload_attachments(jira, [(issue.key, path) for path in attachment_paths])
 
-    for path in attachment_paths:
-        if os.path.isfile(path):
-            with open(path, "rb") as file:
-                jira.add_attachment(issue=issue, attachment=file)
-        else:
-            print(f"File not found: {path}")
-
-    print(f"Issue {issue.key} created and attachments uploaded.")
+    logger.info(f"Issue {issue.key} created and attachments uploaded.")
     return issue
 
 
-# if __name__ == "__main__":
-#     SERVER_URL = "https://atlassian.net/"
-#     USERNAME = "gurursprasad@gmail.com"
-#     PASSWORD = "jkfdhsjkjfds"  # Use API token instead of password for security
+class SignatureCache:
+    """Failure signatures already filed, with their issue key, in a local SQLite db.
+
+    Filers of concurrent shards and envs share the db: a filer `claim`s a
+    signature before creating its issue, so only one of them files it.
+    """
+
+    def __init__(self, db_path=SIGNATURE_DB_PATH):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(db_path, timeout=30)
+        self.connection.executescript(SCHEMA)
+
+    def lookup(self, signature):
+        row = self.connection.execute("SELECT issue_key FROM filed_issues WHERE signature = ?", (signature,)).fetchone()
+        return row[0] if row else None
+
+    def claim(self, signature, nodeid):
+        """Reserve `signature` for this filer; returns False if it is filed or being filed by another one."""
+        now = datetime.now()
+        stale = (now - timedelta(seconds=CLAIM_TIMEOUT_SECONDS)).isoformat(timespec="seconds")
+        now = now.isoformat(timespec="seconds")
+        with self.connection:
+            # Each statement is atomic, so of two filers claiming at once exactly one changes a row
+            claimed = self.connection.execute(
+                "INSERT OR IGNORE INTO filed_issues (signature, nodeid, issue_key, filed_at, last_seen) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (signature, nodeid, PENDING_ISSUE_KEY, now, now),
+            ).rowcount
+            if not claimed:
+                claimed = self.connection.execute(
+                    "UPDATE filed_issues SET filed_at = ?, last_seen = ? "
+                    "WHERE signature = ? AND issue_key = ? AND filed_at < ?",
+                    (now, now, signature, PENDING_ISSUE_KEY, stale),
+                ).rowcount
+        return bool(claimed)
+
+    def release(self, signature):
+        """Give up the claim on `signature`, so a later run files it."""
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM filed_issues WHERE signature = ? AND issue_key = ?", (signature, PENDING_ISSUE_KEY)
+            )
+
+    def record(self, signature, nodeid, issue_key):
+        now = datetime.now().isoformat(timespec="seconds")
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO filed_issues (signature, nodeid, issue_key, filed_at, last_seen) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (signature) DO UPDATE SET issue_key = excluded.issue_key, filed_at = excluded.filed_at",
+                (signature, nodeid, issue_key, now, now),
+            )
+
+    def seen_again(self, signature):
+        with self.connection:
+            self.connection.execute(
+                "UPDATE filed_issues SET occurrences = occurrences + 1, last_seen = ? WHERE signature = ?",
+                (datetime.now().isoformat(timespec="seconds"), signature),
+            )
+
+    def close(self):
+        self.connection.close()
+
+
+class JiraFiler:
+    """Files one issue per distinct failure over a single client and skips failures filed before.
+
+    A failure is identified by its nodeid plus its normalized error text, so
+    the same failure across runs, concurrent shards and envs (or several
+    times in one batch) maps to one issue. Issues are created one after the
+    other and all their attachments are then uploaded concurrently, also
+    when filing some of the failures went wrong. The artifacts of each
+    issue are bundled into `bundle_dir` as one archive of at most
+    `attachment_max_bytes`.
+    """
+
+    def __init__(
+        self,
+        server_url,
+        username,
+        password,
+        project_key,
+        issue_type="Bug",
+        db_path=SIGNATURE_DB_PATH,
+        upload_workers=UPLOAD_WORKERS,
+        bundle_dir=None,
+        attachment_max_bytes=ARCHIVE_MAX_BYTES,
+    ):
+        self.server_url = server_url
+        self.username = username
+        self.password = password
+        self.project_key = project_key
+        self.issue_type = issue_type
+        self.db_path = db_path
+        self.upload_workers = upload_workers
+        self.bundle_dir = bundle_dir or Path(tempfile.gettempdir(), "autox_jira_bundles")
+        self.attachment_max_bytes = attachment_max_bytes
+
+    def file(self, failures):
+        """File `failures` and return `{nodeid: issue_key}`, including the ones filed earlier.
+
+        A failure whose issue cannot be created is logged and left unfiled,
+        so a later run tries again; the other failures are still filed.
+        Failures another filer is filing at the same time are left out.
+        """
+        cache = SignatureCache(self.db_path)
+        bundler = ArtifactBundler(self.bundle_dir, self.attachment_max_bytes)
+        filed, attachments, batch = {}, [], {}
+        try:
+            for failure in failures:
+                signature = failure_signature(failure.nodeid, failure.error)
+                if signature in batch or not cache.claim(signature, failure.nodeid):
+                    issue_key = batch.get(signature) or cache.lookup(signature)
+                    if issue_key:
+                        logger.info(f"{failure.nodeid} is already filed as {issue_key}")
+                        cache.seen_again(signature)
+                        filed[failure.nodeid] = issue_key
+                    else:
+                        logger.info(f"{failure.nodeid} is being filed by another process")
+                    continue
+
+                try:
+                    issue = self._create_issue(failure)
+                except Exception as e:
+                    logger.error(f"Unable to file {failure.nodeid}: {e}")
+                    cache.release(signature)
+                    continue
+                logger.info(f"Filed {issue.key} for {failure.nodeid}")
+                cache.record(signature, failure.nodeid, issue.key)
+                batch[signature] = filed[failure.nodeid] = issue.key
+                attachments.extend((issue.key, path) for path in failure.attachments)
+                if failure.artifacts:
+                    try:
+                        bundle = bundler.bundle(
+                            f"{issue.key}-artifacts", [Artifact(*item) for item in failure.artifacts]
+                        )
+                    except OSError as e:
+                        logger.error(f"Unable to bundle the artifacts of {issue.key}: {e}")
+                    else:
+                        attachments.append((issue.key, str(bundle)))
+
+            if attachments:
+                jira = get_jira_client(self.server_url, self.username, self.password)
+                upload_attachments(jira, attachments, self.upload_workers)
+                logger.info(f"Uploaded {len(attachments)} attachments to {len(batch)} issues")
+        finally:
+            cache.close()
+            # Blobs are only shared between the bundles of this batch
+            bundler.cleanup()
+        return filed
+
+    def _create_issue(self, failure):
+        jira = get_jira_client(self.server_url, self.username, self.password)
+        return jira.create_issue(
+            fields={
+                "project": {"key": self.project_key},
+                "summary": failure.summary[:SUMMARY_MAX_LENGTH],
+                "description": f"{failure.nodeid}\n\n{{noformat}}\n{failure.error}\n{{noformat}}",
+                "issuetype": {"name": self.issue_type},
+                "labels": ["automated-bug"],
+            },
+            prefetch=False,
+        )
+
+
+def file_failures_in_background(failures, failures_file):
+    """Write `failures` to `failures_file` and file them from a detached process that outlives the caller.
+
+    The output of the process, its log records and any traceback, goes to
+    `<failures_file>.log` next to it in the run directory.
+    """
+    failures_file.parent.mkdir(parents=True, exist_ok=True)
+    failures_file.write_text(json.dumps([failure._asdict() for failure in failures], indent=2))
+    output_file = failures_file.with_suffix(".log")
+    with open(output_file, "ab") as output:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "autox.utilities.raise_jira_ticket", str(failures_file)],
+            stdin=subprocess.DEVNULL,
+            stdout=output,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+    logger.info(f"Filing {len(failures)} failures in the background (pid {process.pid}), output in {output_file}")
+    return process
+
+
+def file_failures_from_file(failures_file):
+    from autox.config import config
 
-#     PROJECT_KEY = "X" # id: 1 # X Top Level
-#     SUMMARY = "<<Automation - Example bug summary>>"
-#     DESCRIPTION = "Detailed description of the bug."
-#     ISSUE_TYPE = "Bug"
+    failures = [Failure(**failure) for failure in json.loads(open(failures_file).read())]
+    filer = JiraFiler(
+        config.jira_url,
+        config.jira_username,
+        config.jira_api_token,
+        config.jira_project_key,
+        config.jira_issue_type,
+        bundle_dir=Path(failures_file).parent / "jira_bundles",
+        attachment_max_bytes=config.jira_attachment_max_mb * 1024 * 1024,
+    )
+    return filer.file(failures)
 
-#     ATTACHMENT_PATHS = ["/home/ubuntu/automated_tests/compute_tests/pytest/test/report.html"]
 
-#     create_jira_issue_with_attachment(SERVER_URL, USERNAME, PASSWORD, PROJECT_KEY, SUMMARY, DESCRIPTION, ISSUE_TYPE, ATTACHMENT_PATHS)
+if __name__ == "__main__":
+    file_failures_from_file(sys.argv[1])
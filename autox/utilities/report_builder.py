@@ -0,0 +1,316 @@
+import heapq
+import html
+import json
+import os
+import shutil
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from autox.autox_logger import logger
+from autox.utilities.duration_history import HISTORY_DB_PATH
+from autox.utilities.junit_util import iter_testcases, summarize_testcases
+from autox.utilities.structured_log import current_run_id
+
+HTML_REPORT = "report.html"
+SUMMARY_JSON = "results/summary.json"
+EXCEL_EXPORT = "results/test-results.xlsx"
+# Rows per page of the HTML report; only the page being viewed is loaded
+PAGE_SIZE = 500
+SLOWEST_TESTS = 20
+# Pages of each outcome, in the order the report offers them
+OUTCOMES = ("failed", "error", "skipped", "passed")
+
+PAGE_SCRIPT = """
+const pages = {};
+const state = {outcome: null, page: 1};
+
+function autoxReportPage(outcome, page, rows) {
+  pages[`${outcome}/${page}`] = rows;
+  if (outcome === state.outcome && page === state.page) render(rows);
+}
+
+function show(outcome, page) {
+  state.outcome = outcome;
+  state.page = page;
+  document.getElementById("prev").disabled = page <= 1;
+  document.getElementById("next").disabled = page >= report.pages[outcome];
+  // Outcomes without tests have no pages to load
+  if (!report.pages[outcome]) {
+    document.getElementById("page-label").textContent = `${outcome}: no tests`;
+    return render([]);
+  }
+  document.getElementById("page-label").textContent = `${outcome}: page ${page} of ${report.pages[outcome]}`;
+  const rows = pages[`${outcome}/${page}`];
+  if (rows) return render(rows);
+  // Script tags load from file:// too, unlike fetch()
+  const script = document.createElement("script");
+  script.src = `${report.dataDir}/${outcome}-${page}.js`;
+  document.head.appendChild(script);
+}
+
+function cell(row, text, className) {
+  const td = row.insertCell();
+  td.textContent = text;
+  if (className) td.className = className;
+  return td;
+}
+
+function render(rows) {
+  const body = document.getElementById("tests");
+  body.replaceChildren();
+  for (const test of rows) {
+    const row = body.insertRow();
+    row.className = "test";
+    cell(row, test.classname);
+    cell(row, test.name);
+    cell(row, test.outcome, test.outcome);
+    cell(row, test.time.toFixed(2));
+    cell(row, test.message.split("\\n")[0]);
+    row.onclick = () => toggleDetails(row, test);
+  }
+}
+
+function toggleDetails(row, test) {
+  const next = row.nextSibling;
+  if (next && next.className === "details") return next.remove();
+  const details = document.createElement("tr");
+  details.className = "details";
+  const td = details.insertCell();
+  td.colSpan = 5;
+  const pre = document.createElement("pre");
+  pre.textContent = test.details || test.message;
+  td.appendChild(pre);
+  // Artifacts are only requested once their test is expanded
+  for (const path of test.attachments) {
+    const link = document.createElement("a");
+    link.href = path;
+    if (/\\.(png|jpe?g|gif|webp)$/i.test(path)) {
+      const img = document.createElement("img");
+      img.src = path;
+      img.loading = "lazy";
+      link.appendChild(img);
+    } else {
+      link.textContent = path;
+    }
+    td.appendChild(link);
+  }
+  row.after(details);
+}
+
+document.getElementById("outcome").onchange = (event) => show(event.target.value, 1);
+document.getElementById("prev").onclick = () => show(state.outcome, state.page - 1);
+document.getElementById("next").onclick = () => show(state.outcome, state.page + 1);
+const first = OUTCOMES.find((outcome) => report.pages[outcome]);
+if (first) {
+  document.getElementById("outcome").value = first;
+  show(first, 1);
+}
+"""
+
+
+def _attachment_href(path, report_dir):
+    """Link attachments relative to the report so the report directory can be moved or served as a whole."""
+    if not path:
+        return path
+    try:
+        return Path(os.path.relpath(path, report_dir)).as_posix()
+    except ValueError:
+        return Path(path).resolve().as_uri()
+
+
+class _PageWriter:
+    """Buffers the rows of one outcome and writes them out `page_size` at a time as JSONP files."""
+
+    def __init__(self, data_dir, outcome, page_size):
+        self.data_dir = data_dir
+        self.outcome = outcome
+        self.page_size = page_size
+        self.rows = []
+        self.pages = 0
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.page_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        self.pages += 1
+        page = self.data_dir / f"{self.outcome}-{self.pages}.js"
+        page.write_text(f"autoxReportPage({json.dumps(self.outcome)}, {self.pages}, {json.dumps(self.rows)});\n")
+        self.rows = []
+
+
+def build_report(junit_xml_paths, output_path=HTML_REPORT, summary_json=SUMMARY_JSON, links=None, page_size=PAGE_SIZE):
+    """Write a paginated HTML report and a summary JSON from junit XML files in one streaming pass.
+
+    `report.html` itself only holds the summary; the testcases are written
+    per outcome (failed, error, skipped, passed) into pages of `page_size`
+    rows under `<report name>-data/`, which the page loads one at a time.
+    Failure details and attachments (testcase `attachment` properties, e.g.
+    screenshots) are only rendered when a test is expanded. `links` lists
+    other reports (shards, pytest-html) to link from the summary. Returns
+    the summary dict.
+    """
+    output_path = Path(output_path)
+    report_dir = output_path.parent
+    data_dir = report_dir / f"{output_path.stem}-data"
+    shutil.rmtree(data_dir, ignore_errors=True)
+    data_dir.mkdir(parents=True)
+
+    writers = {outcome: _PageWriter(data_dir, outcome, page_size) for outcome in OUTCOMES}
+    suites, slowest, failures = {}, [], []
+
+    def cases():
+        for path in junit_xml_paths:
+            for case in iter_testcases(path, details=True):
+                outcome = case["outcome"]
+                suite = suites.setdefault(case["suite"], {**dict.fromkeys(OUTCOMES, 0), "duration": 0.0})
+                suite[outcome] += 1
+                suite["duration"] += case["time"]
+                entry = (case["time"], case["key"])
+                if len(slowest) < SLOWEST_TESTS:
+                    heapq.heappush(slowest, entry)
+                else:
+                    heapq.heappushpop(slowest, entry)
+                if outcome in ("failed", "error"):
+                    failures.append({"key": case["key"], "outcome": outcome, "message": case["message"].split("\n")[0]})
+                case["attachments"] = [_attachment_href(attachment, report_dir) for attachment in case["attachments"]]
+                writers[outcome].add(
+                    {
+                        field: case[field]
+                        for field in ("classname", "name", "outcome", "time", "message", "details", "attachments")
+                    }
+                )
+                yield case
+
+    # Counted while the testcases are streamed into the pages
+    totals = summarize_testcases(cases())
+    for writer in writers.values():
+        writer.flush()
+
+    summary = {
+        "run_id": current_run_id(),
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        **totals,
+        "suites": {name: {**counts, "duration": round(counts["duration"], 3)} for name, counts in suites.items()},
+        "slowest": [{"key": key, "time": time} for time, key in sorted(slowest, reverse=True)],
+        "failures": failures,
+    }
+    _write_index(output_path, summary, {outcome: writer.pages for outcome, writer in writers.items()}, data_dir, links)
+    if summary_json:
+        Path(summary_json).parent.mkdir(parents=True, exist_ok=True)
+        Path(summary_json).write_text(json.dumps(summary, indent=2))
+    logger.info(f"Wrote HTML report {output_path} ({summary['tests']} tests, {len(failures)} failed)")
+    return summary
+
+
+def _write_index(output_path, summary, pages, data_dir, links):
+    counts = ", ".join(f"{summary[outcome]} {outcome}" for outcome in OUTCOMES if summary[outcome]) or "no tests"
+    link_items = "".join(
+        f"<li><a href='{html.escape(_attachment_href(link, output_path.parent))}'>{html.escape(Path(link).name)}</a></li>"
+        for link in links or []
+    )
+    slowest_rows = "".join(
+        f"<tr><td>{html.escape(test['key'])}</td><td>{test['time']:.2f}</td></tr>" for test in summary["slowest"]
+    )
+    options = "".join(
+        f"<option value='{outcome}'{'' if pages[outcome] else ' disabled'}>{outcome} ({summary[outcome]})</option>"
+        for outcome in OUTCOMES
+    )
+    report = {"pages": pages, "dataDir": data_dir.name}
+
+    document = f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>autox test report</title>
+<style>
+body {{ font-family: sans-serif; }}
+table {{ border-collapse: collapse; width: 100%; margin-bottom: 1em; }}
+td, th {{ border: 1px solid #ccc; padding: 4px; text-align: left; vertical-align: top; }}
+pre {{ margin: 0; white-space: pre-wrap; }}
+tr.test {{ cursor: pointer; }}
+td.passed {{ color: green; }}
+td.failed, td.error {{ color: red; }}
+td.skipped {{ color: orange; }}
+tr.details img {{ max-width: 100%; display: block; }}
+</style>
+</head>
+<body>
+<h1>autox test report</h1>
+<p>Run {html.escape(summary["run_id"])}: {summary["tests"]} tests in {summary["duration"]:.1f}s: {counts}</p>
+<ul>{link_items}</ul>
+<details>
+<summary>Slowest tests</summary>
+<table><tr><th>Test</th><th>Duration (s)</th></tr>{slowest_rows}</table>
+</details>
+<p>
+<select id="outcome">{options}</select>
+<button id="prev">Previous</button> <span id="page-label"></span> <button id="next">Next</button>
+</p>
+<table>
+<thead><tr><th>Class</th><th>Test</th><th>Outcome</th><th>Duration (s)</th><th>Message</th></tr></thead>
+<tbody id="tests"></tbody>
+</table>
+<script>
+const OUTCOMES = {json.dumps(OUTCOMES)};
+const report = {json.dumps(report)};
+{PAGE_SCRIPT}
+</script>
+</body>
+</html>
+"""
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(document, encoding="utf-8")
+
+
+def export_test_results(junit_xml_paths, excel_path=EXCEL_EXPORT, history_db=HISTORY_DB_PATH):
+    """Export the testcases, per-suite totals and the per-run trend from the history db to an Excel workbook.
+
+    Sheets: `tests` (one row per testcase), `suites` and `history` (one
+    row per recorded run with its counts and duration, oldest first).
+    """
+    import pandas as pd
+
+    tests = pd.DataFrame(
+        [case for path in junit_xml_paths for case in iter_testcases(path)],
+        columns=["suite", "classname", "name", "key", "outcome", "time", "message"],
+    )
+    suites = (
+        tests.pivot_table(index="suite", columns="outcome", values="time", aggfunc="count", fill_value=0)
+        .join(tests.groupby("suite")["time"].sum().rename("duration"))
+        .reset_index()
+    )
+    history = pd.DataFrame()
+    if Path(history_db).exists():
+        with sqlite3.connect(history_db) as connection:
+            history = pd.read_sql_query(
+                """
+                SELECT run_id, MIN(recorded_at) AS recorded_at, COUNT(*) AS tests,
+                       SUM(outcome = 'passed') AS passed,
+                       SUM(outcome IN ('failed', 'error')) AS failed,
+                       SUM(outcome = 'skipped') AS skipped,
+                       ROUND(SUM(duration), 3) AS duration
+                FROM test_results
+                GROUP BY run_id
+                ORDER BY recorded_at
+                """,
+                connection,
+            )
+        connection.close()
+
+    Path(excel_path).parent.mkdir(parents=True, exist_ok=True)
+    with pd.ExcelWriter(excel_path, engine="openpyxl") as writer:
+        tests.to_excel(writer, sheet_name="tests", index=False)
+        suites.to_excel(writer, sheet_name="suites", index=False)
+        history.to_excel(writer, sheet_name="history", index=False)
+    logger.info(f"Exported {len(tests)} testcases and {len(history)} runs to {excel_path}")
+    return Path(excel_path)
+
+
+if __name__ == "__main__":
+    build_report(sys.argv[1:])
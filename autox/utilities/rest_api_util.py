@@ -1,7 +1,96 @@
+import threading
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 updated_profile_name = ""
 
+# Seconds to wait for connect/read when a call does not pass its own timeout
+DEFAULT_TIMEOUT = 30
+# Keep-alive connections kept per host
+DEFAULT_POOL_SIZE = 20
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+RETRY_STATUS_CODES = (429, 502, 503)
+# Statuses that mean the server turned the request away unprocessed, so even POST/PATCH can be resent
+NON_IDEMPOTENT_RETRY_STATUS_CODES = (429, 503)
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+class RestRetry(Retry):
+    """urllib3 `Retry` that also resends non-idempotent methods, but only on 429/503.
+
+    Idempotent methods (urllib3's default `allowed_methods`) are retried on
+    every status of `status_forcelist` and on read errors. POST/PATCH are
+    never retried after a read error or a 502, as the server may already
+    have acted on them.
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if not self._is_method_retryable(method):
+            return status_code in NON_IDEMPOTENT_RETRY_STATUS_CODES
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+class RestSession(requests.Session):
+    """A `requests.Session` with a tuned connection pool, default timeout and retries.
+
+    Connections are kept alive and reused per host (up to `pool_size`).
+    Requests answered with 429/502/503 are retried up to `retries` times with
+    exponential backoff, honouring `Retry-After`; the last response is returned
+    rather than raised. POST/PATCH are only retried on 429/503 (see `RestRetry`). Calls that pass no `timeout` (or `timeout=None`) get
+    `timeout` instead of waiting forever.
+    """
+
+    def __init__(
+        self,
+        timeout=DEFAULT_TIMEOUT,
+        pool_size=DEFAULT_POOL_SIZE,
+        retries=DEFAULT_RETRIES,
+        backoff_factor=DEFAULT_BACKOFF_FACTOR,
+    ):
+        super().__init__()
+        self.timeout = timeout
+        retry = RestRetry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().request(method, url, **kwargs)
+
+
+def get_session():
+    """Return the process-wide `RestSession` shared by the request helpers below."""
+    global _shared_session
+    if _shared_session is None:
+        with _shared_session_lock:
+            if _shared_session is None:
+                _shared_session = RestSession()
+    return _shared_session
+
+
+def get_request(api_url, params=None, timeout=None, **kwargs):
+    return get_session().get(api_url, params=params, timeout=timeout, **kwargs)
+
+
+def post_request(api_url, json_payload, timeout=None, **kwargs):
+    return get_session().post(api_url, json=json_payload, timeout=timeout, **kwargs)
+
+
+def put_request(api_url, json_payload, timeout=None, **kwargs):
+    return get_session().put(api_url, json=json_payload, timeout=timeout, **kwargs)
+
 
-def post_request(api_url, json_payload, timeout=None):
-    return requests.post(api_url, json=json_payload, timeout=None)
+def delete_request(api_url, timeout=None, **kwargs):
+    return get_session().delete(api_url, timeout=timeout, **kwargs)
@@ -0,0 +1,71 @@
+import heapq
+import subprocess
+
+from autox.autox_logger import logger
+from autox.utilities.junit_util import nodeid_to_testcase_key
+
+# Duration assumed for a test that has never been timed and when no history exists at all
+DEFAULT_TEST_DURATION = 1.0
+
+
+def collect_test_ids(test_path, extra_args=None):
+    """Return the pytest nodeids collected under `test_path`, in collection order."""
+    cmd = ["pytest", "--collect-only", "-q", *(extra_args or []), test_path]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=False)
+    if result.returncode not in (0, 5):  # 5: no tests collected
+        logger.error(f"Test collection failed for {test_path}:\n{result.stdout}{result.stderr}")
+        return []
+
+    test_ids = [line.strip() for line in result.stdout.splitlines() if "::" in line]
+    logger.debug(f"Collected {len(test_ids)} tests from {test_path}")
+    return test_ids
+
+
+def group_test_ids(test_ids):
+    """Group nodeids by test class (or by module for module-level tests).
+
+    Tests of one class share a class-scoped fixture (e.g. `setup_driver`) and
+    may depend on each other's browser state, so a class is never split
+    across shards.
+    """
+    groups = {}
+    for test_id in test_ids:
+        parts = test_id.split("[", 1)[0].split("::")
+        group = "::".join(parts[:2]) if len(parts) > 2 else parts[0]
+        groups.setdefault(group, []).append(test_id)
+    return groups
+
+
+def estimate_durations(test_ids, durations):
+    """Map each nodeid to its historical duration.
+
+    Tests without history get the mean of the known durations so that new
+    tests do not all pile onto the first shard.
+    """
+    known = [durations[key] for key in map(nodeid_to_testcase_key, test_ids) if key in durations]
+    fallback = sum(known) / len(known) if known else DEFAULT_TEST_DURATION
+    return {test_id: durations.get(nodeid_to_testcase_key(test_id), fallback) for test_id in test_ids}
+
+
+def split_into_shards(test_ids, shard_count, durations=None):
+    """Split nodeids into `shard_count` shards balanced by historical duration.
+
+    Groups are assigned greedily, longest first, to the currently least-loaded
+    shard. Returns a list of `shard_count` lists of nodeids (some may be empty
+    when there are fewer groups than shards).
+    """
+    estimates = estimate_durations(test_ids, durations or {})
+    groups = group_test_ids(test_ids)
+    group_durations = {name: sum(estimates[t] for t in members) for name, members in groups.items()}
+
+    shards = [[] for _ in range(shard_count)]
+    loads = [(0.0, index) for index in range(shard_count)]
+    heapq.heapify(loads)
+    for name in sorted(groups, key=lambda g: (-group_durations[g], g)):
+        load, index = heapq.heappop(loads)
+        shards[index].extend(groups[name])
+        heapq.heappush(loads, (load + group_durations[name], index))
+
+    for load, index in sorted(loads, key=lambda item: item[1]):
+        logger.debug(f"Shard {index}: {len(shards[index])} tests, estimated {load:.2f}s")
+    return shards
@@ -0,0 +1,234 @@
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+LOG_INDEX_DB_NAME = "log_index.db"
+# Index rows are inserted in batches of this size (and whenever the handler is flushed)
+INDEX_BATCH_SIZE = 200
+# ...or once the oldest pending row is this many seconds old, so a slow trickle of records is queryable soon
+INDEX_FLUSH_SECONDS = 2.0
+
+_run_id = None
+_context = {"nodeid": None}
+
+
+def current_run_id():
+    """Run ID shared by every process of one `autox run-tests` invocation (via AUTOX_RUN_ID)."""
+    global _run_id
+    if _run_id is None:
+        _run_id = os.environ.get("AUTOX_RUN_ID") or f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+    return _run_id
+
+
+def current_worker_id():
+    return os.environ.get("PYTEST_XDIST_WORKER") or os.environ.get("AUTOX_WORKER_ID") or "main"
+
+
+def set_log_context(**values):
+    """Set fields (e.g. `nodeid` of the running test) attached to every following record of this process."""
+    _context.update(values)
+
+
+class LogContextFilter(logging.Filter):
+    """Stamps records with the run ID, worker ID and current test nodeid when they are created."""
+
+    def filter(self, record):
+        record.run_id = current_run_id()
+        record.worker_id = current_worker_id()
+        if not hasattr(record, "nodeid"):
+            record.nodeid = _context["nodeid"]
+        return True
+
+
+class JsonLinesHandler(logging.Handler):
+    """Writes one JSON object per record and indexes it by run, test and level in a shared SQLite db.
+
+    The index stores the file and byte offset of every record, so
+    `query_logs` can pull the records of one test out of all workers' files
+    without reading them in full.
+    """
+
+    def __init__(self, path, index_db):
+        super().__init__()
+        self.path = Path(path)
+        self.index_db = index_db
+        # Opened on the first record, so nothing is created for processes that never log
+        self.stream = None
+        self.index = None
+        self._pending = []
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.stream = open(self.path, "ab")
+        self.index = sqlite3.connect(self.index_db, timeout=30, check_same_thread=False)
+        # Several pytest workers write to the same index
+        self.index.execute("PRAGMA journal_mode=WAL")
+        _create_index_table(self.index)
+
+    def emit(self, record):
+        try:
+            entry = {
+                "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+                "level": record.levelname,
+                "message": record.getMessage(),
+                "logger": record.name,
+                "file": record.filename,
+                "line": record.lineno,
+                "run_id": getattr(record, "run_id", None),
+                "worker_id": getattr(record, "worker_id", None),
+                "nodeid": getattr(record, "nodeid", None),
+                "duration": getattr(record, "duration", None),
+            }
+            if record.exc_info:
+                entry["exc_info"] = logging.Formatter().formatException(record.exc_info)
+            if self.stream is None:
+                self._open()
+            offset = self.stream.tell()
+            self.stream.write((json.dumps(entry, default=str) + "\n").encode("utf-8"))
+            self.stream.flush()
+            self._pending.append(
+                (
+                    entry["run_id"],
+                    entry["worker_id"],
+                    entry["nodeid"],
+                    record.levelno,
+                    record.created,
+                    str(self.path),
+                    offset,
+                )
+            )
+            if len(self._pending) >= INDEX_BATCH_SIZE or record.created - self._pending[0][4] >= INDEX_FLUSH_SECONDS:
+                self._write_index()
+        except Exception:
+            self.handleError(record)
+
+    def _write_index(self):
+        if self._pending:
+            with self.index:
+                self.index.executemany(
+                    "INSERT INTO log_index (run_id, worker_id, nodeid, levelno, created, path, offset) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    self._pending,
+                )
+            self._pending = []
+
+    def flush(self):
+        with self.lock:
+            if self.stream is not None:
+                self.stream.flush()
+                self._write_index()
+
+    def close(self):
+        with self.lock:
+            if self.stream is not None:
+                self._write_index()
+                self.stream.close()
+                self.index.close()
+                self.stream = None
+        super().close()
+
+
+def _create_index_table(connection):
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS log_index (
+            run_id TEXT,
+            worker_id TEXT,
+            nodeid TEXT,
+            levelno INTEGER NOT NULL,
+            created REAL NOT NULL,
+            path TEXT NOT NULL,
+            offset INTEGER NOT NULL
+        )
+        """
+    )
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_log_index_run_nodeid ON log_index (run_id, nodeid)")
+
+
+def _connect(index_db):
+    connection = sqlite3.connect(index_db)
+    _create_index_table(connection)
+    return connection
+
+
+def latest_run_id(index_db):
+    with _connect(index_db) as connection:
+        row = connection.execute("SELECT run_id FROM log_index ORDER BY created DESC LIMIT 1").fetchone()
+    connection.close()
+    return row[0] if row else None
+
+
+def forget_log_directories(index_db, directories):
+    """Delete the index rows of records stored under `directories`, e.g. run directories pruned by retention."""
+    if not directories or not Path(index_db).exists():
+        return
+    with _connect(index_db) as connection:
+        connection.executemany(
+            "DELETE FROM log_index WHERE path LIKE ? ESCAPE '\\'",
+            [(prefix,) for directory in directories for prefix in _path_prefixes(directory)],
+        )
+    connection.close()
+
+
+def _path_prefixes(directory):
+    # Paths are indexed as the handler got them, which may not be resolved
+    prefixes = set()
+    for path in {str(Path(directory)), str(Path(directory).resolve())}:
+        escaped = path.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        prefixes.add(f"{escaped}{os.sep}%")
+    return prefixes
+
+
+def query_logs(index_db, test=None, level=None, run_id=None, limit=None):
+    """Return the JSON records of `run_id` (default: the latest run), oldest first.
+
+    `test` matches any part of the nodeid, `level` is a minimum level name.
+    Records are located through the index and read by offset, also from
+    files that log retention has gzipped since. Records of files deleted
+    outside of log retention are skipped.
+    """
+    run_id = run_id or latest_run_id(index_db)
+    sql = "SELECT path, offset FROM log_index WHERE run_id = ?"
+    params = [run_id]
+    if test:
+        sql += " AND nodeid LIKE ?"
+        params.append(f"%{test}%")
+    if level:
+        sql += " AND levelno >= ?"
+        params.append(logging.getLevelName(level.upper()))
+    sql += " ORDER BY created"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    with _connect(index_db) as connection:
+        rows = connection.execute(sql, params).fetchall()
+    connection.close()
+
+    records, files = [], {}
+    try:
+        for path, offset in rows:
+            if path not in files:
+                files[path] = _open_log_file(path)
+            if files[path] is None:
+                continue
+            files[path].seek(offset)
+            records.append(json.loads(files[path].readline()))
+    finally:
+        for f in files.values():
+            if f is not None:
+                f.close()
+    return records
+
+
+def _open_log_file(path):
+    if Path(path).exists():
+        return open(path, "rb")
+    if Path(f"{path}.gz").exists():
+        return gzip.open(f"{path}.gz", "rb")
+    return None
@@ -0,0 +1,134 @@
+import queue
+import threading
+import time
+
+from selenium.common.exceptions import WebDriverException
+
+from autox.autox_logger import logger
+
+POOL_POLL_INTERVAL = 0.5
+
+
+class WebDriverPool:
+    """A bounded pool of warm browser sessions.
+
+    Sessions are created lazily through `factory` (a zero-argument callable
+    returning a WebDriver) up to `size`. Instead of quitting a browser when a
+    test class is done with it, `release` resets its state (extra windows,
+    cookies, local/session storage) and navigates back to `home_url` so the
+    next class gets a clean but already running browser. Sessions that fail
+    the health check are quit and replaced.
+    """
+
+    def __init__(self, factory, size=1, home_url=None):
+        if size < 1:
+            raise ValueError("WebDriverPool size must be at least 1")
+        self.factory = factory
+        self.size = size
+        self.home_url = home_url
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Return a healthy session, creating one if the pool is not full yet.
+
+        Blocks up to `timeout` seconds (forever when None) when all `size`
+        sessions are in use.
+        """
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = self._create_or_wait(timeout)
+
+            if self.is_healthy(driver):
+                return driver
+            logger.warning("Discarding unhealthy browser session from the pool")
+            self._discard(driver)
+
+    def release(self, driver):
+        """Reset a session and return it to the pool, or recycle it if it crashed."""
+        if self.is_healthy(driver) and self.reset(driver):
+            self._idle.put(driver)
+        else:
+            logger.warning("Browser session could not be reset, recycling it")
+            self._discard(driver)
+
+    def close(self):
+        """Quit every idle session. Sessions still checked out are left to their owners."""
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+    @staticmethod
+    def is_healthy(driver):
+        try:
+            # A cheap round trip that fails on a crashed or closed session
+            return driver.current_url is not None
+        except WebDriverException:
+            return False
+
+    def reset(self, driver):
+        """Bring a session back to a clean state at `home_url`. Returns False on failure."""
+        try:
+            driver.switch_to.default_content()
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+
+            # Storage is per origin, so it is cleared on the home page rather than on whatever page the test left
+            if self.home_url:
+                driver.get(self.home_url)
+            driver.delete_all_cookies()
+            try:
+                driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+            except WebDriverException:
+                # Storage is not accessible on pages like about:blank or data: URLs
+                logger.debug("Skipped clearing web storage for the current page")
+            # The home page was loaded with the old cookies and storage
+            if self.home_url:
+                driver.refresh()
+            return True
+        except WebDriverException as e:
+            logger.debug(f"Failed to reset browser session: {e}")
+            return False
+
+    def _create_or_wait(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    break
+            # Poll so that a slot freed by a discarded session is noticed too
+            try:
+                return self._idle.get(timeout=POOL_POLL_INTERVAL)
+            except queue.Empty:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError(f"No browser session became available within {timeout}s") from None
+
+        try:
+            driver = self.factory()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+        logger.info(f"Started browser session {self._created}/{self.size}")
+        if self.home_url:
+            driver.get(self.home_url)
+        driver.maximize_window()
+        return driver
+
+    def _discard(self, driver):
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+        with self._lock:
+            self._created -= 1
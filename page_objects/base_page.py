@@ -0,0 +1,192 @@
+import re
+import time
+import weakref
+
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+
+from autox.config import config
+
+# Polling starts fast so quick conditions return quickly, then backs off so slow pages are not hammered
+WAIT_POLL_INITIAL = 0.05
+WAIT_POLL_MAX = 0.5
+WAIT_POLL_BACKOFF = 2
+
+# Resolved elements per driver, shared by every page object using that driver
+_locator_caches = weakref.WeakKeyDictionary()
+
+# Text of every element matching a locator, in document order, read in one round trip
+TEXTS_SCRIPT = """
+const [by, value, perRow] = arguments;
+let nodes;
+if (by === "xpath") {
+  const result = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+  nodes = Array.from({length: result.snapshotLength}, (_, i) => result.snapshotItem(i));
+} else {
+  nodes = Array.from(document.querySelectorAll(value));
+}
+const text = (node) => (node.innerText ?? node.textContent).trim();
+return nodes.map((node) => (perRow ? Array.from(node.querySelectorAll("th, td"), text) : text(node)));
+"""
+
+
+# Values put in a selector as-is: a class name that needs no escaping, an attribute value without quotes
+_CSS_CLASS_NAME = re.compile(r"-?[A-Za-z_][A-Za-z0-9_-]*")
+_CSS_ATTRIBUTE_VALUE = re.compile(r'[^"\\\n]*')
+
+
+def _css(locator):
+    """Express a locator as XPath or CSS, the two strategies the bulk read script understands.
+
+    ID, name and class name values that would need escaping in a selector
+    raise `ValueError`, like unsupported strategies.
+    """
+    by, value = locator
+    if by in (By.XPATH, By.CSS_SELECTOR):
+        return by, value
+    if by == By.TAG_NAME:
+        return By.CSS_SELECTOR, value
+    if by == By.CLASS_NAME and _CSS_CLASS_NAME.fullmatch(value):
+        return By.CSS_SELECTOR, f".{value}"
+    if by in (By.ID, By.NAME) and _CSS_ATTRIBUTE_VALUE.fullmatch(value):
+        return By.CSS_SELECTOR, f'[{"id" if by == By.ID else "name"}="{value}"]'
+    if by in (By.ID, By.NAME, By.CLASS_NAME):
+        raise ValueError(f"Bulk reads do not support {by} locators needing CSS escapes: {value!r}")
+    raise ValueError(f"Bulk reads do not support {by} locators")
+
+
+class AdaptiveWait:
+    """Explicit wait like `WebDriverWait`, whose polling interval grows from `poll_frequency` up to `max_poll`.
+
+    The timeout defaults to `PAGE_WAIT_TIMEOUT` (10s). As with
+    `WebDriverWait`, `NoSuchElementException` and `ignored_exceptions`
+    raised by a condition count as not met yet.
+    """
+
+    def __init__(
+        self, driver, timeout=None, poll_frequency=WAIT_POLL_INITIAL, max_poll=WAIT_POLL_MAX, ignored_exceptions=None
+    ):
+        self.driver = driver
+        self.timeout = config.page_wait_timeout if timeout is None else timeout
+        self.poll_frequency = poll_frequency
+        self.max_poll = max_poll
+        self.ignored_exceptions = (NoSuchElementException, *(ignored_exceptions or ()))
+
+    def _poll_until(self, check, message):
+        """Call `check` until it returns `(True, value)`, sleeping a little longer after every attempt."""
+        screen = stacktrace = None
+        poll = self.poll_frequency
+        end_time = time.monotonic() + self.timeout
+        while True:
+            try:
+                done, value = check(self.driver)
+                if done:
+                    return value
+            except self.ignored_exceptions as exc:
+                screen = getattr(exc, "screen", None)
+                stacktrace = getattr(exc, "stacktrace", None)
+            if time.monotonic() > end_time:
+                break
+            time.sleep(poll)
+            poll = min(poll * WAIT_POLL_BACKOFF, self.max_poll)
+        raise TimeoutException(message, screen, stacktrace)
+
+    def until(self, method, message=""):
+        def check(driver):
+            value = method(driver)
+            return bool(value), value
+
+        return self._poll_until(check, message)
+
+    def until_not(self, method, message=""):
+        def check(driver):
+            # Like WebDriverWait, an ignored exception (e.g. the element is gone) counts as false
+            try:
+                value = method(driver)
+            except self.ignored_exceptions:
+                return True, True
+            return not value, value
+
+        return self._poll_until(check, message)
+
+
+class BasePage:
+    """Base class for page objects: central waits, cached element lookups and bulk DOM reads.
+
+    Locators are `(By, value)` tuples or XPath strings. Elements found
+    through `element` are cached per driver; the cache is cleared by
+    `open`, `back` and frame switches. `click` and `attribute` look an
+    element up again when it went stale after any other navigation (e.g. a
+    click on a link or `driver.back()`), so prefer them over calls on the
+    element `element` returns.
+    """
+
+    def __init__(self, driver, timeout=None):
+        self.driver = driver
+        self.timeout = timeout
+
+    @property
+    def _cache(self):
+        return _locator_caches.setdefault(self.driver, {})
+
+    @staticmethod
+    def _locator(locator):
+        return (By.XPATH, locator) if isinstance(locator, str) else tuple(locator)
+
+    def wait(self, timeout=None):
+        return AdaptiveWait(self.driver, self.timeout if timeout is None else timeout)
+
+    def invalidate_locators(self):
+        self._cache.clear()
+
+    def element(self, locator):
+        """Return the element at `locator`, waiting for it on the first lookup and reusing it afterwards."""
+        locator = self._locator(locator)
+        if locator not in self._cache:
+            self._cache[locator] = self.wait().until(EC.presence_of_element_located(locator))
+        return self._cache[locator]
+
+    def _retry_if_stale(self, locator, action):
+        try:
+            return action(self.element(locator))
+        except StaleElementReferenceException:
+            # The page navigated since the element was cached
+            self.invalidate_locators()
+            return action(self.element(locator))
+
+    def click(self, locator):
+        self._retry_if_stale(locator, lambda element: self.wait().until(EC.element_to_be_clickable(element)).click())
+
+    def attribute(self, locator, name):
+        return self._retry_if_stale(locator, lambda element: element.get_attribute(name))
+
+    def texts(self, locator, wait=True):
+        """Texts of all elements at `locator` in one `execute_script` call instead of one `.text` call each."""
+        locator = self._locator(locator)
+        if wait:
+            self.wait().until(EC.presence_of_all_elements_located(locator))
+        return self.driver.execute_script(TEXTS_SCRIPT, *_css(locator), False)
+
+    def table_texts(self, row_locator, wait=True):
+        """Cell texts of every row at `row_locator`, as one list per row, in one `execute_script` call."""
+        row_locator = self._locator(row_locator)
+        if wait:
+            self.wait().until(EC.presence_of_all_elements_located(row_locator))
+        return self.driver.execute_script(TEXTS_SCRIPT, *_css(row_locator), True)
+
+    def open(self, url):
+        self.invalidate_locators()
+        self.driver.get(url)
+
+    def back(self):
+        self.invalidate_locators()
+        self.driver.back()
+
+    def switch_to_frame(self, frame_reference, timeout=None):
+        self.invalidate_locators()
+        self.wait(timeout).until(EC.frame_to_be_available_and_switch_to_it(frame_reference))
+
+    def switch_to_default_content(self):
+        self.invalidate_locators()
+        self.driver.switch_to.default_content()
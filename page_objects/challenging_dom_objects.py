@@ -1,26 +1,18 @@
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
+from page_objects.base_page import BasePage
 
 
-class ChallengingDOMObjects:
-    def __init__(self, driver):
-        self.driver = driver
-
+class ChallengingDOMObjects(BasePage):
     # Locators
+    dynamic_table_rows = "//tbody//tr"
     dynamic_table_elements = "//tbody//tr//td"
     dynamic_table_element = "//td[contains(text(), {})]"
+    row_edit_link = "(//tbody//tr)[{}]//a[contains(text(), 'edit')]"
 
     def find_dynamic_table_element(self, item):
-        wait = WebDriverWait(self.driver, 10)
-        elements = wait.until(
-            EC.presence_of_all_elements_located((By.XPATH, ChallengingDOMObjects.dynamic_table_elements))
-        )
-        # actions = ActionChains(self.driver)
-
-        for element in elements:
-            if element.text == item:
-                row = element.find_element(By.XPATH, "parent::tr")
-                row.find_element(By.XPATH, "//td//a[contains(text(), 'edit')]").click()
-
-        return
+        """Click `edit` in the first row with a cell reading `item`; returns whether such a row was found."""
+        # Every cell text comes back in one round trip instead of one `.text` call per cell
+        for index, cells in enumerate(self.table_texts(ChallengingDOMObjects.dynamic_table_rows), start=1):
+            if item in cells:
+                self.click(ChallengingDOMObjects.row_edit_link.format(index))
+                return True
+        return False
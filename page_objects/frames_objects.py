@@ -1,26 +1,17 @@
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
 
+from page_objects.base_page import BasePage
 
-class FramesObjects:
-    def __init__(self, driver):
-        self.driver = driver
 
+class FramesObjects(BasePage):
     nested_frames = "//a[contains(text(), 'Nested Frames')]"
     i_frames = "//a[contains(text(), 'iFrame')]"
 
     def click_nested_frames(self):
-        wait = WebDriverWait(self.driver, 10)
-        wait.until(EC.element_to_be_clickable((By.XPATH, self.nested_frames))).click()
+        self.click(self.nested_frames)
 
     def click_i_frames(self):
-        wait = WebDriverWait(self.driver, 10)
-        wait.until(EC.element_to_be_clickable((By.XPATH, self.i_frames))).click()
-
-    def switch_to_frame(self, frame_reference):
-        wait = WebDriverWait(self.driver, 10)
-        wait.until(EC.frame_to_be_available_and_switch_to_it(frame_reference))
+        self.click(self.i_frames)
 
     def validate_frameset(self):
         # Locate the frameset element
@@ -53,22 +44,17 @@ class FramesObjects:
 
         print("Frameset validation successful")
 
-    def switch_to_default_content(self):
-        self.driver.switch_to.default_content()
-
     def validate_iframe(self):
-        # Wait for the iframe to be available
-        wait = WebDriverWait(self.driver, 10)
-        iframe = wait.until(EC.presence_of_element_located((By.ID, "mce_0_ifr")))
+        iframe = (By.ID, "mce_0_ifr")
 
-        # Validate iframe attributes
-        assert iframe.get_attribute("id") == "mce_0_ifr", "Iframe ID should be mce_0_ifr"
-        assert iframe.get_attribute("title") == "Rich Text Area", "Iframe title should be 'Rich Text Area'"
-        assert iframe.get_attribute("frameborder") == "0", "Iframe frameborder should be 0"
-        assert iframe.get_attribute("allowtransparency") == "true", "Iframe allowtransparency should be true"
+        # Validate iframe attributes; the first lookup waits for the iframe to be available
+        assert self.attribute(iframe, "id") == "mce_0_ifr", "Iframe ID should be mce_0_ifr"
+        assert self.attribute(iframe, "title") == "Rich Text Area", "Iframe title should be 'Rich Text Area'"
+        assert self.attribute(iframe, "frameborder") == "0", "Iframe frameborder should be 0"
+        assert self.attribute(iframe, "allowtransparency") == "true", "Iframe allowtransparency should be true"
 
         # Switch to the iframe
-        self.driver.switch_to.frame(iframe)
+        self.switch_to_frame(iframe)
 
         # Validate content inside the iframe
         try:
@@ -85,7 +71,7 @@ class FramesObjects:
             print(f"Error validating iframe content: {e}")
         finally:
             # Switch back to default content
-            self.driver.switch_to.default_content()
+            self.switch_to_default_content()
 
         # Validate the container div
         container = self.driver.find_element(By.CLASS_NAME, "tox-editor-container")
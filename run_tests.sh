@@ -14,10 +14,25 @@ aws eks update-kubeconfig --region "$AWS_REGION" --name "$CLUSTER_NAME"
 
 cd tests/
 
+junit_xml=results/test-results.xml
+# pytest writes no junit XML when it crashes or has nothing to run, so an existing file may be a previous run's
+junit_mtime_before=$(stat -c %y "$junit_xml" 2>/dev/null)
+
 if [ $# -eq 0 ]; then
     echo "No test files specified. Running pytest on all tests."
-    pytest -v -s --html=report.html --capture=tee-sys --self-contained-html --junitxml=results/test-results.xml
+    pytest -v -s --html=results/pytest-report.html --capture=tee-sys --junitxml=results/test-results.xml
 else
     echo "Running tests in files: $@"
-    pytest -v -s "$@" --html=report.html --capture=tee-sys --self-contained-html --junitxml=results/test-results.xml
+    pytest -v -s "$@" --html=results/pytest-report.html --capture=tee-sys --junitxml=results/test-results.xml
+fi
+exit_code=$?
+
+junit_mtime_after=$(stat -c %y "$junit_xml" 2>/dev/null)
+if [ -z "$junit_mtime_after" ] || [ "$junit_mtime_after" = "$junit_mtime_before" ]; then
+    echo "$junit_xml was not written by this run (pytest exit code $exit_code), not building the report."
+    exit $exit_code
 fi
+
+# Paginated report.html and results/summary.json built from the junit XML
+PYTHONPATH=.. python -m autox.utilities.report_builder "$junit_xml"
+exit $exit_code
@@ -1,7 +1,9 @@
 import pytest
-import requests
 import responses
 
+from autox.utilities.async_rest_util import AsyncRestClient
+from autox.utilities.rest_api_util import RestSession
+
 # @pytest.fixture(scope="session")
 # def config():
 #     with open(os.path.join(os.path.dirname(__file__), "config/config.yaml"), "r") as file:
@@ -10,12 +12,21 @@ import responses
 
 @pytest.fixture(scope="session")
 def session(config):
-    session = requests.Session()
+    # Pooled keep-alive connections, a default timeout and retries on 429/502/503
+    session = RestSession()
     session.headers.update({"Accept": "application/json"})
     session.headers.update({"Authorization": f"Bearer {config.api_key}"})
     return session
 
 
+@pytest.fixture(scope="session")
+def async_client(session):
+    # Shares the headers, auth and connection pool of the `session` fixture
+    client = AsyncRestClient(session)
+    yield client
+    client.close()
+
+
 @pytest.fixture(scope="session")
 def base_url(config):
     return config.api_url
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from autox.utilities.async_rest_util import AsyncRestClient, fire_requests
+from autox.utilities.rest_api_util import RestSession
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with StubHandler.lock:
+            StubHandler.in_flight += 1
+            StubHandler.max_in_flight = max(StubHandler.max_in_flight, StubHandler.in_flight)
+        time.sleep(0.01)
+        with StubHandler.lock:
+            StubHandler.in_flight -= 1
+
+        status = 500 if self.path == "/error" else 200
+        body = json.dumps({"status": "ok", "authorization": self.headers.get("Authorization")}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class BlockingSession:
+    """Session whose first request holds the only worker until `release` is set; later ones return at once."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            self.release.wait(timeout=10)
+        return SimpleNamespace(status_code=200)
+
+
+@pytest.fixture(scope="module")
+def stub_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def stub_client():
+    session = RestSession(retries=0)
+    session.headers.update({"Authorization": "Bearer stub-token"})
+    client = AsyncRestClient(session, concurrency=4)
+    yield client
+    client.close()
+
+
+class Test_AsyncClient:
+    @pytest.mark.asyncio
+    async def test_shares_session_headers(self, stub_url, stub_client):
+        response = await stub_client.get(f"{stub_url}/health")
+        assert response.status_code == 200
+        assert response.json()["authorization"] == "Bearer stub-token"
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self, stub_url, stub_client):
+        StubHandler.max_in_flight = 0
+        result = await fire_requests(stub_client, "GET", f"{stub_url}/health", count=20)
+        assert result.count == 20
+        assert result.error_rate == 0
+        assert StubHandler.max_in_flight <= stub_client.concurrency
+
+    @pytest.mark.asyncio
+    async def test_latency_excludes_waiting_for_a_worker(self):
+        session = BlockingSession()
+        client = AsyncRestClient(session, concurrency=1)
+        try:
+            slow = asyncio.ensure_future(client.timed_request("GET", "/slow"))
+            queued = asyncio.ensure_future(client.timed_request("GET", "/fast"))
+            # The queued request waits this long for the only worker, but its own call returns at once
+            await asyncio.sleep(0.3)
+            session.release.set()
+            (slow_latency, _, _), (queued_latency, response, _) = await asyncio.gather(slow, queued)
+        finally:
+            session.release.set()
+            client.close()
+
+        assert response.status_code == 200
+        assert slow_latency > 0.2
+        assert queued_latency < 0.15
+
+    @pytest.mark.asyncio
+    async def test_fire_requests_reports_latency_and_errors(self, stub_url, stub_client, tmp_path):
+        result = await fire_requests(stub_client, "GET", f"{stub_url}/error", count=10, rate=200)
+        summary = result.summary()
+        assert summary["errors"] == 10
+        assert summary["status_codes"] == {"500": 10}
+        assert summary["latency_ms"]["p50"] <= summary["latency_ms"]["p95"] <= summary["latency_ms"]["p99"]
+        # 10 requests at 200/s are spread over at least 45ms
+        assert result.elapsed >= 0.045
+
+        artifact = result.write_artifact("stub-error", directory=tmp_path)
+        assert json.loads(artifact.read_text())["requests"] == 10
@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from autox.utilities.rest_api_util import RestSession
+
+# Statuses answered to each path in turn; the last one repeats
+RESPONSES = {
+    "/flaky": [502, 200],
+    "/busy": [503, 200],
+    "/gateway": [502],
+    "/slow": [200],
+}
+
+
+class RetryHandler(BaseHTTPRequestHandler):
+    hits = Counter()
+
+    def respond(self):
+        RetryHandler.hits[self.command, self.path] += 1
+        statuses = RESPONSES[self.path]
+        status = statuses[min(RetryHandler.hits[self.command, self.path], len(statuses)) - 1]
+        if self.path == "/slow":
+            time.sleep(0.5)
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_GET = do_POST = respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def retry_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RetryHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def session():
+    RetryHandler.hits.clear()
+    with RestSession(timeout=0.2, backoff_factor=0) as session:
+        yield session
+
+
+def test_get_is_retried_on_bad_gateway(retry_url, session):
+    assert session.get(f"{retry_url}/flaky").status_code == 200
+    assert RetryHandler.hits["GET", "/flaky"] == 2
+
+
+def test_post_is_retried_when_the_server_is_busy(retry_url, session):
+    assert session.post(f"{retry_url}/busy").status_code == 200
+    assert RetryHandler.hits["POST", "/busy"] == 2
+
+
+def test_post_is_not_resent_when_it_may_have_been_processed(retry_url, session):
+    assert session.post(f"{retry_url}/gateway").status_code == 502
+    with pytest.raises(requests.ReadTimeout):
+        session.post(f"{retry_url}/slow")
+
+    assert RetryHandler.hits["POST", "/gateway"] == 1
+    assert RetryHandler.hits["POST", "/slow"] == 1
@@ -0,0 +1,123 @@
+import os
+
+import pytest
+
+from autox.autox_logger import RUN_LOG_DIR, RUN_LOG_FILE, logger
+from autox.config import config as autox_config
+from autox.utilities.artifact_bundle import Artifact
+from autox.utilities.junit_util import testcase_fragment
+from autox.utilities.log_scanner import ERROR_PATTERNS
+from autox.utilities.log_tail import LogTail
+from autox.utilities.raise_jira_ticket import FAILURES_FILE_NAME, Failure, file_failures_in_background
+from autox.utilities.structured_log import set_log_context
+
+# Failed tests of this session, filed to Jira once it ends (JIRA_AUTO_FILE)
+_jira_failures = []
+log_offset_key = pytest.StashKey[int]()
+
+
+def _run_log_size():
+    for handler in logger.handlers:
+        handler.flush()
+    return RUN_LOG_FILE.stat().st_size if RUN_LOG_FILE.exists() else 0
+
+
+def _split(value):
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+@pytest.fixture(scope="session")
+def service_log_tail():
+    # Service logs to check after each test, e.g. SERVICE_LOG_PATHS=/var/log/app/app.log,/var/log/app/worker.log
+    paths = _split(autox_config.service_log_paths)
+    if not paths:
+        return None
+    tail = LogTail(
+        paths,
+        patterns=_split(autox_config.service_log_patterns) or ERROR_PATTERNS,
+        remote=autox_config.service_logs_remote,
+    )
+    # Only lines written while this session runs are attributed to its tests
+    tail.fast_forward()
+    return tail
+
+
+@pytest.fixture(autouse=True)
+def service_log_check(service_log_tail):
+    return service_log_tail
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    # Attribute everything logged while this test runs (setup to teardown) to its nodeid
+    set_log_context(nodeid=item.nodeid)
+    if autox_config.jira_auto_file:
+        item.stash[log_offset_key] = _run_log_size()
+    yield
+    set_log_context(nodeid=None)
+    # Index the test's structured log records now rather than with a later batch
+    for handler in logger.handlers:
+        handler.flush()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    if report.when == "call":
+        logger.debug(f"{item.nodeid} {report.outcome} in {report.duration:.3f}s", extra={"duration": report.duration})
+    if autox_config.jira_auto_file and report.failed and report.when in ("setup", "call"):
+        # The part of the run log written by this test so far; after a rotation it starts at the new file
+        start, end = item.stash.get(log_offset_key, 0), _run_log_size()
+        start = start if start <= end else 0
+        if end > start:
+            report.autox_artifacts = [
+                *getattr(report, "autox_artifacts", []),
+                Artifact("test.log", str(RUN_LOG_FILE), start, end - start),
+            ]
+    tail = item.funcargs.get("service_log_check") if hasattr(item, "funcargs") else None
+    if report.when != "call" or tail is None:
+        return
+
+    try:
+        result = tail.check()
+    except Exception as e:
+        # e.g. the EC2 instance is unreachable: the test result stands, only the log check is skipped
+        logger.warning(f"Unable to check the service logs after {item.nodeid}: {e}")
+        return
+    if not result.matches:
+        return
+    lines = "\n".join(f"{match.path} (offset {match.offset}): {match.line}" for match in result.matches)
+    if report.failed:
+        report.sections.append(("Service log matches", lines))
+    else:
+        logger.warning(f"{item.nodeid} passed but the service logs matched {dict(result.counts)}")
+
+
+def pytest_runtest_logreport(report):
+    # Under xdist the reports of all workers reach the controller, which files them once
+    if not autox_config.jira_auto_file or os.environ.get("PYTEST_XDIST_WORKER") or not report.failed:
+        return
+    if report.when == "call" or (report.when == "setup" and not report.skipped):
+        crash = getattr(report.longrepr, "reprcrash", None)
+        message = crash.message.splitlines()[0] if crash and crash.message else f"failed in {report.when}"
+        kind = "failure" if report.when == "call" else "error"
+        junit = testcase_fragment(report.nodeid, report.duration, message, report.longreprtext, kind)
+        # Custom report attributes travel from xdist workers along with the report
+        artifacts = [*getattr(report, "autox_artifacts", []), Artifact("junit.xml", text=junit)]
+        _jira_failures.append(
+            Failure(report.nodeid, f"[Automation] {report.nodeid}: {message}", report.longreprtext, artifacts=artifacts)
+        )
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_sessionfinish(session):
+    # trylast so the HTML report has been written before it is bundled
+    if not _jira_failures or os.environ.get("PYTEST_XDIST_WORKER"):
+        return
+    # Lowest priority, so they are the first left out when a bundle would exceed the attachment limit
+    shared = [Artifact(RUN_LOG_FILE.name, str(RUN_LOG_FILE))]
+    if getattr(session.config.option, "htmlpath", None):
+        shared.append(Artifact("report.html", os.path.abspath(session.config.option.htmlpath)))
+    failures = [failure._replace(artifacts=[*failure.artifacts, *shared]) for failure in _jira_failures]
+    file_failures_in_background(failures, RUN_LOG_DIR / FAILURES_FILE_NAME)
@@ -0,0 +1,69 @@
+import gzip
+import json
+import os
+import tarfile
+
+from autox.utilities.artifact_bundle import Artifact, ArtifactBundler
+
+
+def decompress(bundler, data):
+    # Members are zstd-compressed when zstandard is installed, gzipped otherwise
+    if bundler.suffix == ".zst":
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return gzip.decompress(data)
+
+
+def read_bundle(path):
+    with tarfile.open(path) as tar:
+        members = {member.name: tar.extractfile(member).read() for member in tar.getmembers()}
+    return json.loads(members.pop("manifest.json")), members
+
+
+def test_identical_artifacts_are_stored_once(tmp_path):
+    log = tmp_path / "run.log"
+    log.write_text("setup\nstep 1\nAssertionError\nteardown\n")
+    (tmp_path / "copy.log").write_bytes(log.read_bytes())
+    bundler = ArtifactBundler(tmp_path / "bundles")
+
+    bundle = bundler.bundle(
+        "QA-1",
+        [
+            Artifact("test.log", str(log), offset=6, length=22),
+            Artifact("run.log", str(log)),
+            Artifact("copy.log", str(tmp_path / "copy.log")),
+            Artifact("junit.xml", text="<testsuite/>"),
+            Artifact("screenshot.png", str(tmp_path / "missing.png")),
+        ],
+    )
+
+    manifest, members = read_bundle(bundle)
+    assert {entry["name"]: entry["status"] for entry in manifest} == {
+        "test.log": "included",
+        "run.log": "included",
+        "copy.log": "duplicate",
+        "junit.xml": "included",
+        "screenshot.png": "missing",
+    }
+    assert decompress(bundler, members[f"test.log{bundler.suffix}"]) == b"step 1\nAssertionError\n"
+    assert decompress(bundler, members[f"junit.xml{bundler.suffix}"]) == b"<testsuite/>"
+    assert f"copy.log{bundler.suffix}" not in members
+
+
+def test_bundle_stays_within_max_bytes(tmp_path):
+    small = tmp_path / "test.log"
+    small.write_text("AssertionError\n" * 100)
+    large = tmp_path / "report.html"
+    # Random bytes do not compress, so the report alone is larger than the limit
+    large.write_bytes(os.urandom(64 * 1024))
+    bundler = ArtifactBundler(tmp_path / "bundles", max_bytes=40 * 1024)
+
+    bundle = bundler.bundle("QA-2", [Artifact("test.log", str(small)), Artifact("report.html", str(large))])
+    bundler.cleanup()
+
+    assert bundle.stat().st_size <= 40 * 1024
+    manifest, members = read_bundle(bundle)
+    assert [entry["status"] for entry in manifest] == ["included", "omitted"]
+    assert list(members) == [f"test.log{bundler.suffix}"]
+    assert not (tmp_path / "bundles" / "blobs").exists()
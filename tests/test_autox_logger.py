@@ -0,0 +1,70 @@
+import logging
+import queue
+import threading
+
+import pytest
+
+from autox import autox_logger
+from autox.autox_logger import BatchingQueueListener, DroppingQueueHandler
+
+
+class BlockingHandler(logging.Handler):
+    """Holds the listener thread on its first record until released."""
+
+    def __init__(self):
+        super().__init__()
+        self.busy = threading.Event()
+        self.released = threading.Event()
+        self.messages = []
+
+    def emit(self, record):
+        self.busy.set()
+        self.released.wait()
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture
+def blocked_listener():
+    handler = BlockingHandler()
+
+    def start(maxsize, records):
+        log_queue = queue.Queue(maxsize=maxsize)
+        listener = BatchingQueueListener(log_queue, handler)
+        listener.start()
+        queue_handler = DroppingQueueHandler(log_queue)
+        for index in range(records):
+            queue_handler.handle(logging.makeLogRecord({"msg": f"debug {index}", "levelno": logging.DEBUG}))
+            if index == 0:
+                handler.busy.wait()
+        return handler, queue_handler, listener
+
+    yield start
+    handler.released.set()
+
+
+def test_low_priority_records_are_dropped_when_the_queue_is_full(blocked_listener):
+    handler, queue_handler, listener = blocked_listener(maxsize=2, records=5)
+
+    # The listener holds the first record; two more fit in the queue
+    assert queue_handler.dropped == 2
+    handler.released.set()
+    listener.stop()
+    assert handler.messages == ["debug 0", "debug 1", "debug 2"]
+
+
+def test_stop_waits_for_room_in_a_full_queue(blocked_listener):
+    handler, queue_handler, listener = blocked_listener(maxsize=1, records=2)
+
+    threading.Timer(0.05, handler.released.set).start()
+    listener.stop()
+
+    assert handler.messages == ["debug 0", "debug 1"]
+
+
+def test_stop_gives_up_on_a_stuck_listener(blocked_listener, monkeypatch):
+    monkeypatch.setattr(autox_logger, "LOG_QUEUE_STOP_TIMEOUT", 0.05)
+    handler, queue_handler, listener = blocked_listener(maxsize=1, records=2)
+
+    listener.stop()
+
+    assert handler.messages == []
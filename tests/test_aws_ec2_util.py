@@ -0,0 +1,228 @@
+import threading
+
+import paramiko
+import pytest
+from botocore.stub import Stubber
+
+from autox.aws import aws_ec2_util
+from autox.utilities import cloud_cache
+from autox.utilities.cloud_cache import MetadataCache
+
+
+class FakeChannel:
+    """A finished remote command: its output chunks are handed out in order, stdout and stderr separately."""
+
+    def __init__(self, chunks=(), exit_status=0, finished=True):
+        self.pending = {"stdout": [], "stderr": []}
+        for stream_name, chunk in chunks:
+            self.pending[stream_name].append(chunk)
+        self.exit_status = exit_status
+        self.finished = finished
+        self.closed = False
+
+    def recv_ready(self):
+        return bool(self.pending["stdout"])
+
+    def recv_stderr_ready(self):
+        return bool(self.pending["stderr"])
+
+    def recv(self, size):
+        return self.pending["stdout"].pop(0)
+
+    def recv_stderr(self, size):
+        return self.pending["stderr"].pop(0)
+
+    def exit_status_ready(self):
+        return self.finished
+
+    def recv_exit_status(self):
+        return self.exit_status
+
+    def close(self):
+        self.closed = True
+
+
+class FakeStream:
+    def __init__(self, channel=None):
+        self.channel = channel
+
+    def close(self):
+        pass
+
+
+class FakeTransport:
+    def __init__(self):
+        self.active = True
+
+    def is_active(self):
+        return self.active
+
+    def set_keepalive(self, interval):
+        pass
+
+
+class FakeSSHClient:
+    connections = []
+
+    def __init__(self):
+        self.transport = None
+        self.closed = False
+        # The transport still looks active but the connection is gone
+        self.broken = False
+
+    def set_missing_host_key_policy(self, policy):
+        pass
+
+    def connect(self, hostname, username=None, pkey=None):
+        FakeSSHClient.connections.append(hostname)
+        self.transport = FakeTransport()
+
+    def get_transport(self):
+        return self.transport
+
+    def exec_command(self, command, timeout=None):
+        if self.broken:
+            raise paramiko.SSHException("SSH session not active")
+        return f"{command} via {FakeSSHClient.connections[-1]}"
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    FakeSSHClient.connections = []
+    monkeypatch.setattr(paramiko, "SSHClient", FakeSSHClient)
+    monkeypatch.setenv("EC2_USERNAME", "ec2-user")
+    manager = aws_ec2_util.SSHConnectionManager()
+    monkeypatch.setattr(manager, "resolve_dns", lambda instance_id: f"{instance_id}.compute.amazonaws.com")
+    monkeypatch.setattr(manager, "private_key", lambda parameter_name: None)
+    metadata_cache = MetadataCache()
+    monkeypatch.setattr(aws_ec2_util, "get_metadata_cache", lambda: metadata_cache)
+    yield manager
+    manager.close_all()
+
+
+def test_transport_is_reused_per_host(manager):
+    manager.exec_command("uptime", instance_id="i-1")
+    manager.exec_command("df -h", instance_id="i-1")
+    manager.exec_command("uptime", instance_id="i-2")
+
+    assert FakeSSHClient.connections == ["i-1.compute.amazonaws.com", "i-2.compute.amazonaws.com"]
+
+
+@pytest.mark.parametrize("failure", ["inactive", "broken"])
+def test_dropped_transport_is_reconnected(manager, failure):
+    client = manager.get_client("i-1")
+    if failure == "inactive":
+        client.transport.active = False
+    else:
+        client.broken = True
+
+    assert manager.exec_command("uptime", instance_id="i-1") == "uptime via i-1.compute.amazonaws.com"
+    assert len(FakeSSHClient.connections) == 2
+    assert client.closed
+
+
+@pytest.fixture
+def fleet(monkeypatch):
+    monkeypatch.setenv("AWS_REGION", "us-east-1")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    cloud_cache.reset_cloud_clients()
+    connected = set()
+    lock = threading.Lock()
+    # i-3 cannot be reached
+    channels = {
+        "i-1": FakeChannel([("stdout", b"up 3 days\n")]),
+        "i-2": FakeChannel([("stderr", b"disk full\n")], exit_status=3),
+    }
+
+    def exec_command(command, instance_id=None, username=None, timeout=None):
+        with lock:
+            connected.add(instance_id)
+        if instance_id not in channels:
+            raise paramiko.SSHException(f"Unable to connect to {instance_id}")
+        return FakeStream(), FakeStream(channels[instance_id]), FakeStream()
+
+    monkeypatch.setattr(aws_ec2_util.connection_manager, "exec_command", exec_command)
+    with Stubber(cloud_cache.get_boto_client("ec2")) as stubber:
+        yield stubber, connected
+    cloud_cache.reset_cloud_clients()
+
+
+def test_fleet_is_resolved_once_and_every_host_reports(fleet):
+    stubber, connected = fleet
+    instances = [
+        {"InstanceId": instance_id, "PublicDnsName": f"{instance_id}.compute.amazonaws.com"}
+        for instance_id in ("i-1", "i-2", "i-3")
+    ]
+    stubber.add_response(
+        "describe_instances",
+        {"Reservations": [{"Instances": instances}]},
+        {
+            "Filters": [
+                {"Name": "tag:role", "Values": ["worker"]},
+                {"Name": "instance-state-name", "Values": ["running"]},
+            ]
+        },
+    )
+    lines = []
+
+    results = aws_ec2_util.execute_fleet_commands(
+        "uptime", tags={"role": "worker"}, on_output=lambda *line: lines.append(line)
+    )
+
+    stubber.assert_no_pending_responses()
+    assert connected == {"i-1", "i-2", "i-3"}
+    assert {instance_id: result.exit_status for instance_id, result in results.items()} == {
+        "i-1": 0,
+        "i-2": 3,
+        "i-3": -1,
+    }
+    assert results["i-3"].stderr == "Unable to connect to i-3"
+    assert sorted(lines) == [("i-1", "stdout", "up 3 days"), ("i-2", "stderr", "disk full")]
+
+
+def test_lines_are_reassembled_across_chunks():
+    channel = FakeChannel(
+        [
+            ("stdout", b"first li"),
+            ("stderr", b"warn"),
+            ("stdout", b"ne\nsecond \xc3"),
+            ("stdout", b"\xa9t\xc3\xa9\nlast"),
+        ]
+    )
+
+    assert list(aws_ec2_util.iter_channel_lines(channel)) == [
+        ("stdout", "first line"),
+        ("stdout", "second été"),
+        ("stdout", "last"),
+        ("stderr", "warn"),
+    ]
+
+
+def test_silent_command_times_out(monkeypatch):
+    monkeypatch.setattr(aws_ec2_util, "CHANNEL_POLL_INTERVAL", 0.01)
+    channel = FakeChannel(finished=False)
+
+    with pytest.raises(TimeoutError):
+        list(aws_ec2_util.iter_channel_chunks(channel, timeout=0.05))
+    assert channel.closed
+
+
+def test_output_is_streamed_to_the_sink(monkeypatch, tmp_path):
+    channel = FakeChannel([("stdout", b"step 1\nstep 2\n"), ("stderr", b"retrying\n")], exit_status=1)
+    monkeypatch.setattr(
+        aws_ec2_util.connection_manager,
+        "exec_command",
+        lambda command, instance_id=None: (FakeStream(), FakeStream(channel), FakeStream()),
+    )
+    sink = tmp_path / "remote.log"
+
+    result = aws_ec2_util.run_remote_command(
+        "deploy.sh", instance_id="i-1", on_output=lambda *line: None, sink=sink, capture=False
+    )
+
+    assert result == aws_ec2_util.RemoteCommandResult("i-1", 1, "", "")
+    assert sink.read_text() == "step 1\nstep 2\nstderr: retrying\n"
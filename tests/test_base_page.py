@@ -0,0 +1,121 @@
+import pytest
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
+from selenium.webdriver.common.by import By
+
+from page_objects import base_page
+from page_objects.base_page import AdaptiveWait, BasePage, _css
+
+
+class FakeClock:
+    """Stands in for the `time` module: sleeping advances the clock instead of waiting."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeElement:
+    def __init__(self, attributes):
+        self.attributes = attributes
+        self.stale = False
+
+    def get_attribute(self, name):
+        if self.stale:
+            raise StaleElementReferenceException("element is not attached to the page document")
+        return self.attributes.get(name)
+
+
+class FakeDriver:
+    def __init__(self):
+        self.lookups = []
+
+    def find_element(self, by, value):
+        self.lookups.append((by, value))
+        return FakeElement({"id": value})
+
+    def back(self):
+        pass
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(base_page, "time", clock)
+    return clock
+
+
+def test_polling_backs_off_up_to_the_maximum(clock):
+    attempts = []
+
+    def ready(driver):
+        attempts.append(clock.now)
+        return len(attempts) == 7 and "ready"
+
+    assert AdaptiveWait(FakeDriver(), timeout=10).until(ready) == "ready"
+    assert clock.sleeps == [0.05, 0.1, 0.2, 0.4, 0.5, 0.5]
+
+
+def test_wait_times_out_with_the_last_ignored_error(clock):
+    def missing(driver):
+        raise NoSuchElementException("no such element", stacktrace=["frame"])
+
+    with pytest.raises(TimeoutException, match="still missing") as excinfo:
+        AdaptiveWait(FakeDriver(), timeout=2).until(missing, "still missing")
+
+    assert 2 < clock.now <= 2.5
+    assert excinfo.value.stacktrace == ["frame"]
+
+
+def test_until_not_treats_ignored_errors_as_false(clock):
+    spinner_shown = iter([True, True, False])
+
+    assert AdaptiveWait(FakeDriver(), timeout=1).until_not(lambda driver: next(spinner_shown)) is False
+    assert len(clock.sleeps) == 2
+
+    def raises(driver):
+        raise NoSuchElementException("gone")
+
+    assert AdaptiveWait(FakeDriver(), timeout=1).until_not(raises) is True
+
+
+def test_elements_are_cached_until_navigation(clock):
+    driver = FakeDriver()
+    page = BasePage(driver, timeout=1)
+
+    assert page.element((By.ID, "title")) is page.element((By.ID, "title"))
+    assert len(driver.lookups) == 1
+
+    page.back()
+    page.element((By.ID, "title"))
+    assert len(driver.lookups) == 2
+    # Pages share the cache of their driver
+    BasePage(driver, timeout=1).element((By.ID, "title"))
+    assert len(driver.lookups) == 2
+
+
+def test_stale_element_is_looked_up_again(clock):
+    driver = FakeDriver()
+    page = BasePage(driver, timeout=1)
+    # Navigating without the page object, e.g. driver.back(), leaves the cached element stale
+    page.element((By.ID, "mce_0_ifr")).stale = True
+
+    assert page.attribute((By.ID, "mce_0_ifr"), "id") == "mce_0_ifr"
+    assert len(driver.lookups) == 2
+
+
+def test_locator_values_are_not_put_in_selectors_unescaped():
+    assert _css((By.ID, "main content")) == (By.CSS_SELECTOR, '[id="main content"]')
+    assert _css((By.CLASS_NAME, "tox-toolbar")) == (By.CSS_SELECTOR, ".tox-toolbar")
+    assert _css((By.XPATH, "//td")) == (By.XPATH, "//td")
+    for locator in ((By.ID, 'a"]'), (By.NAME, "a\\b"), (By.CLASS_NAME, "a b"), (By.CLASS_NAME, "1col")):
+        with pytest.raises(ValueError):
+            _css(locator)
+    with pytest.raises(ValueError):
+        _css((By.LINK_TEXT, "Home"))
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from autox.cli import bench
+from autox.utilities.bench_util import compare_to_baseline, parse_request_mix
+from autox.utilities.latency_histogram import LatencyHistogram
+
+
+def test_buckets_stay_within_one_percent():
+    histogram = LatencyHistogram()
+
+    assert [histogram.bucket(value) for value in (0, 7, 101, 1001, 123_456)] == [0, 7, 101, 1010, 124_000]
+    for value in range(1, 200_000, 7):
+        assert value <= histogram.bucket(value) < value * 1.01
+
+
+def test_percentiles_use_nearest_rank():
+    histogram = LatencyHistogram()
+    for milliseconds in range(1, 101):
+        histogram.record(milliseconds / 1000)
+
+    assert histogram.percentiles((50, 95, 100)) == {"p50": 50_000, "p95": 95_000, "p100": 100_000}
+    assert list(histogram.rows())[-1] == (100_000, 1, 100, 100.0)
+    assert LatencyHistogram().value_at_percentile(95) is None
+
+
+def test_request_mix_weights_are_separated_by_whitespace():
+    assert parse_request_mix(["GET /health 3", "get /users?id=5", "POST  /orders  2"]) == [
+        ("GET", "/health", 3),
+        ("GET", "/users?id=5", 1),
+        ("POST", "/orders", 2),
+    ]
+    for spec in ("GET", "GET health", "GET /health 0", "GET /health x", "GET /a /b 2"):
+        with pytest.raises(ValueError):
+            parse_request_mix([spec])
+
+
+@pytest.fixture
+def bench_run(tmp_path, monkeypatch):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"latency_us": {"p95": 1000}}))
+
+    def run(p95, *args):
+        async def fake_benchmark(*a, **kw):
+            return {"latency_us": {"p95": p95}}, LatencyHistogram()
+
+        monkeypatch.setattr(bench, "run_benchmark", fake_benchmark)
+        return CliRunner().invoke(
+            bench.bench_api,
+            ["--url", "http://api", "--output-dir", str(tmp_path / "out"), "--baseline", str(baseline), *args],
+        )
+
+    return baseline, run
+
+
+def test_regressed_run_fails_and_is_not_saved_as_baseline(bench_run):
+    baseline, run = bench_run
+
+    assert compare_to_baseline({"latency_us": {"p95": 1100}}, baseline)[0] is False
+    result = run(1101, "--save-baseline")
+
+    assert result.exit_code != 0
+    assert "Latency regression" in result.output
+    assert json.loads(baseline.read_text())["latency_us"]["p95"] == 1000
+
+
+def test_passing_run_is_saved_as_baseline(bench_run):
+    baseline, run = bench_run
+
+    assert run(900, "--save-baseline").exit_code == 0
+    assert json.loads(baseline.read_text())["latency_us"]["p95"] == 900
@@ -0,0 +1,40 @@
+import pytest
+
+from autox.config import ConfigMap
+from autox.utilities import chromedriver_cache
+from autox.utilities.chromedriver_cache import ChromeDriverNotCachedError, resolve_chromedriver
+
+
+@pytest.fixture
+def driver_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(chromedriver_cache, "_resolved_path", None)
+    monkeypatch.setattr(chromedriver_cache, "DRIVER_CACHE_DIR", tmp_path / ".wdm")
+    monkeypatch.setattr(chromedriver_cache, "get_chrome_version", lambda: "126.0.6478.126")
+    monkeypatch.delenv(ConfigMap.chromedriver_path.value, raising=False)
+    monkeypatch.delenv(ConfigMap.chromedriver_version.value, raising=False)
+    driver = tmp_path / "chromedriver"
+    driver.write_text("")
+    return driver
+
+
+def test_pin_matching_the_chrome_major_version_is_reused(driver_cache, monkeypatch):
+    monkeypatch.setenv(ConfigMap.chromedriver_path.value, str(driver_cache))
+    monkeypatch.setenv(ConfigMap.chromedriver_version.value, "126.0.6478.55")
+
+    assert resolve_chromedriver(offline=True) == str(driver_cache)
+
+
+def test_offline_mode_fails_on_a_stale_pin(driver_cache, monkeypatch):
+    monkeypatch.setenv(ConfigMap.chromedriver_path.value, str(driver_cache))
+    monkeypatch.setenv(ConfigMap.chromedriver_version.value, "125.0.6422.141")
+
+    with pytest.raises(ChromeDriverNotCachedError):
+        resolve_chromedriver(offline=True)
+
+
+def test_pin_written_by_another_process_is_reused(driver_cache, monkeypatch):
+    # e.g. a shard that started at the same time and downloaded the driver while this one waited for the lock
+    monkeypatch.setattr(chromedriver_cache, "_pin_in_env_file", lambda: (str(driver_cache), "126.0.6478.126"))
+
+    assert resolve_chromedriver(offline=False) == str(driver_cache)
+    assert (driver_cache.parent / ".wdm" / ".lock").exists()
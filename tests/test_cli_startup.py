@@ -0,0 +1,53 @@
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPOSITORY_ROOT = Path(__file__).resolve().parent.parent
+# Wall-clock budget for `autox --help`, interpreter start-up included
+STARTUP_BUDGET_SECONDS = 1.0
+HEAVY_MODULES = {"azure", "boto3", "dotenv", "jira", "pandas", "paramiko", "pydantic", "requests", "selenium"}
+
+RUN_HELP = """
+import json, sys
+from autox.cli.root import cli
+try:
+    cli(["--help"])
+except SystemExit:
+    pass
+print(json.dumps(sorted({name.split(".")[0] for name in sys.modules})))
+"""
+
+
+def run_help():
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", RUN_HELP], cwd=REPOSITORY_ROOT, capture_output=True, text=True, check=True
+    )
+    return time.perf_counter() - started, completed.stdout
+
+
+def test_help_does_not_import_heavy_modules():
+    _, output = run_help()
+    assert "Commands:" in output
+    assert "run-tests" in output
+    assert not HEAVY_MODULES & set(json.loads(output.splitlines()[-1]))
+
+
+def test_help_stays_within_startup_budget():
+    # Best of three, so a busy machine does not make the check flaky
+    elapsed = min(run_help()[0] for _ in range(3))
+    assert elapsed < STARTUP_BUDGET_SECONDS, f"autox --help took {elapsed:.2f}s"
+
+
+def test_log_level_option_updates_the_logger():
+    completed = subprocess.run(
+        [sys.executable, "-c", "from autox.cli.root import cli; cli(['--log-level', 'DEBUG', 'logs', '--help'])"],
+        cwd=REPOSITORY_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    assert completed.returncode == 0, completed.stderr
+    assert "Log level updated to DEBUG" in completed.stderr
+    assert "scan" in completed.stdout
@@ -0,0 +1,98 @@
+import json
+import threading
+
+import pytest
+from botocore.stub import Stubber
+
+from autox.aws import aws_ec2_util
+from autox.utilities import cloud_cache
+
+INSTANCE = {
+    "InstanceId": "i-0123456789abcdef0",
+    "PublicDnsName": "ec2-1-2-3-4.compute.amazonaws.com",
+    "PublicIpAddress": "1.2.3.4",
+    "PrivateIpAddress": "10.0.0.4",
+    "State": {"Name": "running"},
+}
+
+
+@pytest.fixture
+def ec2_stub(monkeypatch):
+    monkeypatch.setenv("AWS_REGION", "us-east-1")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("EC2_INSTANCE_ID", INSTANCE["InstanceId"])
+    cloud_cache.reset_cloud_clients()
+
+    with Stubber(cloud_cache.get_boto_client("ec2")) as stubber:
+        yield stubber
+    cloud_cache.reset_cloud_clients()
+
+
+def add_describe_response(stubber):
+    stubber.add_response(
+        "describe_instances",
+        {"Reservations": [{"Instances": [INSTANCE]}]},
+        {"InstanceIds": [INSTANCE["InstanceId"]]},
+    )
+
+
+def test_instance_is_described_once(ec2_stub):
+    add_describe_response(ec2_stub)
+
+    assert aws_ec2_util.get_public_ip() == "1.2.3.4"
+    assert aws_ec2_util.get_private_ip() == "10.0.0.4"
+    assert aws_ec2_util.connection_manager.resolve_dns(INSTANCE["InstanceId"]) == INSTANCE["PublicDnsName"]
+    ec2_stub.assert_no_pending_responses()
+
+
+def test_invalidate_forces_new_lookup(ec2_stub):
+    add_describe_response(ec2_stub)
+    add_describe_response(ec2_stub)
+
+    aws_ec2_util.get_public_ip()
+    cloud_cache.get_metadata_cache().invalidate("aws", resource=f"ec2:instance/{INSTANCE['InstanceId']}")
+    aws_ec2_util.get_public_ip()
+    ec2_stub.assert_no_pending_responses()
+
+
+def test_ttl_expiry_and_disk_layer(tmp_path):
+    cache_file = tmp_path / "cache.json"
+    loads = []
+    cache = cloud_cache.MetadataCache(ttl=60, cache_file=cache_file)
+    cache.get("aws", "us-east-1", "ec2:instance/i-1", lambda: loads.append(1) or {"ip": "1.2.3.4"})
+    cache.get("aws", "us-east-1", "ssm:parameter/key", lambda: "secret", persist=False)
+
+    # A new process reuses the persisted entry but never sees the in-memory-only one
+    reloaded = cloud_cache.MetadataCache(ttl=60, cache_file=cache_file)
+    assert reloaded.get("aws", "us-east-1", "ec2:instance/i-1") == {"ip": "1.2.3.4"}
+    assert reloaded.get("aws", "us-east-1", "ssm:parameter/key") is None
+    assert "secret" not in cache_file.read_text()
+
+    cache.set("aws", "us-east-1", "ec2:instance/i-1", {"ip": "5.6.7.8"}, ttl=-1)
+    cache.get("aws", "us-east-1", "ec2:instance/i-1", lambda: loads.append(1) or {"ip": "9.9.9.9"})
+    assert len(loads) == 2
+
+
+def test_concurrent_saves_do_not_collide(tmp_path):
+    cache_file = tmp_path / "cache.json"
+    caches = [cloud_cache.MetadataCache(ttl=60, cache_file=cache_file) for _ in range(8)]
+    errors = []
+
+    def save(index):
+        try:
+            for attempt in range(20):
+                caches[index].set("aws", "us-east-1", f"ec2:instance/i-{index}", {"attempt": attempt})
+        except OSError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save, args=(index,)) for index in range(len(caches))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    # Every save replaced the file whole: it is valid JSON and no temporary files are left behind
+    assert len(json.loads(cache_file.read_text())) == 1
+    assert [path.name for path in tmp_path.iterdir()] == ["cache.json"]
@@ -0,0 +1,91 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from autox.utilities import command_runner
+from autox.utilities.command_runner import run_command, run_commands
+
+
+def python(code):
+    return [sys.executable, "-c", code]
+
+
+def alive(pid):
+    # A killed process stays a zombie until its parent reaps it
+    try:
+        return Path(f"/proc/{pid}/stat").read_text().split(")")[-1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def test_output_is_teed_to_the_ring_buffer_and_log_file(tmp_path):
+    log_file = tmp_path / "command.log"
+
+    result = run_command(
+        python("print('one'); print('two'); print('three', end='')"),
+        echo=False,
+        log_file=log_file,
+        buffer_lines=2,
+    )
+
+    assert result.ok
+    assert result.output == ["two", "three"]
+    assert log_file.read_text() == "one\ntwo\nthree"
+
+
+def test_prefixed_lines_of_concurrent_commands_stay_whole(capsys):
+    results = run_commands({"a": python("print('alpha')"), "b": python("import sys; sys.exit(3)")})
+
+    assert [result.exit_code for result in results] == [0, 3]
+    assert capsys.readouterr().out == "[a] alpha\n"
+
+
+def test_character_split_across_chunks_is_echoed_intact(capsys):
+    code = (
+        "import sys, time; out = sys.stdout.buffer; "
+        "out.write(b'caf\\xc3'); out.flush(); time.sleep(0.2); out.write(b'\\xa9\\n'); out.flush()"
+    )
+
+    assert run_command(python(code)).output == ["café"]
+    assert capsys.readouterr().out == "café\n"
+
+
+@pytest.mark.skipif(not Path("/proc").exists(), reason="inspects processes through /proc")
+def test_timed_out_command_is_killed_with_its_children(tmp_path, monkeypatch):
+    monkeypatch.setattr(command_runner, "KILL_GRACE_PERIOD", 1)
+    pid_file = tmp_path / "pid"
+
+    result = run_command(f"sleep 30 & echo $! > {pid_file}; wait", timeout=0.5, echo=False)
+
+    assert (result.exit_code, result.timed_out) == (-1, True)
+    assert wait_until(lambda: not alive(int(pid_file.read_text())))
+
+
+@pytest.mark.skipif(not Path("/proc").exists(), reason="inspects processes through /proc")
+def test_interrupted_wait_kills_the_process_group(tmp_path, monkeypatch):
+    pid_file = tmp_path / "pid"
+    started = []
+
+    def interrupted_wait(process, timeout):
+        started.append(process)
+        assert wait_until(lambda: pid_file.exists() and pid_file.read_text().strip())
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(command_runner, "_wait", interrupted_wait)
+
+    with pytest.raises(KeyboardInterrupt):
+        run_command(f"sleep 30 & echo $! > {pid_file}; wait", echo=False)
+
+    assert started[0].returncode is not None
+    assert wait_until(lambda: not alive(int(pid_file.read_text())))
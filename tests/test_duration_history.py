@@ -0,0 +1,94 @@
+import json
+import os
+
+import click
+import pytest
+
+from autox.cli import run_tests
+from autox.utilities.duration_history import load_test_durations, record_test_results, write_durations_file
+from autox.utilities.shard_util import split_into_shards
+
+JUNIT = """<?xml version="1.0" encoding="utf-8"?>
+<testsuite name="pytest"><testcase classname="tests.test_a" name="test_one" time="{time}"/>
+<testcase classname="tests.test_a" name="test_skip" time="0"><skipped/></testcase></testsuite>
+"""
+
+
+def test_last_runs_are_averaged(tmp_path):
+    db = tmp_path / "history.db"
+    for run, time in enumerate([100, 1, 2, 3, 4, 5]):
+        (tmp_path / "junit.xml").write_text(JUNIT.format(time=time))
+        record_test_results(tmp_path / "junit.xml", db, run_id=str(run))
+
+    # The first run falls out of the window, skipped tests are left out
+    assert load_test_durations(db, window=5) == {"tests.test_a::test_one": 3.0}
+
+
+@pytest.fixture
+def serial_run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("AUTOX_RUN_ID", "test-run")
+    recorded = []
+    monkeypatch.setattr(run_tests, "load_test_durations", dict)
+    monkeypatch.setattr(run_tests, "read_test_durations", lambda path: {})
+    monkeypatch.setattr(run_tests, "build_report", lambda paths, *args, **kwargs: recorded.append(("report", paths)))
+    monkeypatch.setattr(run_tests, "record_test_results", recorded.append)
+    junit = tmp_path / run_tests.JUNIT_XML
+    junit.parent.mkdir()
+    junit.write_text(JUNIT.format(time=1))
+    # Left over from an earlier run
+    os.utime(junit, (0, 0))
+    return junit, recorded
+
+
+def test_junit_of_a_previous_run_is_not_reported_or_recorded(serial_run, monkeypatch):
+    junit, recorded = serial_run
+    monkeypatch.setattr(run_tests, "execute_command_realtime", lambda command, env=None: 2)
+
+    assert run_tests.run_pytest("tests/api_tests", []) == 2
+    assert recorded == []
+
+
+def test_junit_written_by_the_run_is_recorded(serial_run, monkeypatch):
+    junit, recorded = serial_run
+    monkeypatch.setattr(run_tests, "execute_command_realtime", lambda command, env=None: junit.touch() or 0)
+
+    assert run_tests.run_pytest("tests/api_tests", []) == 0
+    assert recorded == [("report", [run_tests.JUNIT_XML]), run_tests.JUNIT_XML]
+    assert json.loads((junit.parent / "test-durations.json").read_text()) == {}
+
+
+TEST_IDS = [f"tests/api_tests/test_{name}.py::test_{name}" for name in ("a", "b", "c", "d")]
+
+
+@pytest.fixture
+def shard_index_run(tmp_path, monkeypatch):
+    """Runs one shard of TEST_IDS on a machine whose own history says test_a takes far longer than the rest."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("AUTOX_RUN_ID", "test-run")
+    monkeypatch.setattr(run_tests, "load_test_durations", lambda: {"tests.api_tests.test_a::test_a": 100.0})
+    monkeypatch.setattr(run_tests, "collect_test_ids", lambda test_path, extra_args: TEST_IDS)
+    splits = []
+    monkeypatch.setattr(run_tests, "_run_shards", lambda shard_list, *args: splits.append(shard_list) or 0)
+
+    def run(**kwargs):
+        run_tests.run_pytest("tests/api_tests", [], shards=2, shard_index=1, **kwargs)
+        return splits.pop()
+
+    return run
+
+
+def test_shard_index_split_does_not_depend_on_the_local_history(shard_index_run):
+    assert shard_index_run() == split_into_shards(TEST_IDS, 2, {})
+    assert shard_index_run() == [[TEST_IDS[0], TEST_IDS[2]], [TEST_IDS[1], TEST_IDS[3]]]
+
+
+def test_shard_index_split_uses_the_shared_durations_file(shard_index_run, tmp_path):
+    durations = {"tests.api_tests.test_b::test_b": 9.0, "tests.api_tests.test_c::test_c": 1.0}
+    write_durations_file(tmp_path / "durations.json", durations)
+
+    assert shard_index_run(durations_file=tmp_path / "durations.json") == split_into_shards(TEST_IDS, 2, durations)
+
+    (tmp_path / "durations.json").write_text('["test_b"]')
+    with pytest.raises(click.BadParameter, match="not a JSON object"):
+        shard_index_run(durations_file=tmp_path / "durations.json")
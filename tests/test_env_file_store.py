@@ -0,0 +1,79 @@
+import os
+import threading
+
+import pytest
+
+from autox.config import EnvFileStore
+
+
+@pytest.fixture
+def env_file(tmp_path):
+    path = tmp_path / "env"
+    path.write_text("# Staging\nBASE_URL=https://staging.example\n\nTIMEOUT=10\n")
+    return path
+
+
+def test_values_are_parsed_like_dotenv(env_file):
+    env_file.write_text("export BASE_URL='https://a.example/?q=1'\nTOKEN = \"abc def\"\nDEBUG=true # on\nEMPTY\n")
+
+    assert EnvFileStore.read(env_file) == {"BASE_URL": "https://a.example/?q=1", "TOKEN": "abc def", "DEBUG": "true"}
+    assert EnvFileStore.read(env_file.with_name("missing")) == {}
+
+
+def test_file_is_parsed_once_until_it_changes(env_file, monkeypatch):
+    assert EnvFileStore.read(env_file)["TIMEOUT"] == "10"
+    monkeypatch.setattr(EnvFileStore, "_parse", lambda lines: pytest.fail("parsed again"))
+    assert EnvFileStore.read(env_file)["TIMEOUT"] == "10"
+    monkeypatch.undo()
+
+    # Edited outside autox: same size, so only the mtime tells the cached copy is stale
+    env_file.write_text(env_file.read_text().replace("TIMEOUT=10", "TIMEOUT=30"))
+    os.utime(env_file, ns=(0, 0))
+
+    assert EnvFileStore.read(env_file)["TIMEOUT"] == "30"
+
+
+def test_update_replaces_and_appends_keys_in_place(env_file):
+    EnvFileStore.update(env_file, {"TIMEOUT": "30", "RETRIES": "3"})
+
+    assert env_file.read_text() == "# Staging\nBASE_URL=https://staging.example\n\nTIMEOUT=30\nRETRIES=3\n"
+    assert EnvFileStore.read(env_file)["RETRIES"] == "3"
+
+
+def test_update_keeps_the_permissions_and_leaves_no_temp_files(env_file):
+    os.chmod(env_file, 0o640)
+
+    EnvFileStore.update(env_file, {"TIMEOUT": "30"})
+
+    assert env_file.stat().st_mode & 0o777 == 0o640
+    assert [path.name for path in env_file.parent.iterdir()] == ["env"]
+
+
+def test_failed_write_leaves_the_file_as_it_was(env_file, monkeypatch):
+    def fail(src, dst):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(os, "replace", fail)
+
+    with pytest.raises(OSError):
+        EnvFileStore.update(env_file, {"TIMEOUT": "30"})
+
+    monkeypatch.undo()
+    assert EnvFileStore.read(env_file)["TIMEOUT"] == "10"
+    assert [path.name for path in env_file.parent.iterdir()] == ["env"]
+
+
+def test_concurrent_updates_do_not_lose_keys(env_file):
+    def update(worker):
+        for i in range(20):
+            EnvFileStore.update(env_file, {f"KEY_{worker}_{i}": str(i)})
+
+    threads = [threading.Thread(target=update, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    values = EnvFileStore.read(env_file)
+    assert len(values) == 2 + 4 * 20
+    assert values["KEY_3_19"] == "19"
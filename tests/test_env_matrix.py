@@ -0,0 +1,88 @@
+import json
+
+import click
+import pytest
+
+from autox.cli import run_tests
+from autox.utilities.command_runner import CommandResult
+from autox.utilities.junit_util import write_env_comparison
+
+JUNIT = """<?xml version="1.0" encoding="utf-8"?>
+<testsuite name="pytest">
+<testcase classname="tests.test_a" name="test_login" time="1.5"/>
+<testcase classname="tests.test_a" name="test_search" time="0.5">{search}</testcase>
+</testsuite>
+"""
+
+
+def write_junit(path, search_failed=False):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(JUNIT.format(search="<failure message='boom'/>" if search_failed else ""))
+
+
+def test_envs_are_deduplicated_and_must_exist(tmp_path, monkeypatch):
+    monkeypatch.setattr(run_tests, "ENVIRONMENTS_DIR", tmp_path)
+    for env in ("staging", "perf"):
+        (tmp_path / env).mkdir()
+        (tmp_path / env / "env").write_text("")
+
+    assert run_tests.parse_envs(None, None, "staging, perf,staging,") == ["staging", "perf"]
+    assert run_tests.parse_envs(None, None, "") is None
+    with pytest.raises(click.BadParameter, match="unknown env\\(s\\): prod"):
+        run_tests.parse_envs(None, None, "staging,prod")
+
+
+def test_comparison_highlights_diverging_tests(tmp_path):
+    write_junit(tmp_path / "staging.xml")
+    write_junit(tmp_path / "perf.xml", search_failed=True)
+
+    comparison = write_env_comparison(
+        {"staging": tmp_path / "staging.xml", "perf": tmp_path / "perf.xml"},
+        tmp_path / "report.html",
+        tmp_path / "comparison.json",
+    )
+
+    assert {env: (s["passed"], s["failed"]) for env, s in comparison["envs"].items()} == {
+        "staging": (2, 0),
+        "perf": (1, 1),
+    }
+    assert comparison["tests"]["tests.test_a::test_search"] == {
+        "staging": {"outcome": "passed", "time": 0.5},
+        "perf": {"outcome": "failed", "time": 0.5},
+    }
+    assert json.loads((tmp_path / "comparison.json").read_text()) == comparison
+    report = (tmp_path / "report.html").read_text()
+    assert report.count("class=diverged") == 1
+
+
+def test_every_env_runs_with_its_own_env_and_is_not_recorded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("AUTOX_RUN_ID", "test-run")
+    monkeypatch.setattr(run_tests, "LOADED_ENV_VARS", {"BASE_URL"})
+    monkeypatch.setenv("BASE_URL", "https://active.example")
+    monkeypatch.setattr(run_tests, "record_test_results", lambda path: pytest.fail("env matrix recorded"))
+    envs_seen = {}
+
+    def fake_run_command(command, env=None, **kwargs):
+        env_name = env["AUTOX_ENV"]
+        envs_seen[env_name] = env
+        junit_xml = next(arg.split("=", 1)[1] for arg in command if arg.startswith("--junitxml="))
+        write_junit(tmp_path / junit_xml, search_failed=env_name == "perf")
+        return CommandResult(command, 1 if env_name == "perf" else 0, 0.1)
+
+    monkeypatch.setattr(run_tests, "run_command", fake_run_command)
+
+    assert run_tests.run_pytest("tests/api_tests", [], envs=["staging", "perf"]) == 1
+
+    assert {name: (env["AUTOX_WORKER_ID"], "BASE_URL" in env) for name, env in envs_seen.items()} == {
+        "staging": ("env-staging", False),
+        "perf": ("env-perf", False),
+    }
+    assert set(json.loads((tmp_path / run_tests.ENV_COMPARISON_JSON).read_text())["envs"]) == {"staging", "perf"}
+    assert (tmp_path / run_tests.JUNIT_XML).exists()
+
+
+def test_envs_cannot_be_combined_with_shards(monkeypatch):
+    monkeypatch.setenv("AUTOX_RUN_ID", "test-run")
+    with pytest.raises(click.BadParameter):
+        run_tests.run_pytest("tests/api_tests", [], workers=2, envs=["staging"])
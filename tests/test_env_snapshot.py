@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+
+import pytest
+
+from autox.helpers import env_snapshot
+from autox.helpers.env_snapshot import compile_env, load_env, snapshot_path
+
+
+@pytest.fixture
+def environments(tmp_path, monkeypatch):
+    (tmp_path / "base").mkdir()
+    (tmp_path / "base" / "env").write_text("BASE_URL=https://base.example\nTIMEOUT=10\n")
+    (tmp_path / "qa").mkdir()
+    (tmp_path / "qa" / "env").write_text("AUTOX_EXTENDS=base\nTIMEOUT=30\n")
+    os.chmod(tmp_path / "qa" / "env", 0o640)
+    # Recorded by setenv, so the values load_env sets are undone after the test
+    for key in ("BASE_URL", "TIMEOUT"):
+        monkeypatch.setenv(key, "")
+        monkeypatch.delenv(key)
+    return tmp_path
+
+
+def test_layers_are_merged_base_first(environments):
+    snapshot = compile_env(environments, "qa")
+
+    assert snapshot["values"] == {"BASE_URL": "https://base.example", "TIMEOUT": "30"}
+    assert snapshot["sources"] == ["base/env", "qa/env"]
+    assert json.loads(snapshot_path(environments, "qa").read_text()) == snapshot
+
+
+def test_snapshot_keeps_the_permissions_of_the_env_file(environments):
+    compile_env(environments, "qa")
+
+    assert snapshot_path(environments, "qa").stat().st_mode & 0o777 == 0o640
+    assert [p.name for p in (environments / "qa").iterdir() if p.name.startswith(".")] == []
+
+
+def test_cyclic_layers_are_rejected(environments):
+    (environments / "base" / "env").write_text("AUTOX_EXTENDS=qa\n")
+
+    with pytest.raises(ValueError, match="cyclic"):
+        compile_env(environments, "qa")
+
+
+def test_changed_source_is_compiled_again(environments):
+    compile_env(environments, "qa")
+    (environments / "base" / "env").write_text("BASE_URL=https://changed.example\n")
+
+    assert load_env(environments, "qa")["values"]["BASE_URL"] == "https://changed.example"
+    assert json.loads(snapshot_path(environments, "qa").read_text())["values"]["BASE_URL"] == "https://changed.example"
+
+
+def test_touched_source_only_refreshes_the_stats(environments, monkeypatch):
+    compile_env(environments, "qa")
+    os.utime(environments / "base" / "env", (0, 0))
+    monkeypatch.setattr(env_snapshot, "compile_env", lambda *args, **kwargs: pytest.fail("compiled again"))
+
+    snapshot = load_env(environments, "qa")
+
+    assert snapshot["stats"][0][0] == 0
+    assert json.loads(snapshot_path(environments, "qa").read_text())["stats"] == snapshot["stats"]
+
+
+@pytest.mark.parametrize("snapshot_text", [None, "{not json"])
+def test_missing_or_corrupt_snapshot_falls_back_to_the_env_file(environments, snapshot_text):
+    if snapshot_text is not None:
+        snapshot_path(environments, "qa").write_text(snapshot_text)
+
+    assert load_env(environments, "qa", override=False)["values"]["TIMEOUT"] == "30"
+    assert os.environ["TIMEOUT"] == "30"
+
+
+def test_concurrent_refreshes_do_not_collide(environments):
+    compile_env(environments, "qa")
+    errors = []
+
+    def refresh():
+        try:
+            for _ in range(20):
+                compile_env(environments, "qa")
+        except OSError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=refresh) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert json.loads(snapshot_path(environments, "qa").read_text())["env"] == "qa"
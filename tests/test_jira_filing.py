@@ -0,0 +1,176 @@
+import json
+import os
+import threading
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from autox.utilities import raise_jira_ticket
+from autox.utilities.raise_jira_ticket import (
+    Failure,
+    JiraFiler,
+    SignatureCache,
+    failure_signature,
+    file_failures_in_background,
+)
+
+
+class FakeJiraHandler(BaseHTTPRequestHandler):
+    """Just enough of the Jira REST API for creating issues and adding attachments."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, body, status=200):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.server.calls[("GET", self.path)] += 1
+        self._reply(
+            {"baseUrl": self.server.url, "version": "9.0.0", "versionNumbers": [9, 0, 0], "deploymentType": "Server"}
+        )
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path == "/rest/api/2/issue":
+            if "rejected" in json.loads(body)["fields"]["summary"]:
+                self._reply({"errorMessages": [], "errors": {"summary": "Summary is invalid"}}, 400)
+                return
+            self.server.calls[("POST", "issue")] += 1
+            key = f"QA-{self.server.calls[('POST', 'issue')]}"
+            self.server.issues[key] = json.loads(body)["fields"]
+            self._reply({"id": key.split("-")[1], "key": key, "self": f"{self.server.url}/rest/api/2/issue/{key}"}, 201)
+        else:
+            key = self.path.split("/")[-2]
+            self.server.attachments[key].append(len(body))
+            self._reply([{"id": "1", "filename": "attachment", "size": len(body)}])
+
+
+@pytest.fixture
+def fake_jira():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeJiraHandler)
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    server.calls, server.issues, server.attachments = Counter(), {}, defaultdict(list)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    raise_jira_ticket._clients.clear()
+    yield server
+    server.shutdown()
+    raise_jira_ticket._clients.clear()
+
+
+@pytest.fixture
+def filer(fake_jira, tmp_path):
+    return JiraFiler(fake_jira.url, "bot", "token", "QA", db_path=tmp_path / "signatures.db")
+
+
+def test_signature_ignores_volatile_details():
+    first = failure_signature(
+        "test_a", "Timeout after 30.5s at 2025-01-01 10:00:00 for 0x7f3a id 1b4e28ba-2fa1-11d2-883f-0016d3cca427"
+    )
+    second = failure_signature(
+        "test_a", "Timeout after 12.1s at 2025-02-03 11:22:33 for 0x1c2d id 6fa459ea-ee8a-3ca4-894e-db77e160355e"
+    )
+
+    assert first == second
+    assert first != failure_signature("test_b", "Timeout after 30.5s at 2025-01-01 10:00:00 for 0x7f3a")
+    assert failure_signature("test_a", "refused by localhost:54321 for order_id=1001 at 1712345678") == (
+        failure_signature("test_a", "refused by localhost:41234 for order_id=2002 at 1712349999")
+    )
+
+
+@pytest.mark.parametrize(
+    "error, other",
+    [
+        ("AssertionError: got 500 after 1.2s", "AssertionError: got 502 after 1.2s"),
+        ("expected 3 items, got 4", "expected 3 items, got 5"),
+    ],
+)
+def test_signature_keeps_status_codes_and_small_numbers(error, other):
+    assert failure_signature("test_a", error) != failure_signature("test_a", other)
+
+
+def test_failures_are_filed_once_over_one_client(fake_jira, filer, tmp_path):
+    attachments = []
+    for name in ("report.html", "autox_logs.log"):
+        (tmp_path / name).write_text(f"{name} contents")
+        attachments.append(str(tmp_path / name))
+    failures = [
+        Failure("test_a", "test_a failed", "AssertionError: got 500 after 1.2s", attachments),
+        Failure("test_a", "test_a failed", "AssertionError: got 500 after 3.4s", attachments),
+        Failure("test_b", "test_b failed", "KeyError: 'id'", attachments),
+    ]
+
+    filed = filer.file(failures)
+
+    assert filed == {"test_a": "QA-1", "test_b": "QA-2"}
+    assert fake_jira.calls[("GET", "/rest/api/2/serverInfo")] == 1
+    assert {key: len(sizes) for key, sizes in fake_jira.attachments.items()} == {"QA-1": 2, "QA-2": 2}
+    assert fake_jira.issues["QA-2"]["labels"] == ["automated-bug"]
+
+    # A later run hits the signature cache instead of filing again
+    assert filer.file([Failure("test_b", "test_b failed", "KeyError: 'id'")]) == {"test_b": "QA-2"}
+    assert fake_jira.calls[("POST", "issue")] == 2
+
+
+def test_rejected_issue_does_not_stop_the_batch(fake_jira, filer, tmp_path):
+    (tmp_path / "report.html").write_text("report")
+    attachments = [str(tmp_path / "report.html")]
+    failures = [
+        Failure("test_a", "test_a failed", "AssertionError", attachments),
+        Failure("test_b", "test_b rejected", "KeyError: 'id'", attachments),
+        Failure("test_c", "test_c failed", "TimeoutError", attachments),
+    ]
+
+    assert filer.file(failures) == {"test_a": "QA-1", "test_c": "QA-2"}
+    # Issues created before and after the rejected one still get their attachments
+    assert {key: len(sizes) for key, sizes in fake_jira.attachments.items()} == {"QA-1": 1, "QA-2": 1}
+
+    # The rejected failure was not cached as filed, so a later run files it
+    retried = Failure("test_b", "test_b failed", "KeyError: 'id'")
+    assert filer.file([retried]) == {"test_b": "QA-3"}
+
+
+def test_failure_claimed_by_another_filer_is_not_filed_twice(fake_jira, filer, tmp_path):
+    failure = Failure("test_a", "test_a failed", "AssertionError")
+    signature = failure_signature(failure.nodeid, failure.error)
+    # e.g. the filer of another shard that saw the same failure and is creating its issue
+    other = SignatureCache(tmp_path / "signatures.db")
+    assert other.claim(signature, failure.nodeid)
+
+    assert filer.file([failure]) == {}
+    assert fake_jira.calls[("POST", "issue")] == 0
+
+    other.record(signature, failure.nodeid, "QA-7")
+    other.close()
+    assert filer.file([failure]) == {"test_a": "QA-7"}
+
+
+def test_claim_of_a_dead_filer_is_taken_over(tmp_path, monkeypatch):
+    cache = SignatureCache(tmp_path / "signatures.db")
+    assert cache.claim("abc", "test_a")
+    assert not cache.claim("abc", "test_a")
+
+    monkeypatch.setattr(raise_jira_ticket, "CLAIM_TIMEOUT_SECONDS", -1)
+    assert cache.claim("abc", "test_a")
+    cache.close()
+
+
+def test_background_filer_output_goes_to_the_run_directory(tmp_path, monkeypatch):
+    # Stands in for the Python interpreter running the filer module
+    fake_python = tmp_path / "python"
+    fake_python.write_text('#!/bin/sh\necho "filing $3"\necho "Traceback: Jira unreachable" >&2\nexit 1\n')
+    os.chmod(fake_python, 0o755)
+    monkeypatch.setattr(raise_jira_ticket.sys, "executable", str(fake_python))
+    failures_file = tmp_path / "run" / raise_jira_ticket.FAILURES_FILE_NAME
+
+    process = file_failures_in_background([Failure("test_a", "test_a failed", "boom")], failures_file)
+
+    assert process.wait(timeout=10) == 1
+    assert json.loads(failures_file.read_text())[0]["nodeid"] == "test_a"
+    assert failures_file.with_suffix(".log").read_text() == f"filing {failures_file}\nTraceback: Jira unreachable\n"
@@ -0,0 +1,110 @@
+import logging
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from autox.autox_logger import run_log_file_name
+from autox.utilities.log_retention import RUN_LOCK_FILE_NAME, apply_retention, run_in_use
+from autox.utilities.structured_log import LOG_INDEX_DB_NAME, JsonLinesHandler, query_logs
+
+DAY = 24 * 3600
+
+
+def make_run(log_root, name, age_seconds, content="x" * 100):
+    run_dir = log_root / name
+    run_dir.mkdir(parents=True)
+    log_file = run_dir / "autox_logs.log"
+    log_file.write_text(content)
+    mtime = time.time() - age_seconds
+    os.utime(log_file, (mtime, mtime))
+    return run_dir
+
+
+@pytest.fixture
+def lock_holder():
+    """Another process writing to a run: holds its lock until it is stopped."""
+    processes = []
+
+    def hold(run_dir):
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                "import sys; from autox.utilities.log_retention import hold_run_lock; "
+                "hold_run_lock(sys.argv[1]); print('locked', flush=True); sys.stdin.read()",
+                str(run_dir),
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        processes.append(process)
+        assert process.stdout.readline().strip() == "locked"
+        return process
+
+    yield hold
+    for process in processes:
+        process.communicate(timeout=10)
+
+
+def test_old_runs_are_deleted_and_idle_runs_compressed(tmp_path):
+    old = make_run(tmp_path, "run-2024-01-01-00-00-00", 30 * DAY)
+    idle = make_run(tmp_path, "run-2024-02-01-00-00-00", 2 * 3600)
+    current = make_run(tmp_path, "run-2024-02-02-00-00-00", 2 * 3600)
+
+    deleted, compressed = apply_retention(tmp_path, max_age_days=14, exclude=[current])
+
+    assert (deleted, compressed) == ([old], [idle])
+    assert not old.exists()
+    assert [p.name for p in idle.iterdir()] == ["autox_logs.log.gz"]
+    assert (current / "autox_logs.log").exists()
+
+
+def test_runs_a_live_process_holds_are_left_alone(tmp_path, lock_holder):
+    live = make_run(tmp_path, "run-2024-01-01-00-00-00", 30 * DAY)
+    lock_holder(live)
+
+    assert run_in_use(live)
+    assert apply_retention(tmp_path, max_age_days=14, max_total_bytes=0) == ([], [])
+    assert (live / "autox_logs.log").exists()
+
+
+def test_lock_is_released_when_the_process_exits(tmp_path, lock_holder):
+    run_dir = make_run(tmp_path, "run-2024-01-01-00-00-00", 2 * 3600)
+    lock_holder(run_dir).communicate(timeout=10)
+
+    assert (run_dir / RUN_LOCK_FILE_NAME).exists()
+    assert not run_in_use(run_dir)
+    assert apply_retention(tmp_path) == ([], [run_dir])
+
+
+def test_index_rows_of_deleted_runs_are_removed(tmp_path):
+    index_db = tmp_path / LOG_INDEX_DB_NAME
+    runs = {}
+    for run_id, age in (("old", 30 * DAY), ("new", 0)):
+        run_dir = tmp_path / f"run-{run_id}"
+        handler = JsonLinesHandler(run_dir / "autox_logs-1.jsonl", index_db)
+        record = logging.makeLogRecord({"msg": f"{run_id} run", "levelno": logging.INFO, "levelname": "INFO"})
+        record.run_id, record.worker_id, record.nodeid = run_id, "main", None
+        handler.handle(record)
+        handler.close()
+        mtime = time.time() - age
+        os.utime(run_dir / "autox_logs-1.jsonl", (mtime, mtime))
+        runs[run_id] = run_dir
+
+    assert apply_retention(tmp_path, max_age_days=14, compress=False)[0] == [runs["old"]]
+
+    assert query_logs(index_db, run_id="old") == []
+    assert [r["message"] for r in query_logs(index_db, run_id="new")] == ["new run"]
+
+
+def test_workers_log_to_their_own_file(monkeypatch):
+    monkeypatch.delenv("PYTEST_XDIST_WORKER", raising=False)
+    monkeypatch.delenv("AUTOX_WORKER_ID", raising=False)
+    assert run_log_file_name() == "autox_logs.log"
+
+    monkeypatch.setenv("AUTOX_WORKER_ID", "shard-2")
+    assert run_log_file_name() == "autox_logs-shard-2.log"
@@ -0,0 +1,60 @@
+import gzip
+
+from autox.utilities.log_scanner import scan_log_file, scan_log_files
+
+
+def test_line_numbers_and_offsets_across_chunks(tmp_path):
+    log = tmp_path / "app.log"
+    log.write_text("ok\nERROR one\nok\nretry ERROR two FATAL\nok\nFATAL")
+
+    result = scan_log_file(log, ["ERROR", "FATAL"], chunk_size=5)
+
+    assert [(m.line_number, m.offset, m.pattern) for m in result.matches] == [
+        (2, 3, "ERROR"),
+        (4, 16, "ERROR"),
+        (6, 41, "FATAL"),
+    ]
+    assert (result.end_offset, result.end_line) == (46, 6)
+
+
+def test_regex_anchors_match_at_every_line(tmp_path):
+    log = tmp_path / "app.log"
+    log.write_text("INFO started\nERROR failed\nINFO ERROR in message\n")
+
+    result = scan_log_file(log, [r"^ERROR\b"], regex=True)
+
+    assert [m.line for m in result.matches] == ["ERROR failed"]
+
+
+def test_rotated_and_compressed_files_are_not_rescanned(tmp_path):
+    log, state = tmp_path / "app.log", tmp_path / "state.json"
+    log.write_text("ERROR first\nok\n")
+    assert len(scan_log_files([log], ["ERROR"], rotated=True, state_file=state).matches) == 1
+
+    # Written after the scan, then rotated and compressed before the next one
+    with log.open("a") as f:
+        f.write("ERROR second\n")
+    (tmp_path / "app.log.1.gz").write_bytes(gzip.compress(log.read_bytes()))
+    log.unlink()
+    log.write_text("ERROR third\n")
+
+    result = scan_log_files([log], ["ERROR"], rotated=True, state_file=state)
+
+    assert [(m.path.rsplit("/", 1)[1], m.line_number, m.line) for m in result.matches] == [
+        ("app.log.1.gz", 3, "ERROR second"),
+        ("app.log", 1, "ERROR third"),
+    ]
+    assert scan_log_files([log], ["ERROR"], rotated=True, state_file=state).matches == []
+
+
+def test_renamed_file_keeps_its_offset(tmp_path):
+    log, state = tmp_path / "app.log", tmp_path / "state.json"
+    log.write_text("ERROR first\n")
+    scan_log_files([log], ["ERROR"], rotated=True, state_file=state)
+
+    log.rename(tmp_path / "app.log.1")
+    log.write_text("ERROR first\n")
+
+    # Same content, but a new file: only the new app.log is scanned
+    result = scan_log_files([log], ["ERROR"], rotated=True, state_file=state)
+    assert [m.path for m in result.matches] == [str(log)]
@@ -0,0 +1,102 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from autox.utilities.log_tail import LogTail
+
+
+@pytest.fixture
+def service_log(tmp_path):
+    log = tmp_path / "app.log"
+    log.write_text("ERROR before the session\n")
+    return log
+
+
+def new_tail(service_log):
+    return LogTail([service_log], patterns=["ERROR"], cursor_file=service_log.parent / "env" / "log_cursors.json")
+
+
+def lines(result):
+    return [match.line for match in result.matches]
+
+
+def test_only_appended_lines_are_scanned(service_log):
+    tail = new_tail(service_log)
+    tail.fast_forward()
+
+    with service_log.open("a") as f:
+        f.write("ok\nERROR first\nERROR partial")
+    assert lines(tail.check()) == ["ERROR first"]
+
+    # The partial line is scanned once it is complete
+    with service_log.open("a") as f:
+        f.write(" line\n")
+    assert lines(tail.check()) == ["ERROR partial line"]
+    assert tail.check().matches == []
+
+
+def test_cursors_are_kept_between_sessions(service_log):
+    new_tail(service_log).fast_forward()
+    with service_log.open("a") as f:
+        f.write("ERROR while no session ran\n")
+
+    assert lines(new_tail(service_log).check()) == ["ERROR while no session ran"]
+
+
+def test_remainder_of_a_rotated_file_is_scanned(service_log):
+    tail = new_tail(service_log)
+    tail.fast_forward()
+    with service_log.open("a") as f:
+        f.write("ERROR before rotation\n")
+    service_log.rename(service_log.with_name("app.log.1"))
+    service_log.write_text("ERROR after rotation\n")
+
+    assert lines(tail.check()) == ["ERROR before rotation", "ERROR after rotation"]
+
+
+def test_truncated_file_is_read_from_the_start(service_log):
+    tail = new_tail(service_log)
+    tail.fast_forward()
+    service_log.write_text("ERROR\n")
+
+    assert [(m.line_number, m.line) for m in tail.check().matches] == [(1, "ERROR")]
+
+
+def test_unreadable_cursor_file_counts_as_no_cursors(service_log):
+    tail = new_tail(service_log)
+    tail.fast_forward()
+    # e.g. left half-written by a process killed while saving
+    tail.cursor_file.write_text('{"local:')
+
+    assert lines(new_tail(service_log).check()) == ["ERROR before the session"]
+    assert [path.name for path in tail.cursor_file.parent.iterdir()] == ["log_cursors.json"]
+
+
+class FailingTail:
+    def check(self):
+        raise PermissionError("Permission denied: '/var/log/app/app.log'")
+
+
+@pytest.fixture
+def makereport_hook(request, monkeypatch):
+    # The hook of tests/conftest.py, called as pytest would call a hookwrapper
+    conftest = request.config.pluginmanager.get_plugin(str(Path(__file__).with_name("conftest.py")))
+    monkeypatch.setattr(conftest.autox_config, "jira_auto_file", False)
+
+    def run(item, report):
+        hook = conftest.pytest_runtest_makereport(item, None)
+        next(hook)
+        with pytest.raises(StopIteration):
+            hook.send(SimpleNamespace(get_result=lambda: report))
+
+    return run
+
+
+def test_failing_log_check_does_not_abort_the_session(makereport_hook):
+    item = SimpleNamespace(nodeid="tests/test_a.py::test_a", funcargs={"service_log_check": FailingTail()})
+    report = SimpleNamespace(when="call", outcome="failed", failed=True, duration=0.1, sections=[])
+
+    makereport_hook(item, report)
+
+    assert report.sections == []
@@ -0,0 +1,79 @@
+import json
+import xml.etree.ElementTree as ET
+
+from autox.utilities.junit_util import iter_testcases, merge_junit_files
+from autox.utilities.report_builder import build_report
+
+SHARD_0 = """<?xml version="1.0" encoding="utf-8"?>
+<testsuites><testsuite name="pytest" tests="3" failures="1" errors="0" skipped="0" time="1.5">
+<testcase classname="tests.test_a" name="test_ok" time="0.5"/>
+<testcase classname="tests.test_a" name="test_bad" time="0.75">
+<properties><property name="attachment" value="{shot}"/></properties>
+<failure message="AssertionError: 500 &lt; 200">assert 500 &lt; 200</failure></testcase>
+<testcase classname="tests.test_a" name="test_other" time="0.25"/>
+</testsuite></testsuites>
+"""
+SHARD_1 = """<?xml version="1.0" encoding="utf-8"?>
+<testsuite name="pytest" tests="2" failures="0" errors="0" skipped="1" time="2.0">
+<testcase classname="tests.test_b" name="test_slow" time="2.0"/>
+<testcase classname="tests.test_b" name="test_skip" time="0"><skipped message="later"/></testcase>
+</testsuite>
+"""
+
+
+def write_shards(tmp_path):
+    shards = [tmp_path / "test-results-0.xml", tmp_path / "test-results-1.xml"]
+    shards[0].write_text(SHARD_0.format(shot=tmp_path / "screenshots" / "test_bad.png"))
+    shards[1].write_text(SHARD_1)
+    return shards
+
+
+def test_merge_streams_suites_and_totals(tmp_path):
+    merged = merge_junit_files([*write_shards(tmp_path), tmp_path / "missing.xml"], tmp_path / "merged.xml", ["a", "b"])
+
+    root = ET.parse(merged).getroot()
+    assert {attr: root.get(attr) for attr in ("tests", "failures", "skipped", "time")} == {
+        "tests": "5",
+        "failures": "1",
+        "skipped": "1",
+        "time": "3.500",
+    }
+    assert [suite.get("name") for suite in root] == ["a", "b"]
+    cases = list(iter_testcases(merged, details=True))
+    assert [case["outcome"] for case in cases] == ["passed", "failed", "passed", "passed", "skipped"]
+    assert cases[1]["details"] == "assert 500 < 200"
+
+
+def test_report_pages_and_summary(tmp_path):
+    output = tmp_path / "report" / "report.html"
+
+    summary = build_report(write_shards(tmp_path), output, tmp_path / "summary.json", page_size=2)
+
+    assert (summary["tests"], summary["passed"], summary["failed"], summary["skipped"]) == (5, 3, 1, 1)
+    assert summary["pass_rate"] == 75.0
+    assert summary["slowest"][0] == {"key": "tests.test_b::test_slow", "time": 2.0}
+    assert json.loads((tmp_path / "summary.json").read_text())["failures"][0]["key"] == "tests.test_a::test_bad"
+    assert sorted(path.name for path in (output.parent / "report-data").iterdir()) == [
+        "failed-1.js",
+        "passed-1.js",
+        "passed-2.js",
+        "skipped-1.js",
+    ]
+    failed_page = (output.parent / "report-data" / "failed-1.js").read_text()
+    rows = json.loads(failed_page.removeprefix('autoxReportPage("failed", 1, ').removesuffix(");\n"))
+    # Attachments are linked relative to the report
+    assert rows[0]["attachments"] == ["../screenshots/test_bad.png"]
+    # Testcase details only live in the pages
+    assert "500 &lt; 200" not in output.read_text()
+
+
+def test_outcomes_without_tests_are_not_offered(tmp_path):
+    output = tmp_path / "report.html"
+
+    summary = build_report(write_shards(tmp_path)[1:], output, None)
+
+    assert (summary["tests"], summary["failed"], summary["error"], summary["duration"]) == (2, 0, 0, 2.0)
+    document = output.read_text()
+    assert "<option value='failed' disabled>failed (0)</option>" in document
+    assert "<option value='passed'>passed (1)</option>" in document
+    assert sorted(path.name for path in (tmp_path / "report-data").iterdir()) == ["passed-1.js", "skipped-1.js"]
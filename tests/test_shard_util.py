@@ -0,0 +1,38 @@
+from autox.utilities.shard_util import estimate_durations, group_test_ids, split_into_shards
+
+TEST_IDS = [
+    "tests/ui_tests/test_frames.py::TestFrames::test_one",
+    "tests/ui_tests/test_frames.py::TestFrames::test_two",
+    "tests/ui_tests/test_dom.py::TestDom::test_table[chrome]",
+    "tests/api_tests/test_health.py::test_health",
+    "tests/api_tests/test_users.py::test_users",
+]
+DURATIONS = {
+    "tests.ui_tests.test_frames.TestFrames::test_one": 5.0,
+    "tests.ui_tests.test_frames.TestFrames::test_two": 3.0,
+    "tests.ui_tests.test_dom.TestDom::test_table[chrome]": 6.0,
+    "tests.api_tests.test_health::test_health": 1.0,
+}
+
+
+def test_classes_are_never_split():
+    groups = group_test_ids(TEST_IDS)
+
+    assert groups["tests/ui_tests/test_frames.py::TestFrames"] == TEST_IDS[:2]
+    assert groups["tests/ui_tests/test_dom.py::TestDom"] == [TEST_IDS[2]]
+    assert groups["tests/api_tests/test_health.py"] == [TEST_IDS[3]]
+
+
+def test_untimed_tests_get_the_mean_duration():
+    estimates = estimate_durations(TEST_IDS, DURATIONS)
+
+    assert estimates[TEST_IDS[0]] == 5.0
+    assert estimates[TEST_IDS[4]] == 15.0 / 4
+
+
+def test_shards_are_balanced_longest_first():
+    shards = split_into_shards(TEST_IDS, 2, DURATIONS)
+
+    # TestFrames (8s) and TestDom (6s) open the two shards, then each module joins the lighter shard
+    assert shards == [[*TEST_IDS[:2], TEST_IDS[3]], [TEST_IDS[2], TEST_IDS[4]]]
+    assert split_into_shards(TEST_IDS[:2], 3, DURATIONS)[1:] == [[], []]
@@ -0,0 +1,110 @@
+import gzip
+import logging
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from autox.autox_logger import logger
+from autox.utilities.structured_log import (
+    INDEX_FLUSH_SECONDS,
+    JsonLinesHandler,
+    LogContextFilter,
+    query_logs,
+    set_log_context,
+)
+
+
+def write_records(handler, run_id, records, created=None):
+    for nodeid, level, message in records:
+        record = logging.makeLogRecord({"msg": message, "levelno": level, "levelname": logging.getLevelName(level)})
+        record.run_id, record.worker_id, record.nodeid = run_id, "gw0", nodeid
+        if created is not None:
+            record.created = created
+        handler.handle(record)
+
+
+def messages(index_db, **filters):
+    return [r["message"] for r in query_logs(index_db, run_id="run-1", **filters)]
+
+
+def test_records_are_queried_by_run_test_and_level(tmp_path):
+    index_db = tmp_path / "log_index.db"
+    handler = JsonLinesHandler(tmp_path / "run" / "autox_logs-1.jsonl", index_db)
+    write_records(
+        handler,
+        "run-1",
+        [
+            ("tests/test_a.py::test_login", logging.INFO, "opening login page"),
+            ("tests/test_a.py::test_logout", logging.ERROR, "logout failed"),
+            ("tests/test_a.py::test_login", logging.ERROR, "login failed"),
+        ],
+    )
+    write_records(handler, "run-2", [("tests/test_a.py::test_login", logging.INFO, "second run")])
+    handler.close()
+
+    assert [r["message"] for r in query_logs(index_db, test="test_login", run_id="run-1")] == [
+        "opening login page",
+        "login failed",
+    ]
+    assert [r["message"] for r in query_logs(index_db, level="error", run_id="run-1", limit=1)] == ["logout failed"]
+    # The latest run by default
+    assert [r["message"] for r in query_logs(index_db)] == ["second run"]
+
+
+def test_gzipped_files_are_read_by_offset(tmp_path):
+    index_db, log_file = tmp_path / "log_index.db", tmp_path / "autox_logs-1.jsonl"
+    handler = JsonLinesHandler(log_file, index_db)
+    write_records(handler, "run-1", [(None, logging.INFO, "first"), (None, logging.WARNING, "second")])
+    handler.close()
+
+    # As log retention compresses finished runs
+    (tmp_path / "autox_logs-1.jsonl.gz").write_bytes(gzip.compress(log_file.read_bytes()))
+    log_file.unlink()
+
+    assert [r["message"] for r in query_logs(index_db, level="WARNING")] == ["second"]
+
+
+def test_context_filter_stamps_the_running_test(monkeypatch):
+    monkeypatch.setenv("AUTOX_WORKER_ID", "shard-1")
+    record = logging.makeLogRecord({"msg": "step"})
+
+    set_log_context(nodeid="tests/test_a.py::test_login")
+    try:
+        LogContextFilter().filter(record)
+    finally:
+        set_log_context(nodeid=None)
+
+    assert (record.worker_id, record.nodeid) == ("shard-1", "tests/test_a.py::test_login")
+
+
+def test_index_rows_are_written_within_the_time_bound(tmp_path):
+    index_db = tmp_path / "log_index.db"
+    handler = JsonLinesHandler(tmp_path / "autox_logs-1.jsonl", index_db)
+    write_records(handler, "run-1", [(None, logging.INFO, "first"), (None, logging.INFO, "second")], created=1000.0)
+    assert messages(index_db) == []
+
+    write_records(handler, "run-1", [(None, logging.INFO, "later")], created=1000.0 + INDEX_FLUSH_SECONDS)
+
+    assert messages(index_db) == ["first", "second", "later"]
+    handler.close()
+
+
+def test_index_rows_are_written_when_each_test_ends(request, tmp_path):
+    # The hook of tests/conftest.py, called as pytest would call a hookwrapper
+    conftest = request.config.pluginmanager.get_plugin(str(Path(__file__).with_name("conftest.py")))
+    index_db = tmp_path / "log_index.db"
+    handler = JsonLinesHandler(tmp_path / "autox_logs-1.jsonl", index_db)
+    logger.addHandler(handler)
+    try:
+        hook = conftest.pytest_runtest_protocol(SimpleNamespace(nodeid="tests/test_a.py::test_a", stash={}), None)
+        next(hook)
+        write_records(handler, "run-1", [("tests/test_a.py::test_a", logging.INFO, "step")])
+        assert messages(index_db) == []
+        with pytest.raises(StopIteration):
+            next(hook)
+
+        assert messages(index_db, test="test_a") == ["step"]
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
@@ -0,0 +1,103 @@
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from autox.utilities.webdriver_pool import WebDriverPool
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def default_content(self):
+        pass
+
+    def window(self, handle):
+        self.driver.window = handle
+
+
+class FakeDriver:
+    def __init__(self):
+        self.crashed = False
+        self.quit_called = False
+        self.visited = []
+        self.calls = []
+        self.window_handles = ["main", "popup"]
+        self.cookies = True
+        self.switch_to = FakeSwitchTo(self)
+
+    @property
+    def current_url(self):
+        if self.crashed:
+            raise WebDriverException("session deleted")
+        return self.visited[-1] if self.visited else "about:blank"
+
+    def get(self, url):
+        self.visited.append(url)
+        self.calls.append(f"get {url}")
+
+    def refresh(self):
+        self.calls.append("refresh")
+
+    def close(self):
+        self.window_handles.remove(self.window)
+
+    def delete_all_cookies(self):
+        self.cookies = False
+        self.calls.append("delete_all_cookies")
+
+    def execute_script(self, script):
+        self.calls.append(f"execute_script {script}")
+
+    def maximize_window(self):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def pool():
+    return WebDriverPool(FakeDriver, size=1, home_url="https://app.example")
+
+
+def test_released_session_is_reset_and_reused(pool):
+    driver = pool.acquire()
+    driver.get("https://app.example/checkout")
+
+    pool.release(driver)
+
+    assert pool.acquire() is driver
+    assert (driver.window_handles, driver.cookies, driver.current_url) == (["main"], False, "https://app.example")
+
+
+def test_storage_is_cleared_on_the_home_page_before_reloading_it(pool):
+    driver = pool.acquire()
+    driver.get("https://other.example/login")
+    driver.calls.clear()
+
+    pool.release(driver)
+
+    assert driver.calls == [
+        "get https://app.example",
+        "delete_all_cookies",
+        "execute_script window.localStorage.clear(); window.sessionStorage.clear();",
+        "refresh",
+    ]
+
+
+def test_crashed_session_is_replaced(pool):
+    driver = pool.acquire()
+    pool.release(driver)
+    driver.crashed = True
+
+    replacement = pool.acquire()
+
+    assert replacement is not driver
+    assert driver.quit_called
+
+
+def test_acquire_times_out_when_the_pool_is_exhausted(pool):
+    pool.acquire()
+
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.1)
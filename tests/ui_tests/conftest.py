@@ -1,9 +1,16 @@
+import os
+import re
+
 import pytest
 from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
 
+from autox.autox_logger import RUN_LOG_DIR, create_run_directory, logger
 from autox.config import config
+from autox.utilities.artifact_bundle import Artifact
+from autox.utilities.chromedriver_cache import resolve_chromedriver
+from autox.utilities.webdriver_pool import WebDriverPool
 
 driver = None
 
@@ -31,10 +38,22 @@ def pytest_addoption(parser):
         default=False,
         help="Alias for --headless; enable headless mode",
     )
+    parser.addoption(
+        "--driver-offline",
+        action="store_true",
+        default=False,
+        help="Never download a chromedriver; fail fast unless one is pinned in the active env (env: CHROMEDRIVER_OFFLINE)",
+    )
+    parser.addoption(
+        "--driver-pool-size",
+        action="store",
+        type=int,
+        default=int(os.environ.get("DRIVER_POOL_SIZE", "1")),
+        help="Number of warm browser sessions kept per pytest worker (env: DRIVER_POOL_SIZE)",
+    )
 
 
-@pytest.fixture(scope="class")
-def setup_driver(request):
+def create_driver(request):
     # Prefer explicit selenium-specific option to avoid clashes with other plugins
     browser = request.config.getoption("--selenium-browser")
     if browser == "chrome":
@@ -49,13 +68,53 @@ def setup_driver(request):
         options.add_argument("--disable-dev-shm-usage")
         options.set_capability("goog:loggingPrefs", {"browser": "ALL"})
 
-        service = ChromeService(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
+        offline = True if request.config.getoption("--driver-offline") else None
+        service = ChromeService(resolve_chromedriver(offline=offline))
+        return webdriver.Chrome(service=service, options=options)
 
-    # driver.get("https://the-internet.herokuapp.com/")
-    driver.get(config.app_url)
-    driver.maximize_window()
+    raise pytest.UsageError(f"Unsupported --selenium-browser: {browser}")
+
+
+@pytest.fixture(scope="session")
+def driver_pool(request):
+    # One pool per pytest process, so every shard/worker keeps its own warm browsers
+    pool = WebDriverPool(
+        lambda: create_driver(request),
+        size=request.config.getoption("--driver-pool-size"),
+        home_url=config.app_url,
+    )
+    yield pool
+    pool.close()
+
+
+@pytest.fixture(scope="class")
+def setup_driver(request, driver_pool):
+    # The pool hands out a browser already at config.app_url and resets it on release
+    driver = driver_pool.acquire()
 
     request.cls.driver = driver
     yield driver
-    driver.quit()
+    driver_pool.release(driver)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    driver = getattr(item.cls, "driver", None) if item.cls else None
+    if report.when != "call" or not report.failed or driver is None:
+        return
+    create_run_directory(RUN_LOG_DIR)
+    path = RUN_LOG_DIR / "screenshots" / f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', item.nodeid)}.png"
+    path.parent.mkdir(exist_ok=True)
+    try:
+        if not driver.save_screenshot(str(path)):
+            return
+    except WebDriverException as e:
+        logger.warning(f"Unable to take a screenshot of {item.nodeid}: {e}")
+        return
+    # Shown in report.html: junit XML gets the properties of the item, which later reports copy
+    item.user_properties.append(("attachment", str(path)))
+    report.user_properties.append(("attachment", str(path)))
+    # Attached to the Jira issue filed for this failure (JIRA_AUTO_FILE)
+    report.autox_artifacts = [*getattr(report, "autox_artifacts", []), Artifact("screenshot.png", str(path))]
@@ -18,14 +18,14 @@ class Test_Frames:
 
     def test_i_frames_is_loaded(self, setup_driver):
         frames_objects = FramesObjects(self.driver)
-        self.driver.back()
+        frames_objects.back()
         assert "/frames" in self.driver.current_url
         logger.info(f"/frames present in url: {self.driver.current_url}")
         frames_objects.click_i_frames()
         logger.info("Clicked iFrames")
         assert "/iframe" in self.driver.current_url
         logger.info(f"/iframes present in url: {self.driver.current_url}")
-        self.driver.back()
+        frames_objects.back()
 
     def test_nested_frames(self, setup_driver):
         frames_objects = FramesObjects(self.driver)
@@ -38,7 +38,7 @@ class Test_Frames:
         frames_objects.validate_frameset()
         logger.info("Validated Frameset")
         # frames_objects.switch_to_default_content()
-        self.driver.back()
+        frames_objects.back()
 
     def test_i_frames(self, setup_driver):
         frames_objects = FramesObjects(self.driver)